@@ -0,0 +1,72 @@
+"""
+Per call overhead of the async client with many calls in flight.
+
+The client talks to an echo ROUTER socket run by zmq in a thread of this
+process, no server or worker, so the time is mostly the client's own:
+request ids, waiting for the responses and tracking their timeouts.
+
+    python client.py [concurrency]
+
+On one core, 50k calls, us per call by calls in flight:
+
+    in flight            1     100    1000   10000
+    event + wait_for   265     201     218     212
+    future + wheel     200     157     126     153
+
+The event and `wait_for` per call (a task and a timer handle each)
+were replaced by a future resolved by the receive loop,
+and one timer for all the timeouts.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import zmq
+
+from zero.zeromq_patterns.queue_device import AsyncZeroMQClient
+
+PORT = 5588
+CALLS = 50_000
+
+
+def echo(context: zmq.Context) -> None:
+    socket = context.socket(zmq.ROUTER)
+    socket.bind(f"tcp://127.0.0.1:{PORT}")
+    try:
+        # frames go back to the ident they came from
+        zmq.proxy(socket, socket)
+    except zmq.ContextTerminated:
+        socket.close()
+
+
+async def bench(concurrency: int) -> float:
+    client = AsyncZeroMQClient(default_timeout=10_000)
+    await client.connect(f"tcp://127.0.0.1:{PORT}")
+
+    async def worker(calls: int) -> None:
+        for _ in range(calls):
+            await client.request_multipart([b"header", b"message"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(CALLS // concurrency) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    client.close()
+    return elapsed / CALLS
+
+
+def main(concurrency: int) -> None:
+    context = zmq.Context()
+    thread = threading.Thread(target=echo, args=(context,), daemon=True)
+    thread.start()
+
+    per_call = asyncio.run(bench(concurrency))
+    print(f"{concurrency} in flight: {per_call * 1e6:.2f} us per call")
+
+    context.term()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
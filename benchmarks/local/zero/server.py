@@ -1,4 +1,5 @@
 import logging
+import os
 import uuid
 from datetime import datetime
 
@@ -46,4 +47,5 @@ if __name__ == "__main__":
     app.register_rpc(hello_world)
     app.register_rpc(save_order)
     app.register_rpc(decode_jwt)
-    app.run()
+    # compare a single broker with sharded ones, `make benchmark-zero-broker-threads`
+    app.run(broker_threads=int(os.environ.get("BROKER_THREADS", "1")))
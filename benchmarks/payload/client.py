@@ -0,0 +1,59 @@
+"""
+Round trip time over payload sizes, from 1 KB to 64 MB.
+
+Run the server first, `python server.py`, then `python client.py`.
+With `--legacy` the requests are sent as one frame like older clients do,
+to compare with the multipart requests that don't copy the payloads.
+"""
+
+import sys
+import time
+
+from server import PORT
+
+from zero import ZeroClient
+
+SIZES = [2**10 * 4**i for i in range(9)]  # 1 KB ... 64 MB
+TOTAL_BYTES = 256 * 2**20  # per size, so the small ones have enough rounds
+TIMEOUT = 60_000
+
+
+def human(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size} {unit}"
+        size //= 1024
+    return f"{size} GB"
+
+
+def bench(client: ZeroClient, func: str, size: int) -> float:
+    payload = b"x" * size
+    rounds = max(5, min(10_000, TOTAL_BYTES // size))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        client.call(func, payload, timeout=TIMEOUT)
+    return (time.perf_counter() - start) / rounds
+
+
+def main(legacy: bool) -> None:
+    client = ZeroClient("localhost", PORT, default_timeout=TIMEOUT)
+    client.call("size", b"")
+    if legacy:
+        # as if the server had no function table, one frame and padded names
+        client._client_inst.client_pool._headers = None  # type: ignore
+
+    print(f"{'size':>8} | {'echo (ms)':>10} | {'echo MB/s':>10} | {'upload (ms)':>11}")
+    for size in SIZES:
+        echo = bench(client, "echo", size)
+        upload = bench(client, "size", size)
+        mb_s = 2 * size / echo / 2**20
+        print(
+            f"{human(size):>8} | {echo * 1e3:>10.3f} | {mb_s:>10.1f} | {upload * 1e3:>11.3f}"
+        )
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main("--legacy" in sys.argv)
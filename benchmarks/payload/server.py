@@ -0,0 +1,18 @@
+from zero import ZeroServer
+
+PORT = 5559
+
+
+def echo(msg: bytes) -> bytes:
+    return msg
+
+
+def size(msg: bytes) -> int:
+    return len(msg)
+
+
+if __name__ == "__main__":
+    app = ZeroServer(port=PORT)
+    app.register_rpc(echo)
+    app.register_rpc(size)
+    app.run(workers=2)
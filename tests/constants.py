@@ -2,3 +2,16 @@ HOST = "localhost"
 SINGLE_SERVER_PORT = 5559
 MULTIPLE_SERVERS_PORT1 = 8800
 MULTIPLE_SERVERS_PORT2 = 8801
+ASYNC_WORKER_PORT = 8810
+LRU_PORT = 8820
+DIRECT_CONNECT_PORT = 8830
+BROKER_THREADS_PORT = 8840
+CACHE_PORT = 8850
+BACKPRESSURE_PORT = 8860
+BALANCING_PORT1 = 8870
+BALANCING_PORT2 = 8871
+# nothing listens there
+BALANCING_DEAD_PORT = 8879
+POOLS_PORT = 8880
+AUTOSCALE_PORT = 8881
+RECYCLING_PORT = 8882
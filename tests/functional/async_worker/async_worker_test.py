@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient, ZeroClient
+from zero.error import OverloadedException
+
+
+def test_sync_call(async_worker_server):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.ASYNC_WORKER_PORT)
+    assert client.call("echo", "Hello") == "Hello"
+    assert client.call("sleep_async", 10) == 10
+
+
+@pytest.mark.asyncio
+async def test_coroutines_run_concurrently_in_one_worker(
+    async_worker_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.ASYNC_WORKER_PORT)
+    await client.call("echo", "warm up")
+
+    start = time.time()
+    results = await asyncio.gather(
+        *[client.call("sleep_async", 300, timeout=5000) for _ in range(10)]
+    )
+    elapsed = time.time() - start
+
+    assert results == [300] * 10
+    # a single worker would take 3 seconds if requests were served one by one
+    assert elapsed < 1.5
+
+
+@pytest.mark.asyncio
+async def test_rpc_concurrency_limit(
+    async_worker_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.ASYNC_WORKER_PORT)
+    await client.call("echo", "warm up")
+
+    results = await asyncio.gather(
+        *[client.call("sleep_limited", 300, timeout=5000) for _ in range(3)],
+        return_exceptions=True,
+    )
+
+    assert results.count(300) == 1
+    assert sum(isinstance(res, OverloadedException) for res in results) == 2
+
+
+@pytest.mark.asyncio
+async def test_blocking_rpc_runs_in_thread_pool(
+    async_worker_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.ASYNC_WORKER_PORT)
+    await client.call("echo", "warm up")
+
+    start = time.time()
+    results = await asyncio.gather(
+        *[client.call("sleep_blocking", 300, timeout=5000) for _ in range(4)],
+        client.call("echo", "not blocked", timeout=5000),
+    )
+    elapsed = time.time() - start
+
+    assert results == [300] * 4 + ["not blocked"]
+    # inline the blocking calls would take 1.2 seconds
+    assert elapsed < 0.9
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from zero import ZeroServer
+
+
+async def sleep_async(msg: int) -> int:
+    await asyncio.sleep(msg / 1000)
+    return msg
+
+
+def echo(msg: str) -> str:
+    return msg
+
+
+async def sleep_limited(msg: int) -> int:
+    await asyncio.sleep(msg / 1000)
+    return msg
+
+
+def sleep_blocking(msg: int) -> int:
+    time.sleep(msg / 1000)
+    return msg
+
+
+def run(port):
+    print("Starting async worker server on port", port)
+    app = ZeroServer(port=port)
+    app.register_rpc(sleep_async)
+    app.register_rpc(echo)
+    app.register_rpc(max_concurrency=1)(sleep_limited)
+    app.register_rpc(executor="thread")(sleep_blocking)
+    app.run(1, async_workers=True, max_concurrency=100, thread_pool_size=4)
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient
+
+
+@pytest.mark.asyncio
+async def test_workers_added_under_load(
+    autoscale_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.AUTOSCALE_PORT)
+    first = await client.call("work", 0)
+
+    # calls keep waiting for the one worker, until more are added
+    pids = set()
+    start = time.time()
+    while len(pids) < 2 and time.time() - start < 10:
+        pids.update(
+            await asyncio.gather(
+                *[client.call("work", 300, timeout=10000) for _ in range(3)]
+            )
+        )
+
+    assert first in pids
+    assert len(pids) > 1
@@ -0,0 +1,17 @@
+import os
+import time
+
+from zero import ZeroServer, config
+
+
+def work(msg: int) -> int:
+    time.sleep(msg / 1000)
+    return os.getpid()
+
+
+def run(port):
+    print("Starting autoscale server on port", port)
+    config.ZEROMQ_PATTERN = "lru"
+    app = ZeroServer(port=port)
+    app.register_rpc(work)
+    app.run(1, min_workers=1, max_workers=3)
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient
+
+
+@pytest.mark.asyncio
+async def test_requests_go_to_the_idle_worker(
+    backpressure_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.BACKPRESSURE_PORT)
+    await client.call("pid", None)
+
+    # takes the only slot of one worker
+    busy = asyncio.create_task(client.call("slow_pid", 1500, timeout=5000))
+    await asyncio.sleep(0.2)
+
+    # none waits behind the busy worker, they would time out
+    results = await asyncio.gather(
+        *[client.call("pid", None, timeout=1000) for _ in range(10)]
+    )
+    busy_pid = await busy
+
+    assert busy_pid not in results
+    assert len(set(results)) == 1
+    client.close()
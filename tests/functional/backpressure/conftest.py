@@ -0,0 +1,20 @@
+import pytest
+
+from tests import constants
+from tests.utils import kill_process, start_server
+
+from .server import run
+
+try:
+    from pytest_cov.embed import cleanup_on_sigterm
+except ImportError:
+    pass
+else:
+    cleanup_on_sigterm()
+
+
+@pytest.fixture(scope="session")
+def backpressure_server():
+    process = start_server(constants.BACKPRESSURE_PORT, run)
+    yield process
+    kill_process(process)
@@ -0,0 +1,23 @@
+import asyncio
+import os
+
+from zero import ZeroServer, config
+
+
+async def slow_pid(msg: int) -> int:
+    await asyncio.sleep(msg / 1000)
+    return os.getpid()
+
+
+async def pid() -> int:
+    return os.getpid()
+
+
+def run(port):
+    print("Starting backpressure server on port", port)
+    # the proxy pattern keeps sending requests to saturated workers
+    config.ZEROMQ_PATTERN = "lru"
+    app = ZeroServer(port=port)
+    app.register_rpc(slow_pid)
+    app.register_rpc(pid)
+    app.run(2, async_workers=True, max_concurrency=1)
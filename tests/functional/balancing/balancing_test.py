@@ -0,0 +1,114 @@
+import asyncio
+import collections
+import time
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient, Hedging, LoadBalancing, ZeroClient
+from zero.error import TimeoutException
+
+PORTS = {constants.BALANCING_PORT1, constants.BALANCING_PORT2}
+ENDPOINTS = [("localhost", constants.BALANCING_PORT2)]
+
+
+def test_round_robin(balancing_servers):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.BALANCING_PORT1, endpoints=ENDPOINTS)
+
+    counts = collections.Counter(client.call("served_by", "") for _ in range(10))
+    assert counts == {port: 5 for port in PORTS}
+    client.close()
+
+
+def test_unreachable_server_is_ejected(
+    balancing_servers,
+):  # pylint: disable=unused-argument
+    client = ZeroClient(
+        "localhost",
+        constants.BALANCING_PORT1,
+        default_timeout=300,
+        endpoints=ENDPOINTS + [("localhost", constants.BALANCING_DEAD_PORT)],
+    )
+
+    assert {client.call("served_by", "") for _ in range(10)} == PORTS
+    client.close()
+
+
+def test_server_that_times_out_is_ejected(
+    balancing_servers,
+):  # pylint: disable=unused-argument
+    client = ZeroClient(
+        "localhost",
+        constants.BALANCING_PORT1,
+        endpoints=ENDPOINTS,
+        balancing=LoadBalancing(max_timeouts=2),
+    )
+
+    timeouts = 0
+    for _ in range(10):
+        try:
+            assert client.call("slow_on", constants.BALANCING_PORT1, timeout=100) == (
+                constants.BALANCING_PORT2
+            )
+        except TimeoutException:
+            timeouts += 1
+    assert timeouts == 2
+    client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strategy", ["least_outstanding", "power_of_two"])
+async def test_in_flight_strategies(
+    balancing_servers, strategy
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient(
+        "localhost",
+        constants.BALANCING_PORT1,
+        endpoints=ENDPOINTS,
+        balancing=LoadBalancing(strategy),
+    )
+
+    ports = await asyncio.gather(*[client.call("served_by", "") for _ in range(100)])
+    assert set(ports) == PORTS
+    client.close()
+
+
+def test_invalid_balancing():
+    with pytest.raises(ValueError):
+        ZeroClient("localhost", constants.BALANCING_PORT1, balancing="round_robin")
+
+
+@pytest.mark.asyncio
+async def test_hedging(balancing_servers):  # pylint: disable=unused-argument
+    client = AsyncZeroClient(
+        "localhost",
+        constants.BALANCING_PORT1,
+        endpoints=ENDPOINTS,
+        hedging={"slow_on": Hedging(after=50)},
+    )
+    assert await client.call("served_by", "") == constants.BALANCING_PORT1
+
+    # every call goes to the slow server first, and is hedged to the other one
+    start = time.perf_counter()
+    for _ in range(4):
+        port = await client.call("slow_on", constants.BALANCING_PORT1, timeout=1000)
+        assert port == constants.BALANCING_PORT2
+    assert time.perf_counter() - start < 0.6
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_hedging_out_of_budget(
+    balancing_servers,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient(
+        "localhost",
+        constants.BALANCING_PORT1,
+        endpoints=ENDPOINTS,
+        hedging={"slow_on": Hedging(after=50)},
+        hedge_budget=0,
+    )
+
+    port = await client.call("slow_on", constants.BALANCING_PORT1, timeout=1000)
+    assert port == constants.BALANCING_PORT1
+    client.close()
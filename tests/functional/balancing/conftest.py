@@ -0,0 +1,24 @@
+import pytest
+
+from tests import constants
+from tests.utils import kill_process, start_server
+
+from .server import run
+
+try:
+    from pytest_cov.embed import cleanup_on_sigterm
+except ImportError:
+    pass
+else:
+    cleanup_on_sigterm()
+
+
+@pytest.fixture(scope="session")
+def balancing_servers():
+    processes = [
+        start_server(constants.BALANCING_PORT1, run),
+        start_server(constants.BALANCING_PORT2, run),
+    ]
+    yield processes
+    for process in processes:
+        kill_process(process)
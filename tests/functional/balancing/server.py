@@ -0,0 +1,27 @@
+import time
+
+from zero import ZeroServer
+
+# port of the server, set before the workers start
+PORT = 0
+
+
+def served_by(msg: str) -> int:
+    return PORT
+
+
+def slow_on(port: int) -> int:
+    if port == PORT:
+        time.sleep(0.3)
+    return PORT
+
+
+def run(port):
+    global PORT  # pylint: disable=global-statement
+    PORT = port
+
+    print("Starting balancing server on port", port)
+    app = ZeroServer(port=port)
+    app.register_rpc(served_by)
+    app.register_rpc(slow_on)
+    app.run(2)
@@ -0,0 +1,30 @@
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient, ZeroClient
+
+
+def test_calls_are_spread_over_brokers(
+    broker_threads_server,
+):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.BROKER_THREADS_PORT)
+    assert client.call("__endpoints__", None) == [
+        constants.BROKER_THREADS_PORT,
+        constants.BROKER_THREADS_PORT + 1,
+    ]
+
+    # each broker has its own worker
+    pids = {client.call("pid", None) for _ in range(4)}
+    assert len(pids) == 2
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_calls_are_spread_over_brokers(
+    broker_threads_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.BROKER_THREADS_PORT)
+
+    pids = {await client.call("async_pid", None) for _ in range(4)}
+    assert len(pids) == 2
+    client.close()
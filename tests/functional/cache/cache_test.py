@@ -0,0 +1,177 @@
+import asyncio
+import time
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient, CachePolicy, ZeroClient
+from zero.error import TimeoutException
+
+
+def test_cached_responses(cache_server):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.CACHE_PORT)
+
+    # one cached response per worker
+    values = {client.call("now", "a") for _ in range(6)}
+    assert len(values) <= 2
+
+    # cached by the message
+    assert client.call("now", "b") not in values
+
+    # counted on all the workers, whichever got the calls
+    stats = client.call("__cache_stats__", None)["now"]
+    assert stats["hits"] + stats["misses"] == 7
+    assert stats["misses"] == len(values) + 1
+    client.close()
+
+
+def test_invalidate_cache_reaches_all_workers(
+    cache_server,
+):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.CACHE_PORT)
+
+    values = {client.call("now", "c") for _ in range(6)}
+    assert client.call("__invalidate_cache__", "now") == ["now"]
+
+    new_values = {client.call("now", "c") for _ in range(6)}
+    assert not values & new_values
+    assert len(new_values) <= 2
+    client.close()
+
+
+def test_shared_cache(cache_server):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.CACHE_PORT)
+
+    # cached by one worker, served by all
+    values = {client.call("shared_now", "a") for _ in range(6)}
+    assert len(values) == 1
+
+    client.call("__invalidate_cache__", "shared_now")
+    new_values = {client.call("shared_now", "a") for _ in range(6)}
+    assert len(new_values) == 1
+    assert new_values != values
+
+    stats = client.call("__cache_stats__", None)["shared_now"]
+    assert stats == {"hits": 10, "misses": 2}
+    client.close()
+
+
+def test_cache_ttl(cache_server):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.CACHE_PORT)
+
+    values = {client.call("now_short_ttl", "a") for _ in range(4)}
+    time.sleep(0.3)
+
+    assert client.call("now_short_ttl", "a") not in values
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_cached_responses(cache_server):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.CACHE_PORT)
+
+    values = {await client.call("async_now", "a") for _ in range(6)}
+    assert len(values) <= 2
+
+    assert sorted(await client.call("__invalidate_cache__", None)) == [
+        "async_now",
+        "hinted_now",
+        "now",
+        "now_short_ttl",
+        "shared_now",
+    ]
+    assert not values & {await client.call("async_now", "a") for _ in range(6)}
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_calls(cache_server):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.CACHE_PORT, coalesce=True)
+
+    values = await asyncio.gather(*[client.call("slow_now", 100) for _ in range(10)])
+    # one request for all of them
+    assert len(set(values)) == 1
+
+    # another message is another request
+    values = await asyncio.gather(
+        client.call("slow_now", 100), client.call("slow_now", 101)
+    )
+    assert len(set(values)) == 2
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_not_coalesced_by_default(
+    cache_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.CACHE_PORT)
+
+    values = await asyncio.gather(*[client.call("slow_now", 50) for _ in range(4)])
+    assert len(set(values)) == 4
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_call_timeout(cache_server):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.CACHE_PORT, coalesce=True)
+
+    first = asyncio.create_task(client.call("slow_now", 300, timeout=2000))
+    await asyncio.sleep(0.05)
+    # waits for the first call's request, but only as long as its own timeout
+    with pytest.raises(TimeoutException):
+        await client.call("slow_now", 300, timeout=100)
+
+    assert isinstance(await first, int)
+    client.close()
+
+
+def test_client_cache(cache_server):  # pylint: disable=unused-argument
+    client = ZeroClient(
+        "localhost", constants.CACHE_PORT, cache={"slow_now": CachePolicy(ttl=10)}
+    )
+
+    value = client.call("slow_now", 100)
+    start = time.perf_counter()
+    assert client.call("slow_now", 100) == value
+    # not sent to the server
+    assert time.perf_counter() - start < 0.05
+
+    assert client.call("slow_now", 101) != value
+
+    client.invalidate_cache("slow_now")
+    assert client.call("slow_now", 100) != value
+    client.close()
+
+
+def test_client_cache_hints(cache_server):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.CACHE_PORT, cache_hints=True)
+
+    values = {client.call("hinted_now", "a") for _ in range(6)}
+    assert len(values) == 1
+
+    # cached for the hinted seconds
+    time.sleep(0.4)
+    assert client.call("hinted_now", "a") not in values
+
+    # functions without a hint are not cached
+    assert client.call("slow_now", 1) != client.call("slow_now", 1)
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_client_cache(cache_server):  # pylint: disable=unused-argument
+    client = AsyncZeroClient(
+        "localhost",
+        constants.CACHE_PORT,
+        cache={"slow_now": CachePolicy(ttl=0.3)},
+        cache_hints=True,
+    )
+
+    value = await client.call("slow_now", 50)
+    assert await client.call("slow_now", 50) == value
+    await asyncio.sleep(0.4)
+    assert await client.call("slow_now", 50) != value
+
+    values = {await client.call("hinted_now", "b") for _ in range(6)}
+    assert len(values) == 1
+    client.close()
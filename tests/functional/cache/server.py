@@ -0,0 +1,40 @@
+import time
+
+from zero import CachePolicy, ZeroServer
+
+
+def now(key: str) -> int:
+    return time.perf_counter_ns()
+
+
+async def async_now(key: str) -> int:
+    return time.perf_counter_ns()
+
+
+def now_short_ttl(key: str) -> int:
+    return time.perf_counter_ns()
+
+
+def shared_now(key: str) -> int:
+    return time.perf_counter_ns()
+
+
+def hinted_now(key: str) -> int:
+    return time.perf_counter_ns()
+
+
+def slow_now(msec: int) -> int:
+    time.sleep(msec / 1000)
+    return time.perf_counter_ns()
+
+
+def run(port):
+    print("Starting cache server on port", port)
+    app = ZeroServer(port=port)
+    app.register_rpc(now, cache=CachePolicy())
+    app.register_rpc(async_now, cache=CachePolicy(max_entries=8))
+    app.register_rpc(now_short_ttl, cache=CachePolicy(ttl=0.2))
+    app.register_rpc(shared_now, cache=CachePolicy(shared=True))
+    app.register_rpc(hinted_now, cache=CachePolicy(ttl=0.01, client_ttl=0.3))
+    app.register_rpc(slow_now)
+    app.run(2)
@@ -0,0 +1,29 @@
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient, ZeroClient
+
+
+def test_calls_are_spread_over_workers(
+    direct_connect_server,
+):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.DIRECT_CONNECT_PORT)
+    assert client.call("__endpoints__", None) == [
+        constants.DIRECT_CONNECT_PORT + 1,
+        constants.DIRECT_CONNECT_PORT + 2,
+    ]
+
+    pids = {client.call("pid", None) for _ in range(4)}
+    assert len(pids) == 2
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_calls_are_spread_over_workers(
+    direct_connect_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.DIRECT_CONNECT_PORT)
+
+    pids = {await client.call("async_pid", None) for _ in range(4)}
+    assert len(pids) == 2
+    client.close()
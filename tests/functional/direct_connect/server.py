@@ -0,0 +1,19 @@
+import os
+
+from zero import ZeroServer
+
+
+def pid() -> int:
+    return os.getpid()
+
+
+async def async_pid() -> int:
+    return os.getpid()
+
+
+def run(port):
+    print("Starting direct connect server on port", port)
+    app = ZeroServer(port=port)
+    app.register_rpc(pid)
+    app.register_rpc(async_pid)
+    app.run(2, direct_connect=True)
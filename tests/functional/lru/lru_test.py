@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient, ZeroClient
+
+
+def test_call(lru_server):  # pylint: disable=unused-argument
+    client = ZeroClient("localhost", constants.LRU_PORT)
+    assert client.call("echo", "Hello") == "Hello"
+    assert client.call("sleep", 10) == 10
+
+
+@pytest.mark.asyncio
+async def test_fast_calls_not_blocked_by_slow_call(
+    lru_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.LRU_PORT)
+    await client.call("echo", "warm up")
+
+    slow = asyncio.create_task(client.call("sleep", 1000, timeout=5000))
+    await asyncio.sleep(0.1)
+
+    start = time.time()
+    results = await asyncio.gather(
+        *[client.call("echo", str(i), timeout=5000) for i in range(10)]
+    )
+    elapsed = time.time() - start
+
+    assert results == [str(i) for i in range(10)]
+    # round robin would have put half of them behind the slow call
+    assert elapsed < 0.5
+    assert await slow == 1000
+
+
+@pytest.mark.asyncio
+async def test_priority_calls_skip_the_queue(
+    lru_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.LRU_PORT)
+    await client.call("echo", "warm up")
+
+    for call in (
+        client.call("ping", "urgent", timeout=5000),
+        client.call("echo", "urgent", timeout=5000, priority=9),
+    ):
+        # both workers busy and 4 more bulk calls waiting in the broker
+        bulk = [
+            asyncio.create_task(client.call("sleep", 400, timeout=5000))
+            for _ in range(6)
+        ]
+        await asyncio.sleep(0.1)
+
+        start = time.time()
+        assert await call == "urgent"
+        # in order it would have waited for the 2 rounds of bulk calls before it
+        assert time.time() - start < 0.5
+        assert await asyncio.gather(*bulk) == [400] * 6
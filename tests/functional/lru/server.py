@@ -0,0 +1,26 @@
+import time
+
+from zero import ZeroServer, config
+
+
+def sleep(msg: int) -> int:
+    time.sleep(msg / 1000)
+    return msg
+
+
+def echo(msg: str) -> str:
+    return msg
+
+
+def ping(msg: str) -> str:
+    return msg
+
+
+def run(port):
+    print("Starting lru server on port", port)
+    config.ZEROMQ_PATTERN = "lru"
+    app = ZeroServer(port=port)
+    app.register_rpc(sleep)
+    app.register_rpc(echo)
+    app.register_rpc(ping, priority=5)
+    app.run(2)
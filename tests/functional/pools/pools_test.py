@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient
+
+
+@pytest.mark.asyncio
+async def test_heavy_calls_keep_to_their_pool(
+    pools_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.POOLS_PORT)
+    await client.call("lookup", "warm up")
+
+    start = time.time()
+    reports = asyncio.gather(
+        *[client.call("report", 300, timeout=5000) for _ in range(3)]
+    )
+    await asyncio.sleep(0.1)
+
+    lookup_start = time.time()
+    lookups = await asyncio.gather(*[client.call("lookup", str(i)) for i in range(10)])
+    # not stuck behind the reports, the default pool is free
+    assert time.time() - lookup_start < 0.2
+
+    heavy = await reports
+    # all on the one worker of the heavy pool, one after the other
+    assert len(set(heavy)) == 1
+    assert time.time() - start >= 0.9
+    assert heavy[0] not in lookups
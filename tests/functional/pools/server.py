@@ -0,0 +1,22 @@
+import os
+import time
+
+from zero import ZeroServer, config
+
+
+def report(msg: int) -> int:
+    time.sleep(msg / 1000)
+    return os.getpid()
+
+
+def lookup(msg: str) -> int:
+    return os.getpid()
+
+
+def run(port):
+    print("Starting pools server on port", port)
+    config.ZEROMQ_PATTERN = "lru"
+    app = ZeroServer(port=port)
+    app.register_rpc(report, pool="heavy")
+    app.register_rpc(lookup)
+    app.run(pools={"default": 2, "heavy": 1})
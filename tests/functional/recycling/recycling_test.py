@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from tests import constants
+from zero import AsyncZeroClient
+
+
+@pytest.mark.asyncio
+async def test_workers_replaced_without_losing_calls(
+    recycling_server,
+):  # pylint: disable=unused-argument
+    client = AsyncZeroClient("localhost", constants.RECYCLING_PORT)
+
+    pids = []
+    for _ in range(10):
+        pids += await asyncio.gather(
+            *[client.call("work", 20, timeout=5000) for _ in range(6)]
+        )
+        await asyncio.sleep(0.1)
+
+    # every call answered, by more workers than the server runs at once
+    assert len(pids) == 60
+    assert len(set(pids)) > 2
@@ -161,6 +161,9 @@ class RpcClient:
     def send_bytes(self, msg: bytes) -> bytes:
         return self._zero_client.call("send_bytes", msg)
 
+    def time_left(self) -> int:
+        return self._zero_client.call("time_left", None)
+
     def echo(self, msg: str) -> str:
         return self._zero_client.call("echo", msg)
 
@@ -24,6 +24,10 @@ def test_echo_bool(zero_client):
     assert zero_client.call("echo_bool", True) is True
 
 
+def test_remaining_time(zero_client):
+    assert 0 <= zero_client.call("time_left", None, timeout=2000) <= 2000
+
+
 # int input
 def test_echo_int(zero_client):
     assert zero_client.call("echo_int", 42) == 42
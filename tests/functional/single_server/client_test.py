@@ -1,12 +1,15 @@
 import asyncio
 import random
+import threading
 import time
+from unittest.mock import patch
 
 import pytest
 
 import zero.error
 from tests.functional.single_server import threaded_server
 from zero import AsyncZeroClient, ZeroClient
+from zero.zeromq_patterns import wire
 
 from . import server
 
@@ -224,6 +227,171 @@ def test_random_timeout_async():
 #     assert time_taken_ms < 1000
 
 
+def test_large_payload():
+    client = ZeroClient(server.HOST, server.PORT, default_timeout=10000)
+    payload = bytes(range(256)) * 32 * 1024  # 8 MB
+
+    assert client.call("echo_bytes", payload) == payload
+    assert client._client_inst.client_pool.multipart
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_large_payload_async():
+    client = AsyncZeroClient(server.HOST, server.PORT, default_timeout=10000)
+    payload = bytes(range(256)) * 32 * 1024
+
+    assert await client.call("echo_bytes", payload) == payload
+    client.close()
+
+
+def _stale_headers(headers):
+    # same function ids with the tag of another table
+    stale = {}
+    for name, header in headers.items():
+        (func_id, tag), _ = wire.unpack_header(header)
+        stale[name] = wire.compact_header(func_id, tag ^ 1)
+    return stale
+
+
+def test_function_table_changed():
+    client = ZeroClient(server.HOST, server.PORT)
+    assert client.call("echo_str", "hi") == "hi"
+
+    # as if the server restarted with other functions
+    server_state = client._client_inst.client_pool._balancer.servers[0]
+    headers = server_state.headers
+    assert len(headers["echo_str"]) < 80
+    server_state.headers = _stale_headers(headers)
+
+    assert client.call("echo_str", "hi") == "hi"
+    assert server_state.headers == headers
+    client.close()
+
+
+def test_function_table_changed_after_refresh():
+    client = ZeroClient(server.HOST, server.PORT)
+    assert client.call("echo_str", "hi") == "hi"
+
+    pool = client._client_inst.client_pool
+    server_state = pool._balancer.servers[0]
+    server_state.headers = _stale_headers(server_state.headers)
+
+    # the refreshed table is stale too
+    with patch.object(type(pool), "refresh_headers"):
+        with pytest.raises(zero.error.FunctionTableChangedException):
+            client.call("echo_str", "hi")
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_function_table_changed_async():
+    client = AsyncZeroClient(server.HOST, server.PORT)
+    assert await client.call("echo_str", "hi") == "hi"
+
+    server_state = client._client_inst.client_pool._balancer.servers[0]
+    headers = server_state.headers
+    server_state.headers = _stale_headers(headers)
+
+    assert await client.call("echo_str", "hi") == "hi"
+    assert server_state.headers == headers
+    client.close()
+
+
+def test_call_many():
+    client = ZeroClient(server.HOST, server.PORT)
+
+    calls = [("echo_int", idx) for idx in range(100)]
+    calls.append(("sum_list", [1, 2, 3]))
+    calls.append(("hello_world", None))
+    results = client.call_many(calls)
+
+    assert results == list(range(100)) + [6, "hello world"]
+    client.close()
+
+
+def test_call_many_errors():
+    client = ZeroClient(server.HOST, server.PORT)
+    calls = [("echo_int", 1), ("error", "boom"), ("no_such_function", 1)]
+
+    with pytest.raises(zero.error.RemoteException):
+        client.call_many(calls)
+
+    results = client.call_many(calls, return_exceptions=True)
+    assert results[0] == 1
+    assert isinstance(results[1], zero.error.RemoteException)
+    assert isinstance(results[2], zero.error.MethodNotFoundException)
+
+    # validated one by one
+    results = client.call_many(
+        [("echo_int", "not an int"), ("echo_str", "hi")], return_exceptions=True
+    )
+    assert isinstance(results[0], zero.error.ValidationException)
+    assert results[1] == "hi"
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_call_many_async():
+    client = AsyncZeroClient(server.HOST, server.PORT)
+
+    results = await client.call_many([("echo_str", "a"), ("echo", "b")])
+    assert results == ["a", "b"]
+    assert await client.call_many([]) == []
+    client.close()
+
+
+def test_submit():
+    client = ZeroClient(server.HOST, server.PORT)
+
+    handles = [client.submit("echo_int", idx) for idx in range(200)]
+    # taken in any order
+    assert [handle.result() for handle in reversed(handles)] == list(range(199, -1, -1))
+
+    # calls don't drop the responses of the submitted ones
+    handle = client.submit("sleep", 100)
+    assert client.call("echo_str", "hi") == "hi"
+    assert handle.result() == "slept for 100 msecs"
+    assert handle.result() == "slept for 100 msecs"
+    client.close()
+
+
+def test_submit_errors():
+    client = ZeroClient(server.HOST, server.PORT)
+
+    handle = client.submit("error", "boom")
+    with pytest.raises(zero.error.RemoteException):
+        handle.result()
+
+    handle = client.submit("sleep", 300, timeout=100)
+    with pytest.raises(zero.error.TimeoutException):
+        handle.result()
+    client.close()
+
+
+def test_connections():
+    client = ZeroClient(server.HOST, server.PORT, connections=3)
+
+    assert [client.call("echo_int", idx) for idx in range(10)] == list(range(10))
+    assert len(client._client_inst.client_pool._pool[threading.get_ident()]) == 3
+    client.close()
+
+    with pytest.raises(ValueError):
+        ZeroClient(server.HOST, server.PORT, connections=0)
+
+
+@pytest.mark.asyncio
+async def test_connections_async():
+    client = AsyncZeroClient(server.HOST, server.PORT, connections=3)
+
+    results = await asyncio.gather(
+        *[client.call("echo_int", idx) for idx in range(100)]
+    )
+    assert results == list(range(100))
+    assert len(client._client_inst.client_pool._pool[threading.get_ident()]) == 3
+    client.close()
+
+
 def test_threaded_server_hello_world():
     client = ZeroClient(threaded_server.HOST, threaded_server.PORT)
     assert client.call("hello_world", "") == "hello world"
@@ -11,7 +11,7 @@ import jwt
 import msgspec
 from pydantic import BaseModel
 
-from zero import ZeroServer
+from zero import ZeroServer, remaining_time
 
 PORT = 5559
 HOST = "localhost"
@@ -264,6 +264,12 @@ def send_bytes(msg: bytes) -> bytes:
     return msg
 
 
+@app.register_rpc
+def time_left() -> int:
+    left = remaining_time()
+    return -1 if left is None else left
+
+
 def run(port):
     print("Starting server on port", port)
     app.register_rpc(echo)
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+
+from zero import LoadBalancing
+from zero.protocols.zeromq.client import _Balancer, _interleave
+
+
+class FakeClient:
+    def __init__(self, in_flight: int = 0):
+        self.in_flight = in_flight
+
+
+class TestBalancer(unittest.TestCase):
+    def balancer(self, clients, servers=2, **kwargs):
+        balancer = _Balancer(
+            [f"tcp://localhost:{port}" for port in range(servers)],
+            LoadBalancing(**kwargs),
+        )
+        for idx, client in enumerate(clients):
+            balancer.add(client, balancer.servers[idx % servers])
+        return balancer
+
+    def test_round_robin(self):
+        clients = [FakeClient() for _ in range(4)]
+        balancer = self.balancer(clients)
+
+        self.assertEqual(
+            [balancer.pick(clients, turn) for turn in range(4)], [0, 1, 2, 3]
+        )
+
+    def test_least_outstanding(self):
+        clients = [FakeClient(3), FakeClient(1), FakeClient(2)]
+        balancer = self.balancer(clients, strategy="least_outstanding")
+
+        self.assertEqual(balancer.pick(clients, 0), 1)
+
+    def test_power_of_two(self):
+        clients = [FakeClient(3), FakeClient(1), FakeClient(2)]
+        balancer = self.balancer(clients, strategy="power_of_two")
+
+        with patch("random.sample", return_value=[0, 2]):
+            self.assertEqual(balancer.pick(clients, 0), 2)
+
+    def test_ejection(self):
+        clients = [FakeClient() for _ in range(4)]
+        balancer = self.balancer(clients, max_timeouts=2)
+
+        balancer.timed_out(clients[0])
+        self.assertEqual(balancer.pick(clients, 0), 0)
+
+        # all the connections of the server are left out
+        balancer.timed_out(clients[2])
+        self.assertEqual(balancer.pick(clients, 0), 1)
+        self.assertEqual(balancer.pick(clients, 2), 3)
+
+        with patch("time.monotonic", return_value=float("inf")):
+            self.assertEqual(balancer.pick(clients, 0), 0)
+
+    def test_response_resets_timeouts(self):
+        clients = [FakeClient(), FakeClient()]
+        balancer = self.balancer(clients, max_timeouts=2)
+
+        balancer.timed_out(clients[0])
+        balancer.responded(clients[0])
+        balancer.timed_out(clients[0])
+        self.assertEqual(balancer.pick(clients, 0), 0)
+
+    def test_all_ejected(self):
+        clients = [FakeClient(), FakeClient()]
+        balancer = self.balancer(clients, max_timeouts=1)
+
+        balancer.timed_out(clients[0])
+        balancer.timed_out(clients[1])
+        self.assertEqual([balancer.pick(clients, turn) for turn in range(2)], [0, 1])
+
+    def test_one_server_is_not_ejected(self):
+        clients = [FakeClient(), FakeClient()]
+        balancer = self.balancer(clients, servers=1, max_timeouts=1)
+
+        balancer.timed_out(clients[0])
+        self.assertEqual(balancer.servers[0].ejected_until, 0.0)
+
+    def test_interleave(self):
+        self.assertEqual(_interleave([[1, 2, 3], [4], [5, 6]]), [1, 4, 5, 2, 6, 3])
+
+
+class TestLoadBalancing(unittest.TestCase):
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            LoadBalancing("random")
+        with self.assertRaises(ValueError):
+            LoadBalancing(max_timeouts=0)
+        with self.assertRaises(ValueError):
+            LoadBalancing(ejection_time=-1)
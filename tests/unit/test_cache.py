@@ -0,0 +1,257 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from zero.rpc.cache import (
+    ClientCache,
+    ResponseCache,
+    SharedCacheState,
+    SharedResponseCache,
+    cached_functions,
+    create_shared_caches,
+    open_cache,
+)
+from zero.rpc.options import CachePolicy, RPCOptions
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = ResponseCache(CachePolicy())
+
+        self.assertIsNone(cache.get(b"key"))
+        cache.put(b"key", b"response")
+
+        self.assertEqual(cache.get(b"key"), b"response")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(CachePolicy(max_entries=2))
+        cache.put(b"a", b"1")
+        cache.put(b"b", b"2")
+
+        cache.get(b"a")
+        cache.put(b"c", b"3")
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(b"a"), b"1")
+        self.assertIsNone(cache.get(b"b"))
+
+    def test_ttl(self):
+        cache = ResponseCache(CachePolicy(ttl=10))
+
+        with patch("zero.rpc.cache.time.monotonic", return_value=100):
+            cache.put(b"key", b"response")
+        with patch("zero.rpc.cache.time.monotonic", return_value=109):
+            self.assertEqual(cache.get(b"key"), b"response")
+        with patch("zero.rpc.cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get(b"key"))
+
+    def test_ttl_of_entry(self):
+        cache = ResponseCache(CachePolicy(ttl=10))
+
+        with patch("zero.rpc.cache.time.monotonic", return_value=100):
+            cache.put(b"key", b"response", ttl=1)
+        with patch("zero.rpc.cache.time.monotonic", return_value=102):
+            self.assertIsNone(cache.get(b"key"))
+
+    def test_generation_change_clears(self):
+        cache = ResponseCache(CachePolicy())
+        cache.put(b"key", b"response")
+
+        self.assertIsNone(cache.get(b"key", generation=1))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_policy(self):
+        for kwargs in (
+            {"ttl": 0},
+            {"ttl": "1"},
+            {"max_entries": 0},
+            {"max_response_size": 0},
+            {"client_ttl": 0},
+        ):
+            with self.assertRaises(ValueError):
+                CachePolicy(**kwargs)
+
+
+class TestClientCache(unittest.TestCase):
+    def test_policies(self):
+        cache = ClientCache({"func": CachePolicy()})
+        cache.put("func", b"msg", b"response", None)
+        cache.put("other", b"msg", b"response", None)
+
+        self.assertEqual(cache.get("func", b"msg"), b"response")
+        self.assertIsNone(cache.get("func", b"other msg"))
+        self.assertIsNone(cache.get("other", b"msg"))
+
+    def test_hints(self):
+        cache = ClientCache({}, hints=True)
+        cache.put("func", b"msg", b"response", None)
+        self.assertIsNone(cache.get("func", b"msg"))
+
+        with patch("zero.rpc.cache.time.monotonic", return_value=100):
+            cache.put("func", b"msg", b"response", 5.0)
+        with patch("zero.rpc.cache.time.monotonic", return_value=104):
+            self.assertEqual(cache.get("func", b"msg"), b"response")
+        with patch("zero.rpc.cache.time.monotonic", return_value=106):
+            self.assertIsNone(cache.get("func", b"msg"))
+
+    def test_hints_are_ignored(self):
+        # without `hints`
+        cache = ClientCache({})
+        cache.put("func", b"msg", b"response", 5.0)
+        self.assertIsNone(cache.get("func", b"msg"))
+
+        # for the functions with a policy
+        cache = ClientCache({"func": CachePolicy(ttl=10)}, hints=True)
+        with patch("zero.rpc.cache.time.monotonic", return_value=100):
+            cache.put("func", b"msg", b"response", 1.0)
+        with patch("zero.rpc.cache.time.monotonic", return_value=105):
+            self.assertEqual(cache.get("func", b"msg"), b"response")
+
+    def test_clear(self):
+        cache = ClientCache({"a": CachePolicy(), "b": CachePolicy()})
+        cache.put("a", b"msg", b"response", None)
+        cache.put("b", b"msg", b"response", None)
+
+        cache.clear("a")
+        self.assertIsNone(cache.get("a", b"msg"))
+        self.assertEqual(cache.get("b", b"msg"), b"response")
+
+        cache.clear()
+        self.assertIsNone(cache.get("b", b"msg"))
+
+
+class TestSharedResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.tmp.name, "cache")
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        self.tmp.cleanup()
+
+    def _open(self, policy: CachePolicy, count: int = 2):
+        SharedResponseCache.create(self.path, policy)
+        self.caches = [SharedResponseCache(self.path, policy) for _ in range(count)]
+        return self.caches
+
+    def test_shared_between_workers(self):
+        first, second = self._open(CachePolicy(shared=True))
+
+        self.assertIsNone(second.get(b"key"))
+        first.put(b"key", b"response")
+
+        self.assertEqual(second.get(b"key"), b"response")
+        self.assertEqual((second.hits, second.misses), (1, 1))
+
+    def test_slot_is_replaced(self):
+        (cache,) = self._open(CachePolicy(shared=True, max_entries=1), 1)
+        cache.put(b"a", b"1")
+        cache.put(b"b", b"2")
+
+        self.assertIsNone(cache.get(b"a"))
+        self.assertEqual(cache.get(b"b"), b"2")
+
+    def test_other_generation_is_a_miss(self):
+        first, second = self._open(CachePolicy(shared=True))
+        first.put(b"key", b"response")
+
+        self.assertIsNone(second.get(b"key", generation=1))
+
+    def test_ttl(self):
+        (cache,) = self._open(CachePolicy(shared=True, ttl=10), 1)
+
+        with patch("zero.rpc.cache.time.monotonic", return_value=100):
+            cache.put(b"key", b"response")
+        with patch("zero.rpc.cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get(b"key"))
+
+    def test_large_responses_are_not_cached(self):
+        (cache,) = self._open(CachePolicy(shared=True, max_response_size=4), 1)
+        cache.put(b"key", b"12345")
+
+        self.assertIsNone(cache.get(b"key"))
+
+    def test_slot_being_written_is_a_miss(self):
+        (cache,) = self._open(CachePolicy(shared=True, max_entries=1), 1)
+        cache.put(b"key", b"response")
+
+        # odd sequence number, as in the middle of a write
+        cache._map[0:8] = (3).to_bytes(8, "little")
+
+        self.assertIsNone(cache.get(b"key"))
+
+    def test_clear(self):
+        first, second = self._open(CachePolicy(shared=True))
+        first.put(b"key", b"response")
+
+        second.clear()
+
+        self.assertIsNone(first.get(b"key"))
+
+    def test_create_and_open(self):
+        options = {
+            "local": RPCOptions(cache=CachePolicy()),
+            "shared": RPCOptions(cache=CachePolicy(shared=True)),
+        }
+
+        paths = create_shared_caches(self.path, options)
+
+        self.assertEqual(paths, [f"{self.path}.shared"])
+        self.assertIsInstance(
+            open_cache("local", options["local"].cache, self.path), ResponseCache
+        )
+        shared = open_cache("shared", options["shared"].cache, self.path)
+        self.caches.append(shared)
+        self.assertIsInstance(shared, SharedResponseCache)
+        # without a server, like in tests, the cache is the worker's own
+        self.assertIsInstance(
+            open_cache("shared", options["shared"].cache, None), ResponseCache
+        )
+
+
+class TestSharedCacheState(unittest.TestCase):
+    def test_bump_is_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state")
+            SharedCacheState.create(path, ["a", "b"], 2)
+            first = SharedCacheState(path, ["a", "b"], 2)
+            second = SharedCacheState(path, ["a", "b"], 2)
+
+            first.bump("b")
+
+            self.assertEqual(second.generation("a"), 0)
+            self.assertEqual(second.generation("b"), 1)
+            first.close()
+            second.close()
+
+    def test_stats_of_all_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state")
+            SharedCacheState.create(path, ["a", "b"], 2)
+            first = SharedCacheState(path, ["a", "b"], 2)
+            second = SharedCacheState(path, ["a", "b"], 2)
+
+            first.record(1, "a", 3, 1)
+            second.record(2, "a", 2, 2)
+            second.record(2, "b", 5, 0)
+            first.bump("a")
+
+            self.assertEqual(first.stats("a"), (5, 3))
+            self.assertEqual(first.stats("b"), (5, 0))
+            self.assertEqual(first.generation("a"), 1)
+            # for a new worker of the same worker id
+            self.assertEqual(first.recorded(2, "a"), (2, 2))
+            first.close()
+            second.close()
+
+    def test_cached_functions(self):
+        options = {
+            "a": RPCOptions(cache=CachePolicy()),
+            "b": RPCOptions(max_concurrency=1),
+        }
+
+        self.assertEqual(cached_functions(options), ["a"])
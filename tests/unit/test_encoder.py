@@ -0,0 +1,148 @@
+import pickle
+import unittest
+from typing import Dict, List, Tuple
+from unittest.mock import patch
+
+import msgspec
+
+from zero.encoder import generic
+from zero.encoder.msgspc import MsgspecEncoder
+
+
+class Point(msgspec.Struct):
+    x: int
+    y: int
+
+
+class PrefixEncoder(MsgspecEncoder):
+    def __init__(self, prefix: str):
+        super().__init__()
+        self.prefix = prefix
+
+
+class TestMsgspecEncoder(unittest.TestCase):
+    def test_decode_type(self):
+        encoder = MsgspecEncoder()
+        data = encoder.encode(Point(1, 2))
+
+        self.assertEqual(encoder.decode_type(data, Point), Point(1, 2))
+        self.assertEqual(encoder.decode_type(data, Dict[str, int]), {"x": 1, "y": 2})
+
+    def test_decode_type_from_buffer(self):
+        encoder = MsgspecEncoder()
+        data = memoryview(encoder.encode((1, 2)))
+
+        self.assertEqual(encoder.decode_type(data, Tuple[int, int]), (1, 2))
+
+    def test_decoder_is_built_once(self):
+        encoder = MsgspecEncoder()
+        encoder.register_type(Point)
+        data = encoder.encode(Point(1, 2))
+
+        with patch("msgspec.msgpack.Decoder") as mock_decoder:
+            encoder.decode_type(data, Point)
+            encoder.decode_type(data, Point)
+            mock_decoder.assert_not_called()
+
+    def test_unregistered_types_are_cached(self):
+        encoder = MsgspecEncoder()
+        data = encoder.encode([1, 2])
+
+        self.assertEqual(encoder.decode_type(data, List[int]), [1, 2])
+        with patch("msgspec.msgpack.Decoder") as mock_decoder:
+            self.assertEqual(encoder.decode_type(data, List[int]), [1, 2])
+            mock_decoder.assert_not_called()
+
+    def test_decode_type_validation_error(self):
+        encoder = MsgspecEncoder()
+        encoder.register_type(Point)
+
+        with self.assertRaises(msgspec.ValidationError):
+            encoder.decode_type(encoder.encode({"x": "1"}), Point)
+
+    def test_pickle_keeps_registered_types(self):
+        encoder = MsgspecEncoder()
+        encoder.register_type(Point)
+
+        unpickled = pickle.loads(pickle.dumps(encoder))
+
+        self.assertEqual(list(unpickled._decoders), [Point])
+        self.assertEqual(
+            unpickled.decode_type(encoder.encode(Point(1, 2)), Point), Point(1, 2)
+        )
+
+    def test_pickle_subclass_with_arguments(self):
+        encoder = PrefixEncoder("v1")
+        encoder.register_type(Point)
+
+        unpickled = pickle.loads(pickle.dumps(encoder))
+
+        self.assertEqual(unpickled.prefix, "v1")
+        self.assertEqual(list(unpickled._decoders), [Point])
+
+    def test_pydantic_models_are_not_registered(self):
+        # the module might be reloaded with pydantic v1 by other tests
+        class User(generic.BaseModel):
+            name: str
+
+        encoder = generic.GenericEncoder()
+        encoder.register_type(User)
+
+        self.assertEqual(encoder._decoders, {})
+        self.assertEqual(
+            encoder.decode_type(encoder.encode(User(name="a")), User), User(name="a")
+        )
+
+
+class TestGenericEncoder(unittest.TestCase):
+    def setUp(self):
+        # the module might be reloaded with pydantic v1 by other tests
+        class Item(generic.BaseModel):
+            id: int
+
+        class Order(generic.BaseModel):
+            items: List[Item]
+
+        self.Item = Item
+        self.Order = Order
+        self.encoder = generic.GenericEncoder()
+
+    def test_model(self):
+        order = self.Order(items=[self.Item(id=1)])
+
+        data = self.encoder.encode(order)
+
+        self.assertEqual(self.encoder.decode(data), {"items": [{"id": 1}]})
+        self.assertEqual(self.encoder.decode_type(data, self.Order), order)
+
+    def test_models_inside_containers(self):
+        items = [self.Item(id=1), self.Item(id=2)]
+
+        data = self.encoder.encode({"items": items})
+
+        self.assertEqual(self.encoder.decode_type(data, Dict[str, List[self.Item]]), {"items": items})  # type: ignore
+
+    def test_models_inside_builtin_generics(self):
+        items = [self.Item(id=1), self.Item(id=2)]
+
+        data = self.encoder.encode(items)
+
+        self.assertEqual(self.encoder.decode_type(data, list[self.Item]), items)  # type: ignore
+        self.assertFalse(generic._has_model(list[int]))
+        self.assertTrue(generic._has_model(dict[str, self.Item]))  # type: ignore
+
+    def test_model_validation_error(self):
+        data = self.encoder.encode({"id": "not an int"})
+
+        with self.assertRaises(ValueError):
+            self.encoder.decode_type(data, self.Item)
+
+    def test_types_without_models(self):
+        data = self.encoder.encode([1, 2])
+
+        self.assertEqual(self.encoder.decode_type(data, List[int]), [1, 2])
+        self.assertIsNone(generic._pydantic_validator(List[int]))
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            self.encoder.encode(object())
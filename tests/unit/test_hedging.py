@@ -0,0 +1,60 @@
+import unittest
+
+from zero import Hedging
+from zero.rpc.hedging import MAX_HEDGE_TOKENS, MIN_LATENCIES, RECOMPUTE_EVERY, Hedger
+
+
+class TestHedger(unittest.TestCase):
+    def test_fixed_delay(self):
+        policy = Hedging(after=50)
+        hedger = Hedger({"f": policy}, 0.1)
+
+        self.assertEqual(hedger.policy("f"), policy)
+        self.assertIsNone(hedger.policy("g"))
+        self.assertEqual(hedger.delay("f", policy), 0.05)
+
+    def test_learned_delay(self):
+        policy = Hedging(percentile=90)
+        hedger = Hedger({"f": policy}, 0.1)
+
+        for ms in range(MIN_LATENCIES - 1):
+            hedger.record("f", policy, ms / 1000)
+        self.assertIsNone(hedger.delay("f", policy))
+
+        # recomputed every few latencies
+        while not hedger.delay("f", policy):
+            hedger.record("f", policy, 0.1)
+        self.assertEqual(hedger.delay("f", policy), 0.1)
+
+        recorded = 0
+        while hedger.delay("f", policy) == 0.1:
+            hedger.record("f", policy, 0.001)
+            recorded += 1
+        self.assertLessEqual(recorded, 256)
+        self.assertEqual(recorded % RECOMPUTE_EVERY, 0)
+
+    def test_budget(self):
+        hedger = Hedger({}, 0.5)
+
+        # the first burst is allowed
+        self.assertEqual(sum(hedger.spend() for _ in range(20)), MAX_HEDGE_TOKENS)
+
+        # then half the calls
+        hedges = 0
+        for _ in range(10):
+            hedger.earn()
+            hedges += hedger.spend()
+        self.assertEqual(hedges, 5)
+
+    def test_no_budget(self):
+        hedger = Hedger({}, 0)
+        hedger.earn()
+        self.assertFalse(hedger.spend())
+
+
+class TestHedging(unittest.TestCase):
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Hedging(after=0)
+        with self.assertRaises(ValueError):
+            Hedging(percentile=100)
@@ -0,0 +1,357 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+import zmq
+
+from zero.zeromq_patterns import wire
+from zero.zeromq_patterns.load_balancer import (
+    AsyncZeroMQWorker,
+    ZeroMQBroker,
+    ZeroMQWorker,
+)
+from zero.zeromq_patterns.load_balancer.broker import (
+    WORKER_GONE,
+    WORKER_LEAVING,
+    WORKER_READY,
+    WORKER_STOP,
+)
+from zero.zeromq_patterns.load_balancer.worker import RSS_CHECK_EVERY
+from zero.zeromq_patterns.wire import DEFAULT_POOL
+
+
+class TestLRUBroker(unittest.TestCase):
+    def setUp(self):
+        self.broker = ZeroMQBroker()
+        self.gateway_send = patch.object(self.broker.gateway, "send_multipart").start()
+        self.backend_send = patch.object(self.broker.backend, "send_multipart").start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_ready_adds_credits(self):
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"2"])
+        self.broker._handle_worker_msg([b"w2", WORKER_READY, b"1"])
+
+        self.assertEqual(self.broker._credits, {b"w1": 2, b"w2": 1})
+        self.assertEqual(list(self.broker._pools[DEFAULT_POOL].ready), [b"w1", b"w2"])
+
+    def test_requests_wait_for_free_worker(self):
+        self.broker._enqueue([b"client", b"request"])
+        self.broker._dispatch()
+
+        self.backend_send.assert_not_called()
+        self.assertEqual(self.broker.queue_depth, 1)
+
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"1"])
+        self.broker._dispatch()
+
+        self.backend_send.assert_called_once_with(
+            [b"w1", b"client", b"request"], zmq.NOBLOCK, copy=False
+        )
+        self.assertEqual(self.broker.queue_depth, 0)
+        self.assertEqual(list(self.broker._pools[DEFAULT_POOL].ready), [])
+
+    def test_round_robin_between_free_workers(self):
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"2"])
+        self.broker._handle_worker_msg([b"w2", WORKER_READY, b"2"])
+        for i in range(3):
+            self.broker._enqueue([b"client", str(i).encode()])
+        self.broker._dispatch()
+
+        workers = [call.args[0][0] for call in self.backend_send.call_args_list]
+        self.assertEqual(workers, [b"w1", b"w2", b"w1"])
+        self.assertEqual(self.broker._credits, {b"w1": 0, b"w2": 1})
+
+    def test_response_gives_credit_back(self):
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"1"])
+        self.broker._enqueue([b"client", b"request"])
+        self.broker._dispatch()
+
+        self.broker._handle_worker_msg([b"w1", b"client", b"response"])
+
+        self.gateway_send.assert_called_once_with(
+            [b"client", b"response"], zmq.NOBLOCK, copy=False
+        )
+        self.assertEqual(self.broker._credits, {b"w1": 1})
+        self.assertEqual(list(self.broker._pools[DEFAULT_POOL].ready), [b"w1"])
+
+    def test_higher_priorities_first(self):
+        tag = wire.table_tag(["bulk", "lookup"])
+        broker = ZeroMQBroker(zmq.Context(), {b"lookup": 5, (1, tag): 5})
+        backend_send = patch.object(broker.backend, "send_multipart").start()
+
+        bulk = [b"client", b"id", wire.compact_header(0, tag), b"1"]
+        lookup = [b"client", b"id", wire.compact_header(1, tag), b"2"]
+        legacy_lookup = [b"client", b"0" * 16 + wire.legacy_header("lookup") + b"3"]
+        urgent_bulk = [
+            b"client",
+            b"id",
+            wire.with_priority(wire.compact_header(0, tag), 9),
+            b"4",
+        ]
+        for frames in (bulk, lookup, legacy_lookup, urgent_bulk):
+            broker._enqueue(frames)
+        self.assertEqual(broker.queue_depth, 4)
+
+        broker._handle_worker_msg([b"w1", WORKER_READY, b"4"])
+        broker._dispatch()
+
+        sent = [call.args[0][1:] for call in backend_send.call_args_list]
+        self.assertEqual(sent, [urgent_bulk, lookup, legacy_lookup, bulk])
+        self.assertEqual(broker.queue_depth, 0)
+        broker.close()
+
+    def test_functions_routed_to_their_pool(self):
+        tag = wire.table_tag(["lookup", "report"])
+        broker = ZeroMQBroker(
+            zmq.Context(), routes={b"report": "heavy", (1, tag): "heavy"}
+        )
+        backend_send = patch.object(broker.backend, "send_multipart").start()
+
+        broker._handle_worker_msg([b"w1", WORKER_READY, b"1", b"default"])
+        broker._handle_worker_msg([b"h1", WORKER_READY, b"1", b"heavy"])
+
+        reports = [
+            [b"client", b"id", wire.compact_header(1, tag), b"1"],
+            [b"client", b"0" * 16 + wire.legacy_header("report") + b"2"],
+        ]
+        lookup = [b"client", b"id", wire.compact_header(0, tag), b"3"]
+        for frames in reports + [lookup]:
+            broker._enqueue(frames)
+        broker._dispatch()
+
+        sent = [call.args[0] for call in backend_send.call_args_list]
+        self.assertEqual(sent, [[b"w1"] + lookup, [b"h1"] + reports[0]])
+        # the second report waits for the heavy worker, even with w1 free again
+        broker._handle_worker_msg([b"w1", b"client", b"response"])
+        broker._dispatch()
+        self.assertEqual(backend_send.call_count, 2)
+        self.assertEqual(broker.queue_depth, 1)
+
+        broker._handle_worker_msg([b"h1", b"client", b"response"])
+        broker._dispatch()
+        self.assertEqual(backend_send.call_args.args[0], [b"h1"] + reports[1])
+        self.assertEqual(broker.queue_depth, 0)
+        broker.close()
+
+    def test_unreachable_worker_is_removed(self):
+        self.broker._handle_worker_msg([b"gone", WORKER_READY, b"3"])
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"1"])
+        self.backend_send.side_effect = [zmq.error.ZMQError(), None]
+        self.broker._enqueue([b"client", b"request"])
+
+        self.broker._dispatch()
+
+        self.assertNotIn(b"gone", self.broker._credits)
+        self.assertEqual(self.backend_send.call_args.args[0][0], b"w1")
+        self.assertEqual(self.broker.queue_depth, 0)
+
+    def test_load(self):
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"1"])
+        self.broker._handle_worker_msg([b"w2", WORKER_READY, b"2"])
+        for i in range(4):
+            self.broker._enqueue([b"client", str(i).encode()])
+        self.broker._dispatch()
+
+        self.assertEqual(self.broker.workers, 2)
+        self.assertEqual(self.broker.busy_workers, 2)
+        self.assertEqual(self.broker.queue_depth, 1)
+
+        self.broker._handle_worker_msg([b"w1", b"client", b"response"])
+        self.broker._handle_worker_msg([b"w2", b"client", b"response"])
+        self.broker._dispatch()
+
+        self.assertEqual(self.broker.busy_workers, 1)
+        self.assertEqual(self.broker.queue_depth, 0)
+
+    def test_retire_free_worker(self):
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"1"])
+        self.broker._handle_worker_msg([b"w2", WORKER_READY, b"1"])
+        self.broker._enqueue([b"client", b"request"])
+        self.broker._dispatch()
+
+        self.broker.retire_worker()
+        self.broker._retire()
+
+        self.backend_send.assert_called_with([b"w2", WORKER_STOP], zmq.NOBLOCK)
+        self.assertEqual(self.broker.workers, 1)
+
+        # its late messages, but no more requests
+        self.broker._handle_worker_msg([b"w2", WORKER_READY, b"1"])
+        self.broker._handle_worker_msg([b"w2", b"client", b"response"])
+        self.broker._handle_worker_msg([b"w2", WORKER_GONE])
+
+        self.gateway_send.assert_called_once_with(
+            [b"client", b"response"], zmq.NOBLOCK, copy=False
+        )
+        self.assertNotIn(b"w2", self.broker._credits)
+        self.assertEqual(self.broker._leaving, set())
+
+    def test_worker_leaving_is_swapped_for_a_new_one(self):
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"1"])
+        self.broker._handle_worker_msg([b"w2", WORKER_READY, b"1"])
+
+        self.broker._handle_worker_msg([b"w2", WORKER_LEAVING, b"7"])
+
+        self.assertEqual(self.broker.take_recycled(), [7])
+        self.assertEqual(self.broker.take_recycled(), [])
+        # serves until the new one is ready
+        self.backend_send.assert_not_called()
+        self.assertEqual(self.broker.workers, 2)
+
+        self.broker._handle_worker_msg([b"w3", WORKER_READY, b"1"])
+
+        self.backend_send.assert_called_once_with([b"w2", WORKER_STOP], zmq.NOBLOCK)
+        self.assertEqual(list(self.broker._pools[DEFAULT_POOL].ready), [b"w1", b"w3"])
+
+        # more credits of a worker are not a new one
+        self.broker._handle_worker_msg([b"w1", WORKER_LEAVING, b"1"])
+        self.broker._handle_worker_msg([b"w3", WORKER_READY, b"1"])
+        self.assertEqual(self.backend_send.call_count, 1)
+
+    def test_retire_none_when_all_busy(self):
+        self.broker._handle_worker_msg([b"w1", WORKER_READY, b"1"])
+        self.broker._enqueue([b"client", b"request"])
+        self.broker._dispatch()
+
+        self.broker.retire_worker()
+        self.broker._retire()
+
+        self.assertEqual(self.backend_send.call_count, 1)
+        self.assertEqual(self.broker.workers, 1)
+        self.assertEqual(len(self.broker._retire_requests), 0)
+
+
+class TestLRUWorker(unittest.TestCase):
+    def test_announces_ready_on_connect(self):
+        worker = ZeroMQWorker(1)
+        with patch.object(worker.socket, "send_multipart") as mock_send:
+            worker._on_connect()
+            mock_send.assert_called_once_with([WORKER_READY, b"1"])
+        worker.close()
+
+    def test_announces_pool_on_connect(self):
+        worker = ZeroMQWorker(1, pool="heavy")
+        with patch.object(worker.socket, "send_multipart") as mock_send:
+            worker._on_connect()
+            mock_send.assert_called_once_with([WORKER_READY, b"1", b"heavy"])
+        worker.close()
+
+    def test_stops_when_retired(self):
+        worker = ZeroMQWorker(1)
+        handler = Mock()
+        with patch.object(
+            worker.socket, "recv_multipart", return_value=[WORKER_STOP]
+        ), patch.object(worker.socket, "send_multipart") as mock_send:
+            worker._recv_and_process(handler)
+            handler.assert_not_called()
+            mock_send.assert_called_once_with([WORKER_GONE])
+        self.assertFalse(worker.running)
+        worker.close()
+
+    def test_leaves_after_max_requests(self):
+        worker = ZeroMQWorker(3, max_requests=2)
+        request = [b"ident", b"0" * 16 + b"echo".ljust(80) + b"msg"]
+        with patch.object(
+            worker.socket, "recv_multipart", return_value=request
+        ), patch.object(worker.socket, "send_multipart") as mock_send:
+            for _ in range(3):
+                worker._recv_and_process(Mock(return_value=b"response"))
+            sent = [call.args[0] for call in mock_send.call_args_list]
+            self.assertEqual(sent.count([WORKER_LEAVING, b"3"]), 1)
+            self.assertEqual(sent[2], [WORKER_LEAVING, b"3"])
+        worker.close()
+
+    def test_leaves_over_max_rss(self):
+        worker = ZeroMQWorker(1, max_rss_mb=100)
+        with patch.object(worker.socket, "send_multipart") as mock_send, patch(
+            "zero.utils.util.rss_mb", side_effect=[50, 150]
+        ):
+            for _ in range(RSS_CHECK_EVERY * 2):
+                worker._on_served()
+            mock_send.assert_called_once_with([WORKER_LEAVING, b"1"])
+        worker.close()
+
+    def test_invalid_request_gives_credit_back(self):
+        worker = ZeroMQWorker(1)
+        handler = Mock()
+        with patch.object(
+            worker.socket, "recv_multipart", return_value=[b"ident"]
+        ), patch.object(worker.socket, "send_multipart") as mock_send:
+            worker._recv_and_process(handler)
+            handler.assert_not_called()
+            mock_send.assert_called_once_with([WORKER_READY, b"1"])
+        worker.close()
+
+    def test_unsent_response_gives_credit_back(self):
+        worker = ZeroMQWorker(1)
+        request = [b"ident", b"0" * 16 + b"echo".ljust(80) + b"msg"]
+        with patch.object(
+            worker.socket, "recv_multipart", return_value=request
+        ), patch.object(
+            worker.socket, "send_multipart", side_effect=[zmq.error.Again, None]
+        ) as mock_send:
+            with self.assertRaises(zmq.error.Again):
+                worker._recv_and_process(Mock(return_value=b"response"))
+            mock_send.assert_called_with([WORKER_READY, b"1"])
+        worker.close()
+
+
+class TestLRUAsyncWorker(unittest.IsolatedAsyncioTestCase):
+    async def test_announces_credits_on_connect(self):
+        worker = AsyncZeroMQWorker(1, max_concurrency=8)
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send:
+            await worker._on_connect()
+            mock_send.assert_awaited_once_with([WORKER_READY, b"8"])
+        worker.close()
+
+    async def test_stops_after_requests_in_flight(self):
+        worker = AsyncZeroMQWorker(1, max_concurrency=8)
+        in_flight = asyncio.create_task(asyncio.sleep(0.01))
+        worker._tasks.add(in_flight)
+        in_flight.add_done_callback(worker._on_done)
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send:
+            self.assertTrue(await worker._on_control(WORKER_STOP))
+            self.assertTrue(in_flight.done())
+            mock_send.assert_awaited_once_with([WORKER_GONE])
+        self.assertFalse(worker.running)
+        worker.close()
+
+    async def test_leaves_after_max_requests(self):
+        worker = AsyncZeroMQWorker(2, max_requests=1)
+        request = [b"ident", b"0" * 16 + b"echo".ljust(80) + b"msg"]
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send:
+            await worker._process(request, AsyncMock(return_value=b"response"))
+            mock_send.assert_awaited_with([WORKER_LEAVING, b"2"])
+        worker.close()
+
+    async def test_invalid_request_gives_credit_back(self):
+        worker = AsyncZeroMQWorker(1, max_concurrency=8)
+        handler = AsyncMock()
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send:
+            await worker._process([b"ident"], handler)
+            handler.assert_not_awaited()
+            mock_send.assert_awaited_once_with([WORKER_READY, b"1"])
+        worker.close()
+
+    async def test_unsent_response_gives_credit_back(self):
+        worker = AsyncZeroMQWorker(1, max_concurrency=8)
+        request = [b"ident", b"0" * 16 + b"echo".ljust(80) + b"msg"]
+        with patch.object(
+            worker.socket,
+            "send_multipart",
+            new_callable=AsyncMock,
+            side_effect=[zmq.error.Again, None],
+        ) as mock_send:
+            await worker._process(request, AsyncMock(return_value=b"response"))
+            mock_send.assert_awaited_with([WORKER_READY, b"1"])
+        worker.close()
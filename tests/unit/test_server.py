@@ -8,7 +8,7 @@ import pytest
 # import pytest
 import zmq
 
-from zero import ZeroServer
+from zero import CachePolicy, ZeroServer, config
 from zero.encoder.protocols import Encoder
 from zero.zeromq_patterns.interfaces import ZeroMQBroker
 
@@ -197,6 +197,249 @@ class TestServer(unittest.TestCase):
         self.assertEqual(server._rpc_input_type_map, {"add": Tuple[int, int]})
         self.assertEqual(server._rpc_return_type_map, {"add": int})
 
+    def test_register_rpc_builds_input_decoder(self):
+        server = ZeroServer()
+
+        @server.register_rpc
+        def add(msg: Tuple[int, int]) -> int:
+            return msg[0] + msg[1]
+
+        self.assertIn(Tuple[int, int], server._encoder._decoders)
+
+    def test_register_rpc_with_builtin_generic_input(self):
+        server = ZeroServer()
+
+        @server.register_rpc
+        def total(msg: list[int]) -> int:
+            return sum(msg)
+
+        self.assertIn(list[int], server._encoder._decoders)
+
+    def test_register_rpc_with_options(self):
+        server = ZeroServer()
+
+        @server.register_rpc(max_concurrency=4)
+        async def add(msg: Tuple[int, int]) -> int:
+            return msg[0] + msg[1]
+
+        self.assertEqual(server._rpc_router, {"add": (add, True)})
+        self.assertEqual(server._rpc_options_map["add"].max_concurrency, 4)
+
+    def test_register_rpc_with_invalid_max_concurrency(self):
+        server = ZeroServer()
+
+        with self.assertRaises(ValueError):
+
+            @server.register_rpc(max_concurrency=0)
+            def add(msg: Tuple[int, int]) -> int:
+                return msg[0] + msg[1]
+
+    def test_register_rpc_with_cache(self):
+        server = ZeroServer()
+        policy = CachePolicy(ttl=5)
+
+        @server.register_rpc(cache=policy)
+        def add(msg: Tuple[int, int]) -> int:
+            return msg[0] + msg[1]
+
+        self.assertIs(server._rpc_options_map["add"].cache, policy)
+
+    def test_register_rpc_with_invalid_cache(self):
+        server = ZeroServer()
+
+        with self.assertRaises(ValueError):
+
+            @server.register_rpc(cache=60)
+            def add(msg: Tuple[int, int]) -> int:
+                return msg[0] + msg[1]
+
+    def test_register_rpc_with_invalid_executor(self):
+        server = ZeroServer()
+
+        with self.assertRaises(ValueError):
+
+            @server.register_rpc(executor="process")
+            def add(msg: Tuple[int, int]) -> int:
+                return msg[0] + msg[1]
+
+    def test_server_run_thread_pool_size_without_async_workers(self):
+        server = ZeroServer()
+
+        with patch.object(server, "_server_inst") as mock_server_inst:
+            with self.assertRaises(ValueError):
+                server.run(2, thread_pool_size=4)
+            mock_server_inst.start.assert_not_called()
+
+    def test_server_run_max_concurrency_without_async_workers(self):
+        server = ZeroServer()
+
+        with patch.object(server, "_server_inst") as mock_server_inst:
+            with self.assertRaises(ValueError):
+                server.run(2, max_concurrency=10)
+            mock_server_inst.start.assert_not_called()
+
+    def test_server_run_rpc_options_without_async_workers(self):
+        for options in ({"executor": "thread"}, {"max_concurrency": 2}):
+            server = ZeroServer()
+
+            @server.register_rpc(**options)
+            def add(msg: Tuple[int, int]) -> int:
+                return msg[0] + msg[1]
+
+            with patch.object(server, "_server_inst") as mock_server_inst:
+                with self.assertRaises(ValueError):
+                    server.run(2)
+                mock_server_inst.start.assert_not_called()
+
+                server.run(2, async_workers=True)
+                mock_server_inst.start.assert_called_once()
+
+    def test_register_rpc_with_invalid_priority(self):
+        server = ZeroServer()
+
+        for priority in (-1, 10, "high"):
+            with self.assertRaises(ValueError):
+
+                @server.register_rpc(priority=priority)
+                def add(msg: Tuple[int, int]) -> int:
+                    return msg[0] + msg[1]
+
+    def test_server_run_priority_without_lru(self):
+        server = ZeroServer()
+
+        @server.register_rpc(priority=5)
+        def add(msg: Tuple[int, int]) -> int:
+            return msg[0] + msg[1]
+
+        self.assertEqual(server._rpc_options_map["add"].priority, 5)
+        with patch.object(server, "_server_inst") as mock_server_inst:
+            with self.assertRaises(ValueError):
+                server.run(2)
+            mock_server_inst.start.assert_not_called()
+
+            with patch.object(config, "ZEROMQ_PATTERN", "lru"):
+                server.run(2)
+            mock_server_inst.start.assert_called_once()
+
+    def test_server_run_with_pools(self):
+        server = ZeroServer()
+
+        @server.register_rpc(pool="heavy")
+        def add(msg: Tuple[int, int]) -> int:
+            return msg[0] + msg[1]
+
+        pools = {"default": 2, "heavy": 1}
+        with patch.object(server, "_server_inst") as mock_server_inst, patch.object(
+            config, "ZEROMQ_PATTERN", "lru"
+        ):
+            server.run(pools=pools)
+            self.assertEqual(mock_server_inst.start.call_args.args[0], 3)
+            self.assertEqual(mock_server_inst.start.call_args.kwargs["pools"], pools)
+
+    def test_server_run_invalid_pools(self):
+        server = ZeroServer()
+
+        @server.register_rpc(pool="heavy")
+        def add(msg: Tuple[int, int]) -> int:
+            return msg[0] + msg[1]
+
+        with patch.object(server, "_server_inst") as mock_server_inst:
+            # registered with a pool, without pools
+            with self.assertRaises(ValueError):
+                server.run(2)
+            # only with the lru pattern
+            with self.assertRaises(ValueError):
+                server.run(pools={"default": 2, "heavy": 1})
+
+            with patch.object(config, "ZEROMQ_PATTERN", "lru"):
+                for kwargs in (
+                    {"pools": {"heavy": 1}},
+                    {"pools": {"default": 2}},
+                    {"pools": {"default": 2, "heavy": 0}},
+                    {"pools": {"default": 2, "heavy": 1}, "broker_threads": 2},
+                    {"pools": {"default": 2, "heavy": 1}, "direct_connect": True},
+                ):
+                    with self.assertRaises(ValueError):
+                        server.run(**kwargs)
+            mock_server_inst.start.assert_not_called()
+
+    def test_server_run_scaling(self):
+        server = ZeroServer()
+        with patch.object(server, "_server_inst") as mock_server_inst, patch.object(
+            config, "ZEROMQ_PATTERN", "lru"
+        ):
+            server.run(8, max_workers=4)
+            self.assertEqual(mock_server_inst.start.call_args.args[0], 4)
+            self.assertEqual(mock_server_inst.start.call_args.kwargs["min_workers"], 1)
+            self.assertEqual(mock_server_inst.start.call_args.kwargs["max_workers"], 4)
+
+            server.run(1, min_workers=2)
+            self.assertEqual(mock_server_inst.start.call_args.args[0], 2)
+            self.assertEqual(mock_server_inst.start.call_args.kwargs["max_workers"], 2)
+
+    def test_server_run_invalid_scaling(self):
+        server = ZeroServer()
+        with patch.object(server, "_server_inst") as mock_server_inst:
+            # only with the lru pattern
+            with self.assertRaises(ValueError):
+                server.run(2, max_workers=4)
+
+            with patch.object(config, "ZEROMQ_PATTERN", "lru"):
+                for kwargs in (
+                    {"min_workers": 0},
+                    {"max_workers": "4"},
+                    {"min_workers": 4, "max_workers": 2},
+                    {"max_workers": 4, "pools": {"default": 2}},
+                    {"max_workers": 4, "direct_connect": True},
+                    {"max_workers": 4, "broker_threads": 2},
+                ):
+                    with self.assertRaises(ValueError):
+                        server.run(2, **kwargs)
+            mock_server_inst.start.assert_not_called()
+
+    def test_server_run_recycling(self):
+        server = ZeroServer()
+        with patch.object(server, "_server_inst") as mock_server_inst, patch.object(
+            config, "ZEROMQ_PATTERN", "lru"
+        ):
+            server.run(2, max_requests_per_worker=1000, max_worker_rss_mb=512)
+            kwargs = mock_server_inst.start.call_args.kwargs
+            self.assertEqual(kwargs["max_requests_per_worker"], 1000)
+            self.assertEqual(kwargs["max_worker_rss_mb"], 512)
+
+    def test_server_run_invalid_recycling(self):
+        server = ZeroServer()
+        with patch.object(server, "_server_inst") as mock_server_inst:
+            # only with the lru pattern
+            with self.assertRaises(ValueError):
+                server.run(2, max_requests_per_worker=1000)
+
+            with patch.object(config, "ZEROMQ_PATTERN", "lru"):
+                for kwargs in (
+                    {"max_requests_per_worker": 0},
+                    {"max_worker_rss_mb": -1},
+                    {"max_requests_per_worker": 1000, "direct_connect": True},
+                ):
+                    with self.assertRaises(ValueError):
+                        server.run(2, **kwargs)
+
+                threaded = ZeroServer(use_threads=True)
+                with patch.object(threaded, "_server_inst"), self.assertRaises(
+                    ValueError
+                ):
+                    threaded.run(2, max_worker_rss_mb=512)
+            mock_server_inst.start.assert_not_called()
+
+    def test_server_run_invalid_broker_threads(self):
+        server = ZeroServer()
+
+        with patch.object(server, "_server_inst") as mock_server_inst:
+            with self.assertRaises(ValueError):
+                server.run(2, broker_threads=0)
+            with self.assertRaises(ValueError):
+                server.run(2, broker_threads=3)
+            mock_server_inst.start.assert_not_called()
+
     def test_register_same_rpc_twice(self):
         server = ZeroServer()
 
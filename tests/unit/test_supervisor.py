@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from zero.protocols.zeromq import supervisor
+from zero.protocols.zeromq.supervisor import Supervisor
+
+
+def _runner(alive: bool = True, exitcode: int = 0) -> Mock:
+    return Mock(is_alive=Mock(return_value=alive), exitcode=exitcode)
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.broker = Mock(workers=2, busy_workers=0, queue_depth=0)
+        self.broker.take_recycled.return_value = []
+        self.supervisor = Supervisor(Mock(), 1, 3, brokers=[self.broker])
+        self.supervisor._workers = {1: _runner(), 2: _runner()}
+        self.spawn = patch.object(
+            Supervisor, "_spawn", autospec=True, side_effect=self._spawned
+        ).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def _spawned(self, sup: Supervisor, worker_id=None):
+        if worker_id is None:
+            worker_id = min(set(range(1, 4)) - set(sup._workers))
+        sup._workers[worker_id] = _runner()
+
+    def test_adds_worker_when_requests_wait(self):
+        self.broker.queue_depth = 5
+        for _ in range(supervisor.SCALE_UP_AFTER - 1):
+            self.supervisor._look()
+        self.spawn.assert_not_called()
+
+        self.supervisor._look()
+        self.spawn.assert_called_once()
+        self.assertEqual(self.supervisor.workers, 3)
+
+        # never over max_workers
+        for _ in range(supervisor.SCALE_UP_AFTER):
+            self.supervisor._look()
+        self.assertEqual(self.supervisor.workers, 3)
+
+    def test_adds_worker_when_mostly_busy(self):
+        self.broker.busy_workers = 2
+        for _ in range(supervisor.SCALE_UP_AFTER):
+            self.supervisor._look()
+        self.spawn.assert_called_once()
+
+    def test_retires_worker_when_idle(self):
+        for _ in range(supervisor.SCALE_DOWN_AFTER - 1):
+            self.supervisor._look()
+        # a busy look starts over
+        self.broker.busy_workers = 2
+        self.supervisor._look()
+        self.broker.busy_workers = 0
+        for _ in range(supervisor.SCALE_DOWN_AFTER - 1):
+            self.supervisor._look()
+        self.broker.retire_worker.assert_not_called()
+
+        self.supervisor._look()
+        self.broker.retire_worker.assert_called_once()
+
+    def test_never_under_min_workers(self):
+        self.supervisor._workers = {1: _runner()}
+        self.broker.workers = 1
+        for _ in range(supervisor.SCALE_DOWN_AFTER):
+            self.supervisor._look()
+        self.broker.retire_worker.assert_not_called()
+
+    def test_replaces_dead_workers(self):
+        self.supervisor._workers = {1: _runner(alive=False, exitcode=1)}
+        self.supervisor._look()
+        self.spawn.assert_called_once()
+        self.assertEqual(self.supervisor.workers, 1)
+
+    def test_replaces_recycled_workers_right_away(self):
+        leaving = self.supervisor._workers[2]
+        self.broker.take_recycled.return_value = [2]
+        self.supervisor._look()
+
+        self.spawn.assert_called_once_with(self.supervisor, 2)
+        self.assertIsNot(self.supervisor._workers[2], leaving)
+        self.assertEqual(self.supervisor._leaving, [leaving])
+        self.assertEqual(self.supervisor.workers, 2)
+
+        # gone after its last requests
+        leaving.is_alive.return_value = False
+        self.broker.take_recycled.return_value = []
+        self.supervisor._look()
+        self.assertEqual(self.supervisor._leaving, [])
+
+    def test_keeps_the_workers_without_scaling(self):
+        sup = Supervisor(Mock(), 2, 2)
+        sup._workers = {1: _runner(alive=False, exitcode=-9), 2: _runner()}
+        sup._look()
+        self.spawn.assert_called_once()
+        self.assertEqual(sup.workers, 2)
+
+
+class TestSupervisorThreads(unittest.TestCase):
+    def test_runs_workers_with_lowest_free_ids(self):
+        spawn_worker = Mock()
+        sup = Supervisor(spawn_worker, 2, 2, use_threads=True)
+        sup.start(2)
+        for runner in sup._workers.values():
+            runner.join(1)
+        self.assertEqual(
+            sorted(call.args[0] for call in spawn_worker.call_args_list), [1, 2]
+        )
+        sup.stop()
+        self.assertEqual(sup.workers, 0)
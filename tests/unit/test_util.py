@@ -2,7 +2,7 @@ import logging
 import unittest
 from unittest.mock import patch
 
-from zero.utils.util import log_error
+from zero.utils.util import log_error, rss_mb
 
 
 class TestLogError(unittest.TestCase):
@@ -19,3 +19,13 @@ class TestLogError(unittest.TestCase):
             result = divide(10, 0)
             self.assertIsNone(result)
             mock_exception.assert_called_once()
+
+
+class TestRssMb(unittest.TestCase):
+    def test_rss_mb(self):
+        before = rss_mb()
+        self.assertGreater(before, 1)
+
+        grown = bytearray(64 * 2**20)
+        grown[:: 2**12] = b"x" * len(grown[:: 2**12])  # touch every page
+        self.assertGreater(rss_mb(), before + 32)
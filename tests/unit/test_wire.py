@@ -0,0 +1,70 @@
+import unittest
+
+from zero.zeromq_patterns import wire
+
+
+class TestWire(unittest.TestCase):
+    def test_legacy_header(self):
+        header = wire.legacy_header("add")
+        self.assertEqual(len(header), wire.FUNC_NAME_LEN)
+        self.assertEqual(wire.unpack_header(header + b"msg"), (b"add", b"msg"))
+
+    def test_compact_header(self):
+        tag = wire.table_tag(["a", "b"])
+        header = wire.compact_header(300, tag)
+        self.assertEqual(len(header), wire.COMPACT_HEADER_LEN)
+        self.assertEqual(wire.unpack_header(header + b"msg"), ((300, tag), b"msg"))
+
+    def test_deadline(self):
+        tag = wire.table_tag(["a", "b"])
+        header = wire.with_deadline(wire.compact_header(300, tag), 1700000000.25)
+        self.assertEqual(wire.unpack_header(header + b"msg"), ((300, tag), b"msg"))
+        self.assertEqual(wire.unpack_deadline(header + b"msg"), 1700000000.25)
+
+        self.assertIsNone(wire.unpack_deadline(wire.compact_header(300, tag) + b"msg"))
+        # no room for it in the legacy header
+        legacy = wire.legacy_header("add")
+        self.assertEqual(wire.with_deadline(legacy, 1700000000.25), legacy)
+        self.assertIsNone(wire.unpack_deadline(legacy + b"msg"))
+
+    def test_priority(self):
+        tag = wire.table_tag(["a", "b"])
+        header = wire.with_priority(wire.compact_header(300, tag), 7)
+        self.assertEqual(wire.unpack_header(header + b"msg"), ((300, tag), b"msg"))
+        self.assertEqual(wire.unpack_priority(header), 7)
+        self.assertEqual(wire.unpack_func_ref(memoryview(header + b"msg")), (300, tag))
+
+        # with the deadline too, in either order
+        for both in (
+            wire.with_priority(
+                wire.with_deadline(wire.compact_header(300, tag), 5.0), 7
+            ),
+            wire.with_deadline(
+                wire.with_priority(wire.compact_header(300, tag), 7), 5.0
+            ),
+        ):
+            self.assertEqual(wire.unpack_header(both + b"msg"), ((300, tag), b"msg"))
+            self.assertEqual(wire.unpack_deadline(both), 5.0)
+            self.assertEqual(wire.unpack_priority(both), 7)
+
+        self.assertIsNone(wire.unpack_priority(wire.compact_header(300, tag)))
+        legacy = wire.legacy_header("add")
+        self.assertEqual(wire.with_priority(legacy, 7), legacy)
+        self.assertIsNone(wire.unpack_priority(legacy))
+        self.assertEqual(wire.unpack_func_ref(legacy + b"msg"), b"add")
+
+    def test_handshake_is_legacy(self):
+        # the transport's `connect` sends the bare function name
+        self.assertEqual(wire.unpack_header(b"connect"), (b"connect", b""))
+
+    def test_table_tag(self):
+        self.assertEqual(wire.table_tag(["a", "b"]), wire.table_tag(["a", "b"]))
+        self.assertNotEqual(wire.table_tag(["a", "b"]), wire.table_tag(["b", "a"]))
+        # 4 bytes, a changed table almost never keeps the tag
+        tags = {wire.table_tag([f"func_{idx}"]) for idx in range(1000)}
+        self.assertEqual(len(tags), 1000)
+
+    def test_cache_hint(self):
+        frames = [wire.cache_hint(1.5), b"response"]
+        self.assertEqual(wire.unpack_cache_hint(frames), 1.5)
+        self.assertIsNone(wire.unpack_cache_hint([b"response"]))
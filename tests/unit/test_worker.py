@@ -1,11 +1,25 @@
+import os
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import msgspec
 
+from zero.encoder.generic import GenericEncoder
 from zero.encoder.protocols import Encoder
-from zero.error import SERVER_PROCESSING_ERROR
+from zero.error import (
+    BATCH_ERROR,
+    FUNCTION_TABLE_CHANGED_ERROR,
+    SERVER_OVERLOADED_ERROR,
+    SERVER_PROCESSING_ERROR,
+)
 from zero.protocols.zeromq.worker import _Worker
+from zero.rpc.cache import ResponseCache, SharedCacheState
+from zero.rpc.options import CachePolicy, RPCOptions
+from zero.utils.deadline import reset_deadline, set_deadline
+from zero.zeromq_patterns import wire
 
 
 class TestWorker(unittest.TestCase):
@@ -35,10 +49,41 @@ class TestWorker(unittest.TestCase):
             mock_worker = mock_get_worker.return_value
             worker.start_dealer_worker(worker_id)
 
-            mock_get_worker.assert_called_once_with("proxy", worker_id)
+            mock_get_worker.assert_called_once_with(
+                "proxy", worker_id, None, None, None, None
+            )
             mock_worker.listen.assert_called_once()
             mock_worker.close.assert_called_once()
 
+    def test_start_async_dealer_worker(self):
+        worker_id = 1
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+            async_workers=True,
+        )
+
+        with patch(
+            "zero.protocols.zeromq.worker.get_async_worker"
+        ) as mock_get_async_worker, patch(
+            "zero.protocols.zeromq.worker.get_worker"
+        ) as mock_get_worker:
+            mock_worker = mock_get_async_worker.return_value
+            mock_worker.listen = AsyncMock()
+            worker.start_dealer_worker(worker_id)
+
+            mock_get_worker.assert_not_called()
+            mock_get_async_worker.assert_called_once_with(
+                "proxy", worker_id, None, None, None, None, None
+            )
+            mock_worker.listen.assert_awaited_once_with(
+                self.device_comm_channel, worker.handle_msg_async
+            )
+            mock_worker.close.assert_called_once()
+
     @patch("zero.protocols.zeromq.worker.get_worker")
     def test_start_dealer_worker_exception_handling(self, mock_get_worker):
         mock_worker = Mock()
@@ -127,12 +172,54 @@ class TestWorker(unittest.TestCase):
             self.rpc_return_type_map,
         )
         msg = "some_message"
-        expected_response = "connected"
+        # the function table for the compact headers
+        expected_response = ["get_rpc_contract", "connect", "some_function"]
 
         response = worker.execute_rpc("connect", msg)
 
         self.assertEqual(response, expected_response)
 
+    def test_handle_msg_endpoints(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+            direct_endpoints=["tcp://0.0.0.0:5560", "tcp://0.0.0.0:5561"],
+        )
+
+        self.assertEqual(worker.execute_rpc("__endpoints__", None), [5560, 5561])
+        self.assertEqual(worker._get_direct_address(2), "tcp://0.0.0.0:5561")
+        self.assertIsNone(worker._get_direct_address(3))
+
+    def test_handle_msg_endpoints_without_direct_connect(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+        )
+
+        self.assertEqual(worker.execute_rpc("__endpoints__", None), [])
+
+    def test_handle_msg_endpoints_with_broker_threads(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+            broker_channels=[self.device_comm_channel, "ipc://shard.ipc"],
+            broker_endpoints=["tcp://0.0.0.0:5559", "tcp://0.0.0.0:5560"],
+        )
+
+        self.assertEqual(worker.execute_rpc("__endpoints__", None), [5559, 5560])
+        self.assertEqual(worker._get_broker_channel(1), self.device_comm_channel)
+        self.assertEqual(worker._get_broker_channel(2), "ipc://shard.ipc")
+        self.assertEqual(worker._get_broker_channel(3), self.device_comm_channel)
+
     def test_handle_msg_function_not_found(self):
         worker = _Worker(
             self.rpc_router,
@@ -339,3 +426,391 @@ class TestWorkerHandleMsg(unittest.TestCase):
         self.encoder.encode.assert_called_with(
             {"__zerror__server_exception": SERVER_PROCESSING_ERROR}
         )
+
+    def test_handle_msg_cached(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+            rpc_options_map={"some_function": RPCOptions(cache=CachePolicy())},
+        )
+        worker.execute_rpc = Mock(return_value="response")
+        self.encoder.encode.return_value = b"encoded"
+
+        first = worker.handle_msg(b"some_function", memoryview(b"data"))
+        second = worker.handle_msg(b"some_function", b"data")
+
+        self.assertEqual(first, b"encoded")
+        self.assertEqual(second, b"encoded")
+        worker.execute_rpc.assert_called_once()
+        self.encoder.decode_type.assert_called_once()
+        self.encoder.encode.assert_called_once()
+
+        # keyed by the message
+        worker.handle_msg(b"some_function", b"other")
+        self.assertEqual(worker.execute_rpc.call_count, 2)
+
+    def test_handle_msg_cache_hint(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+            rpc_options_map={
+                "some_function": RPCOptions(cache=CachePolicy(client_ttl=2))
+            },
+        )
+        worker.execute_rpc = Mock(return_value="response")
+        self.encoder.encode.return_value = b"encoded"
+
+        hinted = (wire.cache_hint(2), b"encoded")
+        self.assertEqual(worker.handle_msg(b"some_function", b"data"), hinted)
+        # cached ones too
+        self.assertEqual(worker.handle_msg(b"some_function", b"data"), hinted)
+
+        # errors have no hint
+        worker.execute_rpc.return_value = {"__zerror__server_exception": "x"}
+        self.assertEqual(worker.handle_msg(b"some_function", b"other"), b"encoded")
+
+    def test_handle_msg_expired(self):
+        encoder = GenericEncoder()
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+        )
+        worker.execute_rpc = Mock(return_value="response")
+
+        data = encoder.encode("data")
+        token = set_deadline(time.time() - 1)
+        try:
+            response = worker.handle_msg(b"some_function", data)
+        finally:
+            reset_deadline(token)
+        self.assertIn("__zerror__deadline_exceeded", encoder.decode(response))
+        worker.execute_rpc.assert_not_called()
+
+        token = set_deadline(time.time() + 10)
+        try:
+            response = worker.handle_msg(b"some_function", data)
+        finally:
+            reset_deadline(token)
+        self.assertEqual(encoder.decode(response), "response")
+
+    def test_handle_msg_batch(self):
+        encoder = GenericEncoder()
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+        )
+        batch = encoder.encode(
+            [["some_function", encoder.encode("a")], ["not_found", b""]]
+        )
+
+        responses = encoder.decode(worker.handle_msg(b"__batch__", batch))
+
+        self.assertEqual(
+            [encoder.decode(resp) for resp in responses],
+            [
+                "a",
+                {"__zerror__function_not_found": "Function `not_found` not found!"},
+            ],
+        )
+
+    def test_handle_msg_invalid_batch(self):
+        encoder = GenericEncoder()
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+        )
+
+        for batch in (encoder.encode("a"), encoder.encode([["a"]]), b"\xc1"):
+            self.assertEqual(
+                encoder.decode(worker.handle_msg(b"__batch__", batch)),
+                {"__zerror__validation_error": BATCH_ERROR},
+            )
+
+    def test_handle_msg_errors_are_not_cached(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+            rpc_options_map={"some_function": RPCOptions(cache=CachePolicy())},
+        )
+        worker.execute_rpc = Mock(return_value={"__zerror__server_exception": "x"})
+
+        worker.handle_msg(b"some_function", b"data")
+        worker.handle_msg(b"some_function", b"data")
+
+        self.assertEqual(worker.execute_rpc.call_count, 2)
+
+    def test_invalidate_cache_and_stats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state")
+            SharedCacheState.create(path, ["some_function"], 2)
+            options = {"some_function": RPCOptions(cache=CachePolicy())}
+            workers = [
+                _Worker(
+                    self.rpc_router,
+                    self.device_comm_channel,
+                    self.encoder,
+                    self.rpc_input_type_map,
+                    self.rpc_return_type_map,
+                    rpc_options_map=options,
+                    cache_path=path,
+                    workers=2,
+                )
+                for _ in range(2)
+            ]
+            for worker_id, worker in enumerate(workers, 1):
+                worker._worker_id = worker_id
+                worker.execute_rpc = Mock(return_value="response")
+                worker.handle_msg(b"some_function", b"data")
+            workers[1].handle_msg(b"some_function", b"data")
+
+            # counters of both workers
+            self.assertEqual(
+                _Worker.execute_rpc(workers[0], "__cache_stats__", ""),
+                {"some_function": {"hits": 1, "misses": 2}},
+            )
+
+            self.assertEqual(
+                _Worker.execute_rpc(
+                    workers[0], "__invalidate_cache__", "some_function"
+                ),
+                ["some_function"],
+            )
+
+            # the other worker drops its cached response too
+            for worker in workers:
+                worker.handle_msg(b"some_function", b"data")
+                self.assertEqual(worker.execute_rpc.call_count, 2)
+
+    def test_invalidate_cache_not_cached(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+        )
+
+        self.assertEqual(
+            worker.execute_rpc("__invalidate_cache__", "some_function"), []
+        )
+        self.assertEqual(worker.execute_rpc("__invalidate_cache__", ""), [])
+        self.assertEqual(worker.execute_rpc("__cache_stats__", ""), {})
+
+    def test_cache_stats_without_shared_state(self):
+        worker = _Worker(
+            self.rpc_router,
+            self.device_comm_channel,
+            self.encoder,
+            self.rpc_input_type_map,
+            self.rpc_return_type_map,
+            rpc_options_map={"some_function": RPCOptions(cache=CachePolicy())},
+        )
+        worker.execute_rpc = Mock(return_value="response")
+
+        worker.handle_msg(b"some_function", b"data")
+        worker.handle_msg(b"some_function", b"data")
+
+        self.assertEqual(
+            _Worker.execute_rpc(worker, "__cache_stats__", ""),
+            {"some_function": {"hits": 1, "misses": 1}},
+        )
+
+
+async def some_async_function(msg: str) -> str:
+    return msg
+
+
+async def failing_async_function(msg: str) -> str:
+    raise ValueError(msg)
+
+
+def current_thread_name(msg: str) -> str:
+    return threading.current_thread().name
+
+
+class TestWorkerAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.rpc_router = {
+            "some_function": (some_function, False),
+            "some_async_function": (some_async_function, True),
+            "failing_async_function": (failing_async_function, True),
+            "current_thread_name": (current_thread_name, False),
+        }
+        self.rpc_input_type_map = {
+            "some_function": str,
+            "some_async_function": str,
+            "failing_async_function": str,
+            "current_thread_name": str,
+        }
+        self.encoder = MagicMock(spec=Encoder)
+        self.worker = _Worker(
+            self.rpc_router,
+            "tcp://example.com:5555",
+            self.encoder,
+            self.rpc_input_type_map,
+            {},
+            async_workers=True,
+        )
+
+    @patch("zero.protocols.zeromq.worker.async_to_sync")
+    async def test_execute_rpc_async_awaits_coroutine(self, mock_async_to_sync):
+        response = await self.worker.execute_rpc_async("some_async_function", "hi")
+
+        self.assertEqual(response, "hi")
+        mock_async_to_sync.assert_not_called()
+
+    async def test_execute_rpc_async_sync_function(self):
+        response = await self.worker.execute_rpc_async("some_function", "hi")
+        self.assertEqual(response, "hi")
+
+    async def test_execute_rpc_async_sync_function_inline(self):
+        response = await self.worker.execute_rpc_async("current_thread_name", "hi")
+        self.assertEqual(response, threading.current_thread().name)
+
+    async def test_execute_rpc_async_sync_function_in_thread(self):
+        self.worker._rpc_options_map = {
+            "current_thread_name": RPCOptions(executor="thread")
+        }
+        response = await self.worker.execute_rpc_async("current_thread_name", "hi")
+        self.assertTrue(response.startswith("zero-worker"))
+
+    async def test_execute_rpc_async_reserved_and_not_found(self):
+        self.assertEqual(
+            await self.worker.execute_rpc_async("connect", None),
+            list(self.rpc_router),
+        )
+        self.assertEqual(
+            await self.worker.execute_rpc_async("not_found", None),
+            {"__zerror__function_not_found": "Function `not_found` not found!"},
+        )
+
+    async def test_execute_rpc_async_exception(self):
+        response = await self.worker.execute_rpc_async("failing_async_function", "x")
+        self.assertEqual(response, {"__zerror__server_exception": "ValueError('x')"})
+
+    async def test_handle_msg_async(self):
+        self.encoder.decode_type.return_value = "msg_data"
+
+        response = await self.worker.handle_msg_async(b"some_async_function", b"data")
+
+        self.encoder.decode_type.assert_called_once_with(b"data", str)
+        self.encoder.encode.assert_called_with("msg_data")
+        self.assertEqual(response, self.encoder.encode.return_value)
+
+    async def test_handle_msg_async_compact_header(self):
+        self.encoder.decode_type.return_value = "msg_data"
+        func_id = list(self.rpc_router).index("some_async_function")
+
+        response = await self.worker.handle_msg_async(
+            (func_id, wire.table_tag(list(self.rpc_router))), b"data"
+        )
+
+        self.encoder.decode_type.assert_called_once_with(b"data", str)
+        self.encoder.encode.assert_called_with("msg_data")
+        self.assertEqual(response, self.encoder.encode.return_value)
+
+    async def test_handle_msg_async_function_table_changed(self):
+        tag = wire.table_tag(list(self.rpc_router))
+
+        for func in ((0, tag ^ 1), (len(self.rpc_router), tag)):
+            self.encoder.reset_mock()
+            await self.worker.handle_msg_async(func, b"data")
+
+            self.encoder.decode_type.assert_not_called()
+            self.encoder.encode.assert_called_once_with(
+                {"__zerror__function_table_changed": FUNCTION_TABLE_CHANGED_ERROR}
+            )
+
+    async def test_handle_msg_async_overloaded(self):
+        self.worker._rpc_options_map = {
+            "some_async_function": RPCOptions(max_concurrency=2)
+        }
+        self.worker._rpc_in_flight = {"some_async_function": 2}
+
+        await self.worker.handle_msg_async(b"some_async_function", b"data")
+
+        self.encoder.decode_type.assert_not_called()
+        self.encoder.encode.assert_called_once_with(
+            {"__zerror__overloaded": SERVER_OVERLOADED_ERROR}
+        )
+        self.assertEqual(self.worker._rpc_in_flight["some_async_function"], 2)
+
+    async def test_handle_msg_async_tracks_in_flight(self):
+        self.worker._rpc_options_map = {
+            "some_async_function": RPCOptions(max_concurrency=2)
+        }
+        self.encoder.decode_type.return_value = "msg_data"
+
+        await self.worker.handle_msg_async(b"some_async_function", b"data")
+
+        self.encoder.encode.assert_called_with("msg_data")
+        self.assertEqual(self.worker._rpc_in_flight["some_async_function"], 0)
+
+    async def test_handle_msg_async_batch(self):
+        encoder = GenericEncoder()
+        self.worker._encoder = encoder
+        batch = encoder.encode(
+            [
+                ["some_async_function", encoder.encode("a")],
+                ["failing_async_function", encoder.encode("b")],
+            ]
+        )
+
+        responses = encoder.decode(
+            await self.worker.handle_msg_async(b"__batch__", batch)
+        )
+
+        self.assertEqual(
+            [encoder.decode(resp) for resp in responses],
+            [
+                "a",
+                {"__zerror__server_exception": "ValueError('b')"},
+            ],
+        )
+
+    async def test_handle_msg_async_validation_error(self):
+        self.encoder.decode_type.side_effect = msgspec.ValidationError("invalid")
+
+        await self.worker.handle_msg_async(b"some_async_function", b"data")
+
+        self.encoder.encode.assert_called_once_with(
+            {"__zerror__validation_error": "invalid"}
+        )
+
+    async def test_handle_msg_async_cached(self):
+        self.worker._response_caches = {
+            "some_async_function": ResponseCache(CachePolicy())
+        }
+        self.worker._rpc_options_map = {
+            "some_async_function": RPCOptions(max_concurrency=1)
+        }
+        self.encoder.decode_type.return_value = "msg_data"
+        self.encoder.encode.return_value = b"encoded"
+
+        first = await self.worker.handle_msg_async(b"some_async_function", b"data")
+        # a cached call doesn't count against the limit
+        self.worker._rpc_in_flight = {"some_async_function": 1}
+        second = await self.worker.handle_msg_async(b"some_async_function", b"data")
+
+        self.assertEqual(first, b"encoded")
+        self.assertEqual(second, b"encoded")
+        self.encoder.decode_type.assert_called_once()
+        self.encoder.encode.assert_called_once_with("msg_data")
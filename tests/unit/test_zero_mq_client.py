@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import zmq
+
+from zero.error import TimeoutException
+from zero.zeromq_patterns.queue_device.client import AsyncZeroMQClient
+
+ECHO_ADDRESS = "tcp://127.0.0.1:5598"
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    async def test_request_multipart(self):
+        context = zmq.Context()
+        echo = context.socket(zmq.ROUTER)
+        echo.bind(ECHO_ADDRESS)
+
+        def serve():
+            try:
+                # frames go back to the ident they came from
+                zmq.proxy(echo, echo)
+            except zmq.ContextTerminated:
+                echo.close()
+
+        threading.Thread(target=serve, daemon=True).start()
+
+        client = AsyncZeroMQClient(1000)
+        await client.connect(ECHO_ADDRESS)
+        responses = await asyncio.gather(
+            *[client.request_multipart([b"header", str(i).encode()]) for i in range(50)]
+        )
+
+        self.assertEqual(
+            [bytes(resp[-1]) for resp in responses],
+            [str(i).encode() for i in range(50)],
+        )
+        self.assertEqual(client._pending, {})
+        client.close()
+        context.term()
+
+    async def test_timeout(self):
+        client = AsyncZeroMQClient(1000)
+        with patch.object(client, "_send_multipart", new_callable=AsyncMock):
+            results = await asyncio.gather(
+                client.request_multipart([b"a"], timeout=20),
+                client.request_multipart([b"b"], timeout=50),
+                return_exceptions=True,
+            )
+
+        self.assertTrue(all(isinstance(r, TimeoutException) for r in results))
+        self.assertEqual(client._pending, {})
+        self.assertEqual(client._wheel, {})
+        self.assertIsNone(client._timer)
+        client.close()
+
+    async def test_shorter_timeout_is_not_delayed(self):
+        client = AsyncZeroMQClient(1000)
+        with patch.object(client, "_send_multipart", new_callable=AsyncMock):
+            long = asyncio.create_task(client.request_multipart([b"a"], timeout=5000))
+            await asyncio.sleep(0)
+            with self.assertRaises(TimeoutException):
+                await asyncio.wait_for(
+                    client.request_multipart([b"b"], timeout=20), timeout=1
+                )
+            long.cancel()
+
+        client.close()
+
+    async def test_cancelled_request_is_forgotten(self):
+        client = AsyncZeroMQClient(1000)
+        with patch.object(client, "_send_multipart", new_callable=AsyncMock):
+            task = asyncio.create_task(client.request_multipart([b"a"]))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertEqual(client._pending, {})
+        client.close()
@@ -1,10 +1,12 @@
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 import zmq
 
-from zero.zeromq_patterns.queue_device.worker import ZeroMQWorker
+from zero.utils.deadline import get_deadline
+from zero.zeromq_patterns import wire
+from zero.zeromq_patterns.queue_device.worker import AsyncZeroMQWorker, ZeroMQWorker
 
 
 class TestWorker(unittest.TestCase):
@@ -46,6 +48,23 @@ class TestWorker(unittest.TestCase):
             mock_recv_multipart.assert_called_once()
             mock_send_multipart.assert_called_once()
 
+    def test_recv_and_process_direct_socket(self):
+        worker = ZeroMQWorker(1, "tcp://127.0.0.1:5999")
+        mock_msg_handler = Mock(return_value=b"response")
+        self.assertEqual(worker.direct_socket.type, zmq.ROUTER)
+        with patch.object(
+            worker.direct_socket, "recv_multipart", return_value=[b"ident", b"request"]
+        ), patch.object(
+            worker.direct_socket, "send_multipart", return_value=None
+        ) as mock_direct_send, patch.object(
+            worker.socket, "send_multipart", return_value=None
+        ) as mock_send:
+            worker._recv_and_process(mock_msg_handler, worker.direct_socket)
+            mock_direct_send.assert_called_once()
+            mock_send.assert_not_called()
+        worker.close()
+        self.assertEqual(worker.direct_socket.closed, True)
+
     def test_recv_and_process_invalid_message(self):
         worker = ZeroMQWorker(1)
         mock_msg_handler = Mock(return_value=b"response")
@@ -58,3 +77,122 @@ class TestWorker(unittest.TestCase):
             mock_msg_handler.assert_not_called()
             mock_send_multipart.assert_not_called()
             mock_recv_multipart.assert_called_once()
+
+
+class TestAsyncWorker(unittest.IsolatedAsyncioTestCase):
+    async def test_create_async_zeromq_worker(self):
+        worker = AsyncZeroMQWorker(1)
+        self.assertEqual(worker.worker_id, 1)
+        self.assertEqual(worker.socket.getsockopt(zmq.LINGER), 0)
+        self.assertEqual(worker.socket.getsockopt(zmq.SNDTIMEO), 2000)
+        worker.close()
+        self.assertEqual(worker.socket.closed, True)
+        self.assertEqual(worker.context.closed, True)
+
+    async def test_process(self):
+        worker = AsyncZeroMQWorker(1)
+        req_id = b"1" * 16
+        func_name = b"some_function".ljust(80)
+        mock_msg_handler = AsyncMock(return_value=b"response")
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send_multipart:
+            await worker._process(
+                [b"ident", req_id + func_name + b"request"], mock_msg_handler
+            )
+            mock_msg_handler.assert_awaited_once_with(b"some_function", b"request")
+            mock_send_multipart.assert_awaited_once_with(
+                [b"ident", req_id + b"response"], zmq.NOBLOCK, copy=False
+            )
+        worker.close()
+
+    async def test_process_multipart(self):
+        worker = AsyncZeroMQWorker(1)
+        req_id = b"1" * 16
+        body = zmq.Frame(b"request")
+        mock_msg_handler = AsyncMock(return_value=b"response")
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send_multipart:
+            await worker._process(
+                [b"ident", req_id, wire.compact_header(3, 7), body], mock_msg_handler
+            )
+            func, message = mock_msg_handler.await_args.args
+            self.assertEqual(func, (3, 7))
+            # the message is a view of the frame, not a copy
+            self.assertIsInstance(message, memoryview)
+            self.assertEqual(message, b"request")
+            mock_send_multipart.assert_awaited_once_with(
+                [b"ident", req_id, b"response"], zmq.NOBLOCK, copy=False
+            )
+        worker.close()
+
+    async def test_process_cache_hint(self):
+        worker = AsyncZeroMQWorker(1)
+        req_id = b"1" * 16
+        hint = wire.cache_hint(2)
+        mock_msg_handler = AsyncMock(return_value=(hint, b"response"))
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send_multipart:
+            await worker._process(
+                [b"ident", req_id, wire.compact_header(3, 7), b"request"],
+                mock_msg_handler,
+            )
+            mock_send_multipart.assert_awaited_with(
+                [b"ident", req_id, hint, b"response"], zmq.NOBLOCK, copy=False
+            )
+
+            # no room for it in one frame responses
+            await worker._process(
+                [b"ident", req_id + wire.compact_header(3, 7) + b"request"],
+                mock_msg_handler,
+            )
+            mock_send_multipart.assert_awaited_with(
+                [b"ident", req_id + b"response"], zmq.NOBLOCK, copy=False
+            )
+        worker.close()
+
+    async def test_process_compact_header(self):
+        worker = AsyncZeroMQWorker(1)
+        req_id = b"1" * 16
+        mock_msg_handler = AsyncMock(return_value=b"response")
+        with patch.object(worker.socket, "send_multipart", new_callable=AsyncMock):
+            await worker._process(
+                [b"ident", req_id + wire.compact_header(3, 7) + b"request"],
+                mock_msg_handler,
+            )
+            mock_msg_handler.assert_awaited_once_with((3, 7), b"request")
+        worker.close()
+
+    async def test_process_deadline(self):
+        worker = AsyncZeroMQWorker(1)
+        req_id = b"1" * 16
+        header = wire.with_deadline(wire.compact_header(3, 7), 1700000000.5)
+        deadlines = []
+
+        async def msg_handler(func, message):
+            deadlines.append(get_deadline())
+            return b"response"
+
+        with patch.object(worker.socket, "send_multipart", new_callable=AsyncMock):
+            await worker._process([b"ident", req_id, header, b"request"], msg_handler)
+            await worker._process(
+                [b"ident", req_id + wire.compact_header(3, 7) + b"request"],
+                msg_handler,
+            )
+        # set while handling its request only
+        self.assertEqual(deadlines, [1700000000.5, None])
+        self.assertIsNone(get_deadline())
+        worker.close()
+
+    async def test_process_invalid_message(self):
+        worker = AsyncZeroMQWorker(1)
+        mock_msg_handler = AsyncMock(return_value=b"response")
+        with patch.object(
+            worker.socket, "send_multipart", new_callable=AsyncMock
+        ) as mock_send_multipart:
+            await worker._process([b"ident"], mock_msg_handler)
+            mock_msg_handler.assert_not_awaited()
+            mock_send_multipart.assert_not_awaited()
+        worker.close()
@@ -1,13 +1,19 @@
 from .pubsub.publisher import ZeroPublisher
 from .pubsub.subscriber import ZeroSubscriber
 from .rpc.client import AsyncZeroClient, ZeroClient
+from .rpc.options import CachePolicy, Hedging, LoadBalancing
 from .rpc.server import ZeroServer
+from .utils.deadline import remaining_time
 
 # no support for now -
 # from .logger import AsyncLogger
 
 __all__ = [
     "AsyncZeroClient",
+    "CachePolicy",
+    "Hedging",
+    "LoadBalancing",
     "ZeroClient",
     "ZeroServer",
+    "remaining_time",
 ]
@@ -9,7 +9,17 @@ logging.basicConfig(
     level=logging.INFO,
 )
 
-RESERVED_FUNCTIONS = ["get_rpc_contract", "connect", "__server_info__"]
+RESERVED_FUNCTIONS = [
+    "get_rpc_contract",
+    "connect",
+    "__server_info__",
+    "__endpoints__",
+    "__invalidate_cache__",
+    "__cache_stats__",
+    "__batch__",
+]
+# "proxy": requests are round robin to the workers through a zmq proxy
+# "lru": requests are sent only to free workers, workers announce when they are ready
 ZEROMQ_PATTERN = "proxy"
 SUPPORTED_PROTOCOLS = {
     "zeromq": {
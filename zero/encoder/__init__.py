@@ -1,3 +1,3 @@
-from .protocols import Encoder
+from .protocols import Encoder, accepts_buffers
 
-__all__ = ["Encoder"]
+__all__ = ["Encoder", "accepts_buffers"]
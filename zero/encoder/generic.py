@@ -1,4 +1,8 @@
-from typing import Any, Type
+import inspect
+from functools import lru_cache
+from typing import Any, Callable, Optional, Type, get_args, get_origin
+
+import msgspec
 
 try:
     from pydantic import BaseModel
@@ -7,28 +11,78 @@ try:
 except ImportError:
     PYDANTIC_AVAILABLE = False
 
-from .msgspc import MsgspecEncoder, T
+# v2 models have `model_validate`, v1 models `parse_obj`
+PYDANTIC_V2 = PYDANTIC_AVAILABLE and hasattr(BaseModel, "model_validate")
+
+if PYDANTIC_V2:
+    from pydantic import TypeAdapter
+elif PYDANTIC_AVAILABLE:  # pragma: no cover - pydantic v1
+    from pydantic import parse_obj_as
+
+from .msgspc import TYPED_DECODER_CACHE_SIZE, MsgspecEncoder, T
+
+
+def _dump_model(obj: Any) -> Any:
+    if PYDANTIC_AVAILABLE and isinstance(obj, BaseModel):
+        return obj.model_dump() if PYDANTIC_V2 else obj.dict()
+    raise TypeError(f"Encoding objects of type {type(obj)} is unsupported")
+
+
+# Have to put here to make it fork-safe
+# models, also the ones inside containers, are dumped while encoding, in one pass
+model_encoder = msgspec.msgpack.Encoder(enc_hook=_dump_model)
 
 
 class GenericEncoder(MsgspecEncoder):
     def encode(self, data: Any) -> bytes:
-        if PYDANTIC_AVAILABLE and isinstance(
-            data, BaseModel
-        ):  # pytype: disable=wrong-arg-types
-            if hasattr(data, "model_dump"):  # Pydantic v2
-                data = data.model_dump()
-            else:
-                data = data.dict()
+        if PYDANTIC_AVAILABLE:
+            return model_encoder.encode(data)
 
         return super().encode(data)
 
+    def register_type(self, typ: Type) -> None:
+        if _find_validator(typ) is not None:
+            # validated by pydantic, not decoded by msgspec
+            return
+        super().register_type(typ)
+
     def decode_type(self, data: bytes, typ: Type[T]) -> T:
-        if PYDANTIC_AVAILABLE and issubclass(
-            typ, BaseModel
-        ):  # pytype: disable=wrong-arg-types
-            decoded_data = self.decode(data)
-            if hasattr(typ, "model_validate"):  # Pydantic v2
-                return typ.model_validate(decoded_data)
-            return typ.parse_obj(decoded_data)
+        validate = _find_validator(typ)
+        if validate is not None:
+            return validate(self.decode(data))
 
         return super().decode_type(data, typ)
+
+
+def _find_validator(typ: Any) -> Optional[Callable[[Any], Any]]:
+    try:
+        hash(typ)
+    except TypeError:
+        # unhashable type, can't be cached
+        return _pydantic_validator.__wrapped__(typ)
+    return _pydantic_validator(typ)
+
+
+@lru_cache(maxsize=TYPED_DECODER_CACHE_SIZE)
+def _pydantic_validator(typ: Any) -> Optional[Callable[[Any], Any]]:
+    """
+    Validator of a pydantic model, or of a type with models inside, like `List[Model]`.
+    None for the other types, decoded by msgspec.
+    Cached, so the type is inspected only once.
+    """
+    if not PYDANTIC_AVAILABLE or not _has_model(typ):
+        return None
+
+    if inspect.isclass(typ) and get_origin(typ) is None:
+        return typ.model_validate if PYDANTIC_V2 else typ.parse_obj
+
+    if PYDANTIC_V2:
+        return TypeAdapter(typ).validate_python
+    return lambda obj: parse_obj_as(typ, obj)  # pragma: no cover - pydantic v1
+
+
+def _has_model(typ: Any) -> bool:
+    # `list[int]` is a class on python 3.9 and 3.10, but not a model
+    if inspect.isclass(typ) and get_origin(typ) is None:
+        return issubclass(typ, BaseModel)
+    return any(_has_model(arg) for arg in get_args(typ))
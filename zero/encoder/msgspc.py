@@ -1,4 +1,6 @@
-from typing import Any, Type, TypeVar
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar
 
 import msgspec
 
@@ -10,10 +12,46 @@ T = TypeVar("T")
 encoder = msgspec.msgpack.Encoder()
 decoder = msgspec.msgpack.Decoder()
 
+# typed decoders of the types that are not registered, like the clients' return types
+TYPED_DECODER_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=TYPED_DECODER_CACHE_SIZE)
+def _typed_decoder(typ: Any) -> msgspec.msgpack.Decoder:
+    return msgspec.msgpack.Decoder(typ)
+
 
 class MsgspecEncoder:
+    # msgspec decodes any buffer, no need to copy the received frames
+    accepts_buffers = True
+
     def __init__(self) -> None:
-        pass
+        # decoders of the registered types, like the input types of the rpc functions
+        self._decoders: Dict[Any, msgspec.msgpack.Decoder] = {}
+
+    def __getstate__(self) -> dict:
+        # decoders can't be pickled, the workers build them again from the types
+        state = {k: v for k, v in self.__dict__.items() if k != "_decoders"}
+        state["_decoder_types"] = list(self._decoders)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        types = state.pop("_decoder_types", [])
+        # not `__init__`, subclasses might take arguments
+        self.__dict__.update(state)
+        self._decoders = {}
+        for typ in types:
+            self.register_type(typ)
+
+    def register_type(self, typ: Type) -> None:
+        """
+        Build the decoder of the type now, instead of on the first message.
+        """
+        try:
+            self._decoders[typ] = msgspec.msgpack.Decoder(typ)
+        except TypeError:
+            # not supported by msgspec or unhashable, decoded on every message
+            logging.debug("Type %s is not registered", typ)
 
     def encode(self, data: Any) -> bytes:
         return encoder.encode(data)
@@ -22,7 +60,12 @@ class MsgspecEncoder:
         return decoder.decode(data)
 
     def decode_type(self, data: bytes, typ: Type[T]) -> T:
-        return msgspec.msgpack.decode(data, type=typ)
+        try:
+            typed_decoder = self._decoders.get(typ) or _typed_decoder(typ)
+        except TypeError:
+            # unhashable type, can't be cached
+            return msgspec.msgpack.decode(data, type=typ)
+        return typed_decoder.decode(data)
 
     def is_allowed_type(self, typ: Type) -> bool:
         return is_allowed_type(typ)
@@ -14,3 +14,11 @@ class Encoder(Protocol):  # pragma: no cover
 
     def is_allowed_type(self, typ: Type) -> bool:
         ...
+
+
+def accepts_buffers(encoder: Encoder) -> bool:
+    """
+    Whether the encoder can decode a memoryview, then received frames
+    are decoded without copying them to bytes.
+    """
+    return getattr(encoder, "accepts_buffers", False)
@@ -1,6 +1,10 @@
 SERVER_PROCESSING_ERROR = (
     "server cannot process message, check server logs for more details"
 )
+SERVER_OVERLOADED_ERROR = "server is overloaded, try again later"
+FUNCTION_TABLE_CHANGED_ERROR = "server functions changed, reconnect the client"
+BATCH_ERROR = "invalid batch, expected a list of [function name, message] pairs"
+DEADLINE_EXCEEDED_ERROR = "deadline of the request passed before it was handled"
 
 
 class ZeroException(Exception):
@@ -25,3 +29,11 @@ class RemoteException(ZeroException):
 
 class ValidationException(ZeroException):
     pass
+
+
+class OverloadedException(ZeroException):
+    pass
+
+
+class FunctionTableChangedException(ZeroException):
+    pass
@@ -1,20 +1,42 @@
+import asyncio
+import itertools
 import logging
+import random
 import threading
-from typing import Dict, Optional, Type, TypeVar
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import zmq
+import zmq.asyncio as zmqasync
 
 from zero import config
-from zero.encoder import Encoder
+from zero.encoder import Encoder, accepts_buffers
 from zero.encoder.msgspc import MsgspecEncoder
+from zero.error import (
+    FUNCTION_TABLE_CHANGED_ERROR,
+    ConnectionException,
+    TimeoutException,
+)
+from zero.rpc.cache import ClientCache, is_cacheable
+from zero.rpc.hedging import Hedger
+from zero.rpc.options import Hedging, LoadBalancing
+from zero.utils.deadline import get_deadline
 from zero.utils.type_util import AllowedType
 from zero.zeromq_patterns import (
     AsyncZeroMQClient,
     ZeroMQClient,
     get_async_client,
     get_client,
+    wire,
 )
+from zero.zeromq_patterns.wire import Body
 
 T = TypeVar("T")
 
+# response, and the seconds it may be cached if the server sent a hint
+_Reply = Tuple[Body, Optional[float]]
+
 
 class ZMQClient:
     def __init__(
@@ -22,10 +44,20 @@ class ZMQClient:
         address: str,
         default_timeout: int,
         encoder: Encoder,
+        cache: Optional[ClientCache] = None,
+        connections: int = 1,
+        servers: Optional[List[str]] = None,
+        balancing: Optional[LoadBalancing] = None,
     ):
         self._encoder = encoder or MsgspecEncoder()
+        self._default_timeout = default_timeout
+        self._table_changed = _table_changed_response(self._encoder)
+        self._zero_copy = accepts_buffers(self._encoder)
+        self._cache = cache
 
-        self.client_pool = ZMQClientPool(address, default_timeout)
+        self.client_pool = ZMQClientPool(
+            address, default_timeout, self._encoder, connections, servers, balancing
+        )
 
     def call(
         self,
@@ -33,20 +65,128 @@ class ZMQClient:
         msg: AllowedType,
         timeout: Optional[int] = None,
         return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
     ) -> T:
+        msg_bytes = b"" if msg is None else self._encoder.encode(msg)
+
+        if self._cache is not None:
+            cached = self._cache.get(rpc_func_name, msg_bytes)
+            if cached is not None:
+                return _decode(self._encoder, cached, return_type)
+
         zmqc = self.client_pool.get()
 
-        # make function name exactly 80 bytes
-        func_name_bytes = rpc_func_name.ljust(80).encode()
+        reply = self._request(zmqc, rpc_func_name, msg_bytes, timeout, priority)
+        return self._response(
+            zmqc, rpc_func_name, msg_bytes, reply, timeout, return_type, priority
+        )
+
+    def submit(
+        self,
+        rpc_func_name: str,
+        msg: AllowedType,
+        timeout: Optional[int] = None,
+        return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
+    ) -> Callable[[], T]:
+        """
+        Send the call without waiting for its response,
+        the returned function waits for it and returns it like `call`.
+        It should be called on the same thread, as the connection is of the thread.
+        """
         msg_bytes = b"" if msg is None else self._encoder.encode(msg)
 
-        resp_data_bytes = zmqc.request(func_name_bytes + msg_bytes, timeout)
+        if self._cache is not None:
+            cached = self._cache.get(rpc_func_name, msg_bytes)
+            if cached is not None:
+                return partial(_decode, self._encoder, cached, return_type)
+
+        zmqc = self.client_pool.get()
+
+        timeout, deadline = _deadline(timeout or self._default_timeout)
+        header = self.client_pool.header(zmqc, rpc_func_name)
+        if self.client_pool.multipart(zmqc):
+            header = _with_options(header, deadline, priority)
+            req_id = zmqc.submit([header, msg_bytes], timeout)
+        else:
+            req_id = zmqc.submit([header + msg_bytes], timeout)
+
+        def result() -> T:
+            try:
+                frames = zmqc.result(req_id)
+            except TimeoutException:
+                self.client_pool.timed_out(zmqc)
+                raise
+            self.client_pool.responded(zmqc)
+
+            reply = self._reply(frames)
+            return self._response(
+                zmqc, rpc_func_name, msg_bytes, reply, timeout, return_type, priority
+            )
+
+        return result
 
-        return (
-            self._encoder.decode(resp_data_bytes)
-            if return_type is None
-            else self._encoder.decode_type(resp_data_bytes, return_type)
+    def _response(
+        self,
+        zmqc: ZeroMQClient,
+        rpc_func_name: str,
+        msg_bytes: bytes,
+        reply: _Reply,
+        timeout: Optional[int],
+        return_type: Optional[Type[T]],
+        priority: Optional[int],
+    ) -> T:
+        if reply[0] == self._table_changed:
+            # the server restarted with other functions, retry with its new table
+            self.client_pool.refresh_headers(zmqc)
+            reply = self._request(zmqc, rpc_func_name, msg_bytes, timeout, priority)
+
+        resp_data_bytes, hint = reply
+        resp_data = _decode(self._encoder, resp_data_bytes, return_type)
+        if self._cache is not None and is_cacheable(resp_data):
+            self._cache.put(rpc_func_name, msg_bytes, bytes(resp_data_bytes), hint)
+        return resp_data
+
+    def _request(
+        self,
+        zmqc: ZeroMQClient,
+        rpc_func_name: str,
+        msg_bytes: bytes,
+        timeout: Optional[int],
+        priority: Optional[int] = None,
+    ) -> _Reply:
+        timeout, deadline = _deadline(timeout or self._default_timeout)
+        header = self.client_pool.header(zmqc, rpc_func_name)
+        try:
+            if not self.client_pool.multipart(zmqc):
+                reply: _Reply = zmqc.request(header + msg_bytes, timeout), None
+            else:
+                header = _with_options(header, deadline, priority)
+                frames = zmqc.request_multipart([header, msg_bytes], timeout)
+                reply = self._reply(frames)
+        except TimeoutException:
+            self.client_pool.timed_out(zmqc)
+            raise
+        self.client_pool.responded(zmqc)
+        return reply
+
+    def _reply(self, frames: List[Body]) -> _Reply:
+        # one frame responses are bytes already
+        resp = frames[-1] if self._zero_copy else bytes(frames[-1])
+        return resp, wire.unpack_cache_hint(frames)
+
+    def call_many(
+        self, calls: List[Tuple[str, AllowedType]], timeout: Optional[int] = None
+    ) -> Any:
+        zmqc = self.client_pool.get()
+        resp_data_bytes, _ = self._request(
+            zmqc, "__batch__", _encode_batch(self._encoder, calls), timeout
         )
+        return _decode_batch(self._encoder, resp_data_bytes)
+
+    def invalidate_cache(self, rpc_func_name: Optional[str] = None) -> None:
+        if self._cache is not None:
+            self._cache.clear(rpc_func_name)
 
     def close(self):
         self.client_pool.close()
@@ -58,10 +198,27 @@ class AsyncZMQClient:
         address: str,
         default_timeout: int,
         encoder: Encoder,
+        coalesce: bool = False,
+        cache: Optional[ClientCache] = None,
+        connections: int = 1,
+        servers: Optional[List[str]] = None,
+        balancing: Optional[LoadBalancing] = None,
+        hedger: Optional[Hedger] = None,
     ):
         self._encoder = encoder
+        self._default_timeout = default_timeout
+        self._table_changed = _table_changed_response(self._encoder)
+        self._zero_copy = accepts_buffers(self._encoder)
+        self._cache = cache
+        self._hedger = hedger
 
-        self.client_pool = AsyncZMQClientPool(address, default_timeout)
+        # identical calls in flight share one request, see `_coalesced`
+        self._coalesce = coalesce
+        self._in_flight: Dict[Tuple[Any, str, bytes], "asyncio.Future[_Reply]"] = {}
+
+        self.client_pool = AsyncZMQClientPool(
+            address, default_timeout, self._encoder, connections, servers, balancing
+        )
 
     async def call(
         self,
@@ -69,20 +226,188 @@ class AsyncZMQClient:
         msg: AllowedType,
         timeout: Optional[int] = None,
         return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
     ) -> T:
+        msg_bytes = b"" if msg is None else self._encoder.encode(msg)
+
+        if self._cache is not None:
+            cached = self._cache.get(rpc_func_name, msg_bytes)
+            if cached is not None:
+                return _decode(self._encoder, cached, return_type)
+
+        if self._coalesce:
+            resp_data_bytes, hint = await self._coalesced(
+                rpc_func_name, msg_bytes, timeout, priority
+            )
+        else:
+            resp_data_bytes, hint = await self._call(
+                rpc_func_name, msg_bytes, timeout, priority
+            )
+
+        resp_data = _decode(self._encoder, resp_data_bytes, return_type)
+        if self._cache is not None and is_cacheable(resp_data):
+            self._cache.put(rpc_func_name, msg_bytes, bytes(resp_data_bytes), hint)
+        return resp_data
+
+    async def _call(
+        self,
+        rpc_func_name: str,
+        msg_bytes: bytes,
+        timeout: Optional[int],
+        priority: Optional[int] = None,
+    ) -> _Reply:
+        if self._hedger is not None:
+            policy = self._hedger.policy(rpc_func_name)
+            if policy is not None:
+                return await self._hedged(
+                    rpc_func_name, msg_bytes, timeout, policy, priority
+                )
+        return await self._attempt(rpc_func_name, msg_bytes, timeout, priority)
+
+    async def _hedged(
+        self,
+        rpc_func_name: str,
+        msg_bytes: bytes,
+        timeout: Optional[int],
+        policy: Hedging,
+        priority: Optional[int] = None,
+    ) -> _Reply:
+        """
+        If the response doesn't come within the hedging delay, the call is sent
+        again on the next connection, and the first response is taken.
+        The other request is cancelled, its response is dropped when it comes,
+        as nothing waits for its request id anymore.
+        An error is raised only if both requests fail.
+        """
+        hedger: Hedger = self._hedger  # type: ignore
+        hedger.earn()
+        start = time.perf_counter()
+        first = asyncio.ensure_future(
+            self._attempt(rpc_func_name, msg_bytes, timeout, priority)
+        )
+        tasks = {first}
+        try:
+            delay = hedger.delay(rpc_func_name, policy)
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+            if not first.done() and delay is not None and hedger.spend():
+                remaining = (timeout or self._default_timeout) - int(delay * 1000)
+                tasks.add(
+                    asyncio.ensure_future(
+                        self._attempt(
+                            rpc_func_name, msg_bytes, max(remaining, 1), priority
+                        )
+                    )
+                )
+
+            while True:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None or not tasks:
+                        reply = task.result()
+                        hedger.record(
+                            rpc_func_name, policy, time.perf_counter() - start
+                        )
+                        return reply
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _attempt(
+        self,
+        rpc_func_name: str,
+        msg_bytes: bytes,
+        timeout: Optional[int],
+        priority: Optional[int] = None,
+    ) -> _Reply:
         zmqc = await self.client_pool.get()
 
-        # make function name exactly 80 bytes
-        func_name_bytes = rpc_func_name.ljust(80).encode()
-        msg_bytes = b"" if msg is None else self._encoder.encode(msg)
+        reply = await self._request(zmqc, rpc_func_name, msg_bytes, timeout, priority)
+        if reply[0] == self._table_changed:
+            # the server restarted with other functions, retry with its new table
+            await self.client_pool.refresh_headers(zmqc)
+            reply = await self._request(
+                zmqc, rpc_func_name, msg_bytes, timeout, priority
+            )
+        return reply
 
-        resp_data_bytes = await zmqc.request(func_name_bytes + msg_bytes, timeout)
+    async def _coalesced(
+        self,
+        rpc_func_name: str,
+        msg_bytes: bytes,
+        timeout: Optional[int],
+        priority: Optional[int] = None,
+    ) -> _Reply:
+        """
+        The first call sends the request, identical calls made while it is
+        in flight wait for its response instead of sending their own.
+        Every caller decodes the response itself, so they don't share objects.
+        A caller that times out or is cancelled doesn't cancel the request
+        for the others, but an error of the request is raised to all of them.
+        The request is sent with the priority of the first call.
+        """
+        # futures belong to a loop, calls on other threads' loops are not shared
+        key = (asyncio.get_running_loop(), rpc_func_name, msg_bytes)
+        shared = self._in_flight.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(
+                self._call(rpc_func_name, msg_bytes, timeout, priority)
+            )
+            self._in_flight[key] = shared
+            shared.add_done_callback(partial(self._forget, key))
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(shared), (timeout or self._default_timeout) / 1000
+            )
+        except asyncio.TimeoutError as exc:
+            raise TimeoutException(
+                f"Timeout while waiting for response at {rpc_func_name}"
+            ) from exc
 
-        return (
-            self._encoder.decode(resp_data_bytes)
-            if return_type is None
-            else self._encoder.decode_type(resp_data_bytes, return_type)
+    def _forget(self, key: Tuple[Any, str, bytes], shared: "asyncio.Future[_Reply]"):
+        self._in_flight.pop(key, None)
+        if not shared.cancelled():
+            # retrieved, even if all the callers are gone
+            shared.exception()
+
+    async def _request(
+        self,
+        zmqc: AsyncZeroMQClient,
+        rpc_func_name: str,
+        msg_bytes: bytes,
+        timeout: Optional[int],
+        priority: Optional[int] = None,
+    ) -> _Reply:
+        timeout, deadline = _deadline(timeout or self._default_timeout)
+        header = self.client_pool.header(zmqc, rpc_func_name)
+        try:
+            if not self.client_pool.multipart(zmqc):
+                reply: _Reply = await zmqc.request(header + msg_bytes, timeout), None
+            else:
+                header = _with_options(header, deadline, priority)
+                frames = await zmqc.request_multipart([header, msg_bytes], timeout)
+                resp = frames[-1] if self._zero_copy else bytes(frames[-1])
+                reply = resp, wire.unpack_cache_hint(frames)
+        except TimeoutException:
+            self.client_pool.timed_out(zmqc)
+            raise
+        self.client_pool.responded(zmqc)
+        return reply
+
+    async def call_many(
+        self, calls: List[Tuple[str, AllowedType]], timeout: Optional[int] = None
+    ) -> Any:
+        resp_data_bytes, _ = await self._call(
+            "__batch__", _encode_batch(self._encoder, calls), timeout
         )
+        return _decode_batch(self._encoder, resp_data_bytes)
+
+    def invalidate_cache(self, rpc_func_name: Optional[str] = None) -> None:
+        if self._cache is not None:
+            self._cache.clear(rpc_func_name)
 
     def close(self):
         self.client_pool.close()
@@ -94,27 +419,128 @@ class ZMQClientPool:
     Each time a call is made it tries to get the connection from the pool,
     based on the thread/process id.
     If the connection is not available, it creates a new connection and stores it in the pool.
+
+    If the server runs with `direct_connect`, the first connection discovers the workers'
+    ports and the pool connects to all of them, spreading the calls round robin.
+
+    With more than one `connections`, every thread gets that many sockets
+    to each address, striped round robin too. They share a context of as many
+    I/O threads, so one socket's traffic doesn't queue behind another's.
+
+    With other `servers`, every thread connects to all of them,
+    and the calls are spread over the connections by the `balancing`, see `_Balancer`.
+
+    The first connection to a server also gets its function table, so the requests
+    carry a small function id instead of the padded function name,
+    and are sent multipart, see `wire`.
     """
 
-    __slots__ = ["_pool", "_address", "_timeout"]
+    __slots__ = [
+        "_pool",
+        "_next",
+        "_timeout",
+        "_encoder",
+        "_connections",
+        "_context",
+        "_balancer",
+    ]
 
-    def __init__(self, address: str, timeout: int):
-        self._pool: Dict[int, ZeroMQClient] = {}
-        self._address = address
+    def __init__(
+        self,
+        address: str,
+        timeout: int,
+        encoder: Encoder,
+        connections: int = 1,
+        servers: Optional[List[str]] = None,
+        balancing: Optional[LoadBalancing] = None,
+    ):
+        self._pool: Dict[int, List[ZeroMQClient]] = {}
+        self._next: Dict[int, int] = {}
         self._timeout = timeout
+        self._encoder = encoder
+        self._connections = connections
+        # own context only when striping, created with the first connection
+        self._context: Optional[zmq.Context] = None
+        self._balancer = _Balancer([address] + (servers or []), balancing)
 
     def get(self) -> ZeroMQClient:
         thread_id = threading.get_ident()
         if thread_id not in self._pool:
             logging.debug("No connection found in current thread, creating new one")
-            self._pool[thread_id] = get_client(config.ZEROMQ_PATTERN, self._timeout)
-            self._pool[thread_id].connect(self._address)
-        return self._pool[thread_id]
+            self._pool[thread_id] = _interleave(
+                [self._connect(server) for server in self._balancer.servers]
+            )
+            self._next[thread_id] = 0
 
-    def close(self):
-        for client in self._pool.values():
+        clients = self._pool[thread_id]
+        idx = self._balancer.pick(clients, self._next[thread_id])
+        self._next[thread_id] = (idx + 1) % len(clients)
+        return clients[idx]
+
+    def _connect(self, server: "_Server") -> List[ZeroMQClient]:
+        client = self._new_client()
+        try:
+            table = client.connect(server.address)
+        except ConnectionException:
+            if not self._balancer.keep_unreachable(client, server):
+                client.close()
+                raise
+            return [client]
+
+        if server.endpoints is None:
+            server.headers = _function_headers(self._encoder, table)
+            resp = client.request(wire.legacy_header("__endpoints__"))
+            server.endpoints = _direct_endpoints(server.address, self._encoder, resp)
+
+        addresses = server.endpoints or [server.address]
+        clients = [client]
+        if server.endpoints:
+            # only the workers are used, the broker connection was for discovery
             client.close()
+            clients = []
+
+        # cycling the addresses, so consecutive calls go to different ones
+        for i in range(len(clients), len(addresses) * self._connections):
+            striped_client = self._new_client()
+            striped_client.connect(addresses[i % len(addresses)])
+            clients.append(striped_client)
+
+        for client in clients:
+            self._balancer.add(client, server)
+        return clients
+
+    def _new_client(self) -> ZeroMQClient:
+        if self._connections > 1 and self._context is None:
+            self._context = zmq.Context(io_threads=self._connections)
+        return get_client(config.ZEROMQ_PATTERN, self._timeout, self._context)
+
+    def multipart(self, client: ZeroMQClient) -> bool:
+        return self._balancer.server(client).headers is not None
+
+    def header(self, client: ZeroMQClient, func_name: str) -> bytes:
+        headers = self._balancer.server(client).headers or {}
+        return headers.get(func_name) or wire.legacy_header(func_name)
+
+    def refresh_headers(self, client: ZeroMQClient) -> None:
+        table = client.request(wire.legacy_header("connect"))
+        self._balancer.server(client).headers = _function_headers(self._encoder, table)
+
+    def timed_out(self, client: ZeroMQClient) -> None:
+        self._balancer.timed_out(client)
+
+    def responded(self, client: ZeroMQClient) -> None:
+        self._balancer.responded(client)
+
+    def close(self):
+        for clients in self._pool.values():
+            for client in clients:
+                client.close()
         self._pool = {}
+        self._next = {}
+        self._balancer.clear()
+        if self._context is not None:
+            self._context.destroy(linger=0)
+            self._context = None
 
 
 class AsyncZMQClientPool:
@@ -123,26 +549,351 @@ class AsyncZMQClientPool:
     Each time a call is made it tries to get the connection from the pool,
     based on the thread/process id.
     If the connection is not available, it creates a new connection and stores it in the pool.
+
+    If the server runs with `direct_connect`, the first connection discovers the workers'
+    ports and the pool connects to all of them, spreading the calls round robin.
+
+    With more than one `connections`, every thread gets that many sockets
+    to each address, striped round robin too. They share a context of as many
+    I/O threads, so one socket's traffic doesn't queue behind another's.
+
+    With other `servers`, every thread connects to all of them,
+    and the calls are spread over the connections by the `balancing`, see `_Balancer`.
+
+    The first connection to a server also gets its function table, so the requests
+    carry a small function id instead of the padded function name,
+    and are sent multipart, see `wire`.
     """
 
-    __slots__ = ["_pool", "_address", "_timeout"]
+    __slots__ = [
+        "_pool",
+        "_next",
+        "_timeout",
+        "_encoder",
+        "_connections",
+        "_context",
+        "_balancer",
+        "_connecting",
+    ]
 
-    def __init__(self, address: str, timeout: int):
-        self._pool: Dict[int, AsyncZeroMQClient] = {}
-        self._address = address
+    def __init__(
+        self,
+        address: str,
+        timeout: int,
+        encoder: Encoder,
+        connections: int = 1,
+        servers: Optional[List[str]] = None,
+        balancing: Optional[LoadBalancing] = None,
+    ):
+        self._pool: Dict[int, List[AsyncZeroMQClient]] = {}
+        self._next: Dict[int, int] = {}
         self._timeout = timeout
+        self._encoder = encoder
+        self._connections = connections
+        # own context only when striping, created with the first connection
+        self._context: Optional[zmqasync.Context] = None
+        self._balancer = _Balancer([address] + (servers or []), balancing)
+        self._connecting: Dict[int, "asyncio.Future[List[AsyncZeroMQClient]]"] = {}
 
     async def get(self) -> AsyncZeroMQClient:
         thread_id = threading.get_ident()
         if thread_id not in self._pool:
+            clients = await self._connecting_of(thread_id)
+            if thread_id not in self._pool:
+                self._pool[thread_id] = clients
+                self._next[thread_id] = 0
+
+        clients = self._pool[thread_id]
+        idx = self._balancer.pick(clients, self._next[thread_id])
+        self._next[thread_id] = (idx + 1) % len(clients)
+        return clients[idx]
+
+    async def _connecting_of(self, thread_id: int) -> List[AsyncZeroMQClient]:
+        """
+        The calls made while the thread connects wait for the same connections,
+        instead of making their own.
+        """
+        connecting = self._connecting.get(thread_id)
+        if (
+            connecting is None
+            or connecting.get_loop() is not asyncio.get_running_loop()
+        ):
             logging.debug("No connection found in current thread, creating new one")
-            self._pool[thread_id] = get_async_client(
-                config.ZEROMQ_PATTERN, self._timeout
-            )
-            await self._pool[thread_id].connect(self._address)
-        return self._pool[thread_id]
+            connecting = asyncio.ensure_future(self._connect_all())
+            self._connecting[thread_id] = connecting
+        try:
+            return await asyncio.shield(connecting)
+        finally:
+            if connecting.done():
+                self._connecting.pop(thread_id, None)
 
-    def close(self):
-        for client in self._pool.values():
+    async def _connect_all(self) -> List[AsyncZeroMQClient]:
+        return _interleave(
+            [await self._connect(server) for server in self._balancer.servers]
+        )
+
+    async def _connect(self, server: "_Server") -> List[AsyncZeroMQClient]:
+        client = self._new_client()
+        try:
+            table = await client.connect(server.address)
+        except ConnectionException:
+            if not self._balancer.keep_unreachable(client, server):
+                client.close()
+                raise
+            return [client]
+
+        if server.endpoints is None:
+            server.headers = _function_headers(self._encoder, table)
+            resp = await client.request(wire.legacy_header("__endpoints__"))
+            server.endpoints = _direct_endpoints(server.address, self._encoder, resp)
+
+        addresses = server.endpoints or [server.address]
+        clients = [client]
+        if server.endpoints:
+            # only the workers are used, the broker connection was for discovery
             client.close()
+            clients = []
+
+        # cycling the addresses, so consecutive calls go to different ones
+        for i in range(len(clients), len(addresses) * self._connections):
+            striped_client = self._new_client()
+            await striped_client.connect(addresses[i % len(addresses)])
+            clients.append(striped_client)
+
+        for client in clients:
+            self._balancer.add(client, server)
+        return clients
+
+    def _new_client(self) -> AsyncZeroMQClient:
+        if self._connections > 1 and self._context is None:
+            self._context = zmqasync.Context(io_threads=self._connections)
+        return get_async_client(config.ZEROMQ_PATTERN, self._timeout, self._context)
+
+    def multipart(self, client: AsyncZeroMQClient) -> bool:
+        return self._balancer.server(client).headers is not None
+
+    def header(self, client: AsyncZeroMQClient, func_name: str) -> bytes:
+        headers = self._balancer.server(client).headers or {}
+        return headers.get(func_name) or wire.legacy_header(func_name)
+
+    async def refresh_headers(self, client: AsyncZeroMQClient) -> None:
+        table = await client.request(wire.legacy_header("connect"))
+        self._balancer.server(client).headers = _function_headers(self._encoder, table)
+
+    def timed_out(self, client: AsyncZeroMQClient) -> None:
+        self._balancer.timed_out(client)
+
+    def responded(self, client: AsyncZeroMQClient) -> None:
+        self._balancer.responded(client)
+
+    def close(self):
+        for clients in self._pool.values():
+            for client in clients:
+                client.close()
         self._pool = {}
+        self._next = {}
+        self._connecting = {}
+        self._balancer.clear()
+        if self._context is not None:
+            self._context.destroy(linger=0)
+            self._context = None
+
+
+class _Server:
+    """
+    A server of a pool, what its first connection learned about it,
+    and its consecutive timeouts.
+    """
+
+    __slots__ = ["address", "endpoints", "headers", "timeouts", "ejected_until"]
+
+    def __init__(self, address: str):
+        self.address = address
+        # None until discovered, the workers' addresses if it runs with `direct_connect`
+        self.endpoints: Optional[List[str]] = None
+        # None until connected, or if the server doesn't return a function table
+        self.headers: Optional[Dict[str, bytes]] = None
+        self.timeouts = 0
+        self.ejected_until = 0.0
+
+
+class _Balancer:
+    """
+    Picks the connection of every call among the connections of the thread,
+    by the `LoadBalancing` strategy, leaving out the ones to ejected servers.
+
+    A server is ejected after `max_timeouts` consecutive timeouts of its connections,
+    for `ejection_time` seconds. With one server nothing is ejected,
+    there is nowhere else to send the calls.
+    """
+
+    __slots__ = ["servers", "_balancing", "_server_of"]
+
+    def __init__(self, addresses: List[str], balancing: Optional[LoadBalancing]):
+        self.servers = [_Server(address) for address in addresses]
+        self._balancing = balancing or LoadBalancing()
+        # connection -> its server
+        self._server_of: Dict[Any, _Server] = {}
+
+    def add(self, client: Any, server: _Server) -> None:
+        self._server_of[client] = server
+
+    def server(self, client: Any) -> _Server:
+        return self._server_of[client]
+
+    def keep_unreachable(self, client: Any, server: _Server) -> bool:
+        """
+        Whether to keep the connection to a server that did not answer the handshake,
+        the other servers get the calls meanwhile. Zeromq connects it when
+        the server is up, without the function table the calls use the padded names.
+        """
+        if len(self.servers) == 1:
+            return False
+        logging.warning("No answer from server at %s, ejecting it", server.address)
+        server.timeouts = self._balancing.max_timeouts
+        server.ejected_until = time.monotonic() + self._balancing.ejection_time
+        self.add(client, server)
+        return True
+
+    def pick(self, clients: List[Any], turn: int) -> int:
+        """
+        Index of the connection for the call, `turn` is the next one in round robin.
+        """
+        live: Sequence[int] = range(len(clients))
+        if len(self.servers) > 1:
+            now = time.monotonic()
+            # if all are ejected, all are tried
+            live = [
+                idx
+                for idx in live
+                if self._server_of[clients[idx]].ejected_until <= now
+            ] or live
+
+        strategy = self._balancing.strategy
+        if strategy == "round_robin":
+            if len(live) == len(clients):
+                return turn
+            # the first one from the turn on
+            return min(live, key=lambda idx: (idx - turn) % len(clients))
+
+        if strategy == "power_of_two" and len(live) > 2:
+            live = random.sample(live, 2)
+        return min(live, key=lambda idx: clients[idx].in_flight)
+
+    def timed_out(self, client: Any) -> None:
+        if len(self.servers) == 1:
+            return
+        server = self._server_of.get(client)
+        if server is None:
+            # closed meanwhile
+            return
+        server.timeouts += 1
+        if server.timeouts >= self._balancing.max_timeouts:
+            logging.warning(
+                "Server at %s timed out %d times in a row, ejecting it",
+                server.address,
+                server.timeouts,
+            )
+            server.ejected_until = time.monotonic() + self._balancing.ejection_time
+
+    def responded(self, client: Any) -> None:
+        if len(self.servers) > 1:
+            server = self._server_of.get(client)
+            if server is not None:
+                server.timeouts = 0
+
+    def clear(self) -> None:
+        self._server_of = {}
+
+
+def _interleave(lists: List[List[Any]]) -> List[Any]:
+    # first of each, then second of each... so consecutive turns differ
+    return [
+        item
+        for items in itertools.zip_longest(*lists)
+        for item in items
+        if item is not None
+    ]
+
+
+def _with_options(header: bytes, deadline: float, priority: Optional[int]) -> bytes:
+    header = wire.with_deadline(header, deadline)
+    if priority is None:
+        return header
+    return wire.with_priority(header, priority)
+
+
+def _deadline(timeout: int) -> Tuple[int, float]:
+    """
+    Timeout of a call and its deadline, sent with the request.
+    Called from a rpc function, both are cut to the deadline of the request
+    being handled, there's no point waiting after its caller gave up.
+    """
+    now = time.time()
+    deadline = now + timeout / 1000
+    inherited = get_deadline()
+    if inherited is not None and inherited < deadline:
+        timeout = int((inherited - now) * 1000)
+        if timeout <= 0:
+            raise TimeoutException("Deadline of the request being handled passed")
+        deadline = inherited
+    return timeout, deadline
+
+
+def _decode(encoder: Encoder, resp: Body, return_type: Optional[Type[T]]) -> T:
+    if return_type is None:
+        return encoder.decode(resp)
+    return encoder.decode_type(resp, return_type)
+
+
+def _encode_batch(encoder: Encoder, calls: List[Tuple[str, AllowedType]]) -> bytes:
+    # the messages are encoded on their own, the worker decodes them by their types
+    return encoder.encode(
+        [[name, b"" if msg is None else encoder.encode(msg)] for name, msg in calls]
+    )
+
+
+def _decode_batch(encoder: Encoder, resp: Body) -> Any:
+    """
+    Decoded responses of the calls of a batch, in order.
+    An error of the whole batch is returned as is.
+    """
+    responses = encoder.decode(resp)
+    if not isinstance(responses, list):
+        return responses
+    return [encoder.decode(body) for body in responses]
+
+
+def _function_headers(encoder: Encoder, resp: bytes) -> Optional[Dict[str, bytes]]:
+    """
+    Build the compact headers from the function table of the `connect` handshake.
+    Older servers don't return a table, then all requests use the legacy header
+    and are sent as one frame.
+    """
+    table = encoder.decode(resp) if resp else None
+    if not isinstance(table, list):
+        return None
+    tag = wire.table_tag(table)
+    return {
+        name: wire.compact_header(func_id, tag)
+        for func_id, name in enumerate(table[: wire.MAX_COMPACT_FUNCS])
+    }
+
+
+def _table_changed_response(encoder: Encoder) -> bytes:
+    # the response of a worker that got a function id from another table
+    return encoder.encode(
+        {"__zerror__function_table_changed": FUNCTION_TABLE_CHANGED_ERROR}
+    )
+
+
+def _direct_endpoints(address: str, encoder: Encoder, resp: bytes) -> List[str]:
+    """
+    Build the worker addresses from the ports returned by the `__endpoints__` call.
+    Servers not running with `direct_connect`, or older ones, don't return any.
+    """
+    ports = encoder.decode(resp) if resp else None
+    if not isinstance(ports, list):
+        return []
+    host = address.rsplit(":", 1)[0]
+    return [f"{host}:{port}" for port in ports]
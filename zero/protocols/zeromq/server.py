@@ -2,19 +2,37 @@ import logging
 import os
 import signal
 import sys
+import tempfile
+import threading
 from functools import partial
-from multiprocessing.pool import Pool, ThreadPool
-from typing import Callable, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import zmq
 import zmq.utils.win32
 
 from zero import config
 from zero.encoder import Encoder
+from zero.rpc.cache import (
+    SharedCacheState,
+    cached_functions,
+    create_shared_caches,
+)
+from zero.rpc.options import RPCOptions
 from zero.utils import util
-from zero.zeromq_patterns import ZeroMQBroker, get_broker
+from zero.zeromq_patterns import ZeroMQBroker, get_broker, wire
+from zero.zeromq_patterns.wire import (
+    DEFAULT_POOL,
+    DEFAULT_PRIORITY,
+    MAX_PRIORITY,
+    FuncRef,
+)
 
+from .supervisor import Supervisor
 from .worker import _Worker
 
+# health checks and discovery, never wait behind the other calls
+URGENT_FUNCTIONS = ("connect", "__server_info__", "__endpoints__")
+
 
 class ZMQServer:
     def __init__(
@@ -25,11 +43,18 @@ class ZMQServer:
         rpc_return_type_map: Dict[str, Optional[type]],
         encoder: Encoder,
         use_threads: bool,
+        rpc_options_map: Optional[Dict[str, RPCOptions]] = None,
     ):
         self._broker: ZeroMQBroker = None  # type: ignore
         self._device_comm_channel: str = None  # type: ignore
-        self._pool: Pool = None  # type: ignore
-        self._device_ipc: str = None  # type: ignore
+        self._supervisor: Optional[Supervisor] = None
+        self._device_ipcs: List[str] = []
+        self._device_port = 6666
+        # generations and counters of the cached responses, shared by the workers
+        self._cache_path: Optional[str] = None
+        self._shared_cache_paths: List[str] = []
+        # extra brokers when running with `broker_threads`, (broker, address, channel)
+        self._shards: List[Tuple[ZeroMQBroker, str, str]] = []
 
         self._address = address
         self._rpc_router = rpc_router
@@ -37,11 +62,25 @@ class ZMQServer:
         self._rpc_return_type_map = rpc_return_type_map
         self._encoder = encoder
         self._use_threads = use_threads
+        self._rpc_options_map = {} if rpc_options_map is None else rpc_options_map
 
-    def start(self, workers: int = os.cpu_count() or 1):
+    def start(
+        self,
+        workers: int = os.cpu_count() or 1,
+        async_workers: bool = False,
+        max_concurrency: Optional[int] = None,
+        thread_pool_size: Optional[int] = None,
+        direct_connect: bool = False,
+        broker_threads: int = 1,
+        pools: Optional[Dict[str, int]] = None,
+        min_workers: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_requests_per_worker: Optional[int] = None,
+        max_worker_rss_mb: Optional[int] = None,
+    ):
         """
         It starts a zmq proxy on the main process and spawns workers on the background.
-        It uses a pool of processes to spawn workers. Each worker is a zmq router.
+        Each worker is a zmq router on its own process, see `Supervisor`.
         A proxy device is used to load balance the requests.
 
         Parameters
@@ -49,12 +88,95 @@ class ZMQServer:
         workers: int
             Number of workers to spawn.
             Each worker is a zmq router and runs on a separate process.
+
+        async_workers: bool
+            Run each worker on its own event loop with an asyncio socket,
+            so coroutine rpc functions are served concurrently inside one worker.
+
+        max_concurrency: Optional[int]
+            Maximum number of in-flight requests per async worker.
+
+        thread_pool_size: Optional[int]
+            Size of the thread pool of each async worker,
+            for the rpc functions registered with `executor="thread"`.
+
+        direct_connect: bool
+            Each worker also binds its own socket, on the next available ports after
+            the server port, and clients send requests to the workers directly.
+            The broker is still used for discovery and by old clients.
+
+        broker_threads: int
+            Number of brokers, each runs on its own thread with its own frontend port
+            and its own share of the workers. The first one listens on the server
+            address, the others on the next available ports, and clients spread
+            calls over them. Useful when a single broker saturates a core.
+
+        pools: Optional[Dict[str, int]]
+            Number of workers of every pool, instead of `workers`.
+            The "lru" broker sends the calls of a function only to the workers
+            of its pool, the ones without a pool to the "default" pool.
+            The workers of a pool are spread over the brokers too.
+
+        min_workers: Optional[int]
+            Least number of workers when scaling them by the load of the "lru" broker.
+
+        max_workers: Optional[int]
+            Most number of workers when scaling them, `workers` is the number to start.
+
+        max_requests_per_worker: Optional[int]
+            Requests after which a worker of the "lru" broker is replaced.
+
+        max_worker_rss_mb: Optional[int]
+            Resident memory in MB over which a worker of the "lru" broker is replaced.
         """
-        self._broker = get_broker(config.ZEROMQ_PATTERN)
+        # workers get the pattern explicitly, they might not share our config module
+        pattern = config.ZEROMQ_PATTERN
+        priorities: Dict[FuncRef, int] = {
+            name.encode(): MAX_PRIORITY for name in URGENT_FUNCTIONS
+        }
+        priorities.update(self._by_func_ref("priority", DEFAULT_PRIORITY))
+        routes: Dict[FuncRef, str] = self._by_func_ref("pool", DEFAULT_POOL)
+        self._broker = get_broker(pattern, priorities=priorities, routes=routes)
+
+        worker_pools = None
+        if pools:
+            # the workers of a pool have consecutive ids,
+            # so they are spread over the brokers like the others
+            worker_pools = [name for name, size in pools.items() for _ in range(size)]
+            workers = len(worker_pools)
+
+        # worker ids, and the slots of the shared cache stats, go up to the most
+        min_workers = min_workers or workers
+        max_workers = max_workers or workers
 
         # for device-worker communication
         self._device_comm_channel = self._get_comm_channel()
 
+        # ports after the server port, first for the brokers then for the workers
+        endpoints = self._get_next_endpoints(
+            broker_threads - 1 + (workers if direct_connect else 0)
+        )
+        for address in endpoints[: broker_threads - 1]:
+            self._shards.append(
+                # own context, so closing the main broker doesn't wait on them
+                (
+                    get_broker(pattern, zmq.Context(), priorities, routes),
+                    address,
+                    self._get_comm_channel(),
+                )
+            )
+        direct_endpoints = endpoints[broker_threads - 1 :] if direct_connect else None
+
+        cached = cached_functions(self._rpc_options_map)
+        if cached:
+            self._cache_path = os.path.join(
+                _shared_memory_dir(), f"zero-{util.unique_id()}.cache"
+            )
+            SharedCacheState.create(self._cache_path, cached, max_workers)
+            self._shared_cache_paths = create_shared_caches(
+                self._cache_path, self._rpc_options_map
+            )
+
         spawn_worker = partial(
             _Worker.spawn_worker,
             self._rpc_router,
@@ -62,34 +184,95 @@ class ZMQServer:
             self._encoder,
             self._rpc_input_type_map,
             self._rpc_return_type_map,
+            async_workers=async_workers,
+            max_concurrency=max_concurrency,
+            thread_pool_size=thread_pool_size,
+            rpc_options_map=self._rpc_options_map,
+            pattern=pattern,
+            direct_endpoints=direct_endpoints,
+            broker_channels=[self._device_comm_channel]
+            + [channel for _, _, channel in self._shards],
+            broker_endpoints=(
+                [self._address] + [address for _, address, _ in self._shards]
+                if self._shards
+                else None
+            ),
+            cache_path=self._cache_path,
+            workers=max_workers,
+            worker_pools=worker_pools,
+            max_requests_per_worker=max_requests_per_worker,
+            max_worker_rss_mb=max_worker_rss_mb,
         )
 
-        self._start_server(workers, spawn_worker)
-
-    def _start_server(self, workers: int, spawn_worker: Callable[[int], None]):
-        if self._use_threads:
-            self._pool = ThreadPool(workers)
-        else:
-            self._pool = Pool(workers)
+        self._supervisor = Supervisor(
+            spawn_worker,
+            min_workers,
+            max_workers,
+            self._use_threads,
+            # the load and the workers to recycle are only known by the "lru" brokers
+            (
+                [self._broker] + [broker for broker, _, _ in self._shards]  # type: ignore
+                if pattern == "lru"
+                else None
+            ),
+        )
+        self._start_server(workers)
 
+    def _start_server(self, workers: int):
         # process termination signals
         util.register_signal_term(self._sig_handler)
 
-        worker_ids = list(range(1, workers + 1))
-        self._pool.map_async(spawn_worker, worker_ids)
+        self._supervisor.start(workers)  # type: ignore
+
+        for idx, (broker, address, channel) in enumerate(self._shards, 1):
+            threading.Thread(
+                target=broker.listen,
+                args=(address, channel),
+                name=f"Zero Broker {idx}",
+                daemon=True,
+            ).start()
 
         # blocking
         with zmq.utils.win32.allow_interrupt(self.stop):
             self._broker.listen(self._address, self._device_comm_channel)
 
+    def _by_func_ref(self, option: str, default: Any) -> Dict[FuncRef, Any]:
+        """
+        An option of the functions for the broker, by the function name
+        of the legacy header and by the function id of the compact header.
+        Only the functions with another value than the default are in it.
+        """
+        # same function table as the workers return in the `connect` handshake
+        table = list(self._rpc_router)
+        tag = wire.table_tag(table)
+        values: Dict[FuncRef, Any] = {}
+        for func_id, name in enumerate(table):
+            options = self._rpc_options_map.get(name)
+            value = default if options is None else getattr(options, option)
+            if value != default:
+                values[name.encode()] = value
+                values[(func_id, tag)] = value
+        return values
+
+    def _get_next_endpoints(self, count: int) -> List[str]:
+        host, port = self._address.rsplit(":", 1)
+        endpoints = []
+        next_port = int(port)
+        for _ in range(count):
+            next_port = util.get_next_available_port(next_port + 1)
+            endpoints.append(f"{host}:{next_port}")
+        return endpoints
+
     def _get_comm_channel(self) -> str:
         if os.name == "posix":
             ipc_id = util.unique_id()
-            self._device_ipc = f"{ipc_id}.ipc"
+            self._device_ipcs.append(f"{ipc_id}.ipc")
             return f"ipc://{ipc_id}.ipc"
 
         # device port is used for non-posix env
-        return f"tcp://127.0.0.1:{util.get_next_available_port(6666)}"
+        port = util.get_next_available_port(self._device_port)
+        self._device_port = port + 1
+        return f"tcp://127.0.0.1:{port}"
 
     def _sig_handler(self, signum, frame):  # pylint: disable=unused-argument
         logging.warning("%s signal called", signal.Signals(signum).name)
@@ -99,21 +282,33 @@ class ZMQServer:
         logging.warning("Terminating server at %s", self._address)
         if self._broker is not None:
             self._broker.close()
-        self._terminate_pool()
+        # brokers on the other threads go away with the process
+        self._stop_workers()
         self._remove_ipc()
+        self._remove_cache()
         sys.exit(0)
 
     @util.log_error
     def _remove_ipc(self):
-        if (
-            os.name == "posix"
-            and self._device_ipc is not None
-            and os.path.exists(self._device_ipc)
-        ):
-            os.remove(self._device_ipc)
+        for device_ipc in self._device_ipcs:
+            if os.name == "posix" and os.path.exists(device_ipc):
+                os.remove(device_ipc)
 
     @util.log_error
-    def _terminate_pool(self):
-        self._pool.terminate()
-        self._pool.close()
-        # self._pool.join()
+    def _remove_cache(self):
+        paths = [self._cache_path] if self._cache_path else []
+        for path in paths + self._shared_cache_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @util.log_error
+    def _stop_workers(self):
+        if self._supervisor is not None:
+            self._supervisor.stop()
+
+
+def _shared_memory_dir() -> str:
+    # memory backed on linux, the files are never written to disk
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    return tempfile.gettempdir()
@@ -0,0 +1,208 @@
+import logging
+import threading
+from multiprocessing import Process
+from typing import Callable, Dict, List, Optional, Union
+
+from zero.utils import util
+from zero.zeromq_patterns.load_balancer import ZeroMQBroker
+
+# seconds between two looks at the workers and their load
+SCALE_INTERVAL = 1.0
+
+# share of busy workers over which a worker is added, and under which one is retired
+BUSY_HIGH = 0.8
+BUSY_LOW = 0.3
+
+# looks in a row the load has to stay there before adding or retiring a worker,
+# quick to add for the peaks, slow to retire not to flap between the two
+SCALE_UP_AFTER = 2
+SCALE_DOWN_AFTER = 30
+
+# seconds to wait for a terminated worker to exit
+JOIN_TIMEOUT = 1.0
+
+WorkerRunner = Union[Process, threading.Thread]
+
+
+class Supervisor:
+    """
+    Runs every worker in its own process, or thread with `use_threads`,
+    started one by one, so their number can change while the server runs.
+    Every `SCALE_INTERVAL` the supervisor looks at the workers.
+
+    Workers that die are replaced, to keep at least `min_workers`.
+
+    A worker of the "lru" `brokers` that asks to leave, to be recycled,
+    gets a new one of the same worker id. The broker stops the old one
+    when the new one is ready, after the requests it already got.
+
+    With `min_workers` under `max_workers`, the number of workers follows the load
+    of the first of the `brokers`. The supervisor looks at the requests waiting
+    in the broker and at the share of busy workers.
+    A worker is added if requests are waiting or more than `BUSY_HIGH`
+    of the workers are busy, `SCALE_UP_AFTER` looks in a row, and a worker
+    is retired if none are waiting and less than `BUSY_LOW` are busy,
+    `SCALE_DOWN_AFTER` looks in a row. The broker retires a free worker,
+    which stops after the requests it had, so no request is lost.
+
+    Worker ids stay from 1 to `max_workers`, a new worker takes the lowest free one.
+    """
+
+    __slots__ = [
+        "_spawn_worker",
+        "_min_workers",
+        "_max_workers",
+        "_use_threads",
+        "_brokers",
+        "_workers",
+        "_leaving",
+        "_busy_looks",
+        "_idle_looks",
+        "_lock",
+        "_stopped",
+    ]
+
+    def __init__(
+        self,
+        spawn_worker: Callable[[int], None],
+        min_workers: int,
+        max_workers: int,
+        use_threads: bool = False,
+        brokers: Optional[List[ZeroMQBroker]] = None,
+    ):
+        self._spawn_worker = spawn_worker
+        self._min_workers = min_workers
+        self._max_workers = max_workers
+        self._use_threads = use_threads
+        self._brokers = brokers or []
+
+        self._workers: Dict[int, WorkerRunner] = {}
+        # replaced workers, still answering the requests they got
+        self._leaving: List[WorkerRunner] = []
+        self._busy_looks = 0
+        self._idle_looks = 0
+        # a look is never half done when stopping
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    def start(self, workers: int) -> None:
+        for _ in range(workers):
+            self._spawn()
+
+        threading.Thread(
+            target=self._watch, name="Zero Supervisor", daemon=True
+        ).start()
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(SCALE_INTERVAL):
+            try:
+                with self._lock:
+                    if not self._stopped.is_set():
+                        self._look()
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Supervisor could not look after the workers")
+
+    def _look(self) -> None:
+        self._reap()
+        for broker in self._brokers:
+            for worker_id in broker.take_recycled():
+                self._replace(worker_id)
+
+        if len(self._workers) < self._min_workers:
+            while len(self._workers) < self._min_workers:
+                self._spawn()
+            self._busy_looks = self._idle_looks = 0
+            return
+
+        if self._brokers and self._min_workers < self._max_workers:
+            self._scale(self._brokers[0])
+
+    def _scale(self, broker: ZeroMQBroker) -> None:
+        connected = broker.workers
+        if not connected:
+            return  # starting, or all are gone and new ones are starting
+
+        busy = broker.busy_workers / connected
+        if broker.queue_depth or busy > BUSY_HIGH:
+            self._busy_looks += 1
+            self._idle_looks = 0
+        elif busy < BUSY_LOW:
+            self._idle_looks += 1
+            self._busy_looks = 0
+        else:
+            self._busy_looks = self._idle_looks = 0
+
+        if self._busy_looks >= SCALE_UP_AFTER:
+            self._busy_looks = 0
+            if len(self._workers) < self._max_workers:
+                logging.info("Adding a worker, %d busy", broker.busy_workers)
+                self._spawn()
+        elif self._idle_looks >= SCALE_DOWN_AFTER:
+            self._idle_looks = 0
+            if len(self._workers) > self._min_workers:
+                logging.info("Retiring a worker, %d busy", broker.busy_workers)
+                broker.retire_worker()
+
+    def _replace(self, worker_id: int) -> None:
+        logging.info("Replacing worker %d", worker_id)
+        runner = self._workers.pop(worker_id, None)
+        if runner is not None:
+            self._leaving.append(runner)
+        self._spawn(worker_id)
+
+    def _spawn(self, worker_id: Optional[int] = None) -> None:
+        if worker_id is None:
+            worker_id = next(
+                idx
+                for idx in range(1, self._max_workers + 1)
+                if idx not in self._workers
+            )
+        runner: WorkerRunner
+        if self._use_threads:
+            runner = threading.Thread(
+                target=self._spawn_worker,
+                args=(worker_id,),
+                name=f"Zero Worker {worker_id}",
+                daemon=True,
+            )
+        else:
+            # daemon like the workers of a `multiprocessing.Pool`
+            runner = Process(
+                target=_run_worker, args=(self._spawn_worker, worker_id), daemon=True
+            )
+        runner.start()
+        self._workers[worker_id] = runner
+
+    def _reap(self) -> None:
+        for worker_id, runner in list(self._workers.items()):
+            if runner.is_alive():
+                continue
+            del self._workers[worker_id]
+            exitcode = getattr(runner, "exitcode", 0)
+            if exitcode:
+                logging.warning("Worker %d exited with %s", worker_id, exitcode)
+        self._leaving = [runner for runner in self._leaving if runner.is_alive()]
+
+    def stop(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            runners = list(self._workers.values()) + self._leaving
+        for runner in runners:
+            if isinstance(runner, Process):
+                runner.terminate()
+        # threads go away with the process
+        for runner in runners:
+            if isinstance(runner, Process):
+                runner.join(JOIN_TIMEOUT)
+        self._workers.clear()
+        self._leaving.clear()
+
+
+def _run_worker(spawn_worker: Callable[[int], None], worker_id: int) -> None:
+    # forked after the server registered its handlers, `terminate` should just stop it
+    util.reset_signal_term()
+    spawn_worker(worker_id)
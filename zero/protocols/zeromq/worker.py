@@ -1,16 +1,36 @@
 import asyncio
+import contextvars
 import logging
+import sys
 import time
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
 
 from msgspec import ValidationError
 
 from zero import config
 from zero.codegen.codegen import CodeGen
-from zero.encoder.protocols import Encoder
-from zero.error import SERVER_PROCESSING_ERROR
+from zero.encoder.protocols import Encoder, accepts_buffers
+from zero.error import (
+    BATCH_ERROR,
+    DEADLINE_EXCEEDED_ERROR,
+    FUNCTION_TABLE_CHANGED_ERROR,
+    SERVER_OVERLOADED_ERROR,
+    SERVER_PROCESSING_ERROR,
+)
+from zero.rpc.cache import (
+    Cache,
+    SharedCacheState,
+    cached_functions,
+    is_cacheable,
+    open_cache,
+)
+from zero.rpc.options import RPCOptions
 from zero.utils.async_to_sync import async_to_sync
-from zero.zeromq_patterns.factory import get_worker
+from zero.utils.deadline import get_deadline
+from zero.zeromq_patterns import wire
+from zero.zeromq_patterns.factory import get_async_worker, get_worker
 
 
 class _Worker:
@@ -21,12 +41,88 @@ class _Worker:
         encoder: Encoder,
         rpc_input_type_map: dict,
         rpc_return_type_map: dict,
+        async_workers: bool = False,
+        max_concurrency: Optional[int] = None,
+        thread_pool_size: Optional[int] = None,
+        rpc_options_map: Optional[Dict[str, RPCOptions]] = None,
+        pattern: Optional[str] = None,
+        direct_endpoints: Optional[List[str]] = None,
+        broker_channels: Optional[List[str]] = None,
+        broker_endpoints: Optional[List[str]] = None,
+        cache_path: Optional[str] = None,
+        workers: int = 1,
+        worker_pools: Optional[List[str]] = None,
+        max_requests_per_worker: Optional[int] = None,
+        max_worker_rss_mb: Optional[int] = None,
     ):
         self._rpc_router = rpc_router
         self._device_comm_channel = device_comm_channel
         self._encoder = encoder
+        # messages of multipart requests are views of the received frames
+        self._zero_copy = accepts_buffers(encoder)
         self._rpc_input_type_map = rpc_input_type_map
         self._rpc_return_type_map = rpc_return_type_map
+        self._async_workers = async_workers
+        self._pattern = pattern or config.ZEROMQ_PATTERN
+        self._max_concurrency = max_concurrency
+        self._rpc_options_map = {} if rpc_options_map is None else rpc_options_map
+
+        # addresses the workers bind for direct requests, indexed by worker id - 1
+        self._direct_endpoints = direct_endpoints or []
+
+        # pool of every worker for the "lru" broker, indexed by worker id - 1
+        self._worker_pools = worker_pools or []
+
+        # the worker asks the "lru" broker to replace it when over one of them
+        self._max_requests_per_worker = max_requests_per_worker
+        self._max_worker_rss_mb = max_worker_rss_mb
+
+        # with several brokers, workers are spread over their channels
+        # and clients are spread over their addresses
+        self._broker_channels = broker_channels or [device_comm_channel]
+        self._broker_endpoints = broker_endpoints or []
+
+        # function table returned by the `connect` handshake, for the compact headers,
+        # the function id is the index, same on every worker as they share the router
+        self._rpc_table: List[str] = list(rpc_router)
+        self._rpc_table_tag = wire.table_tag(self._rpc_table)
+
+        # encoded responses of the functions registered with a cache policy,
+        # in this worker or shared by all of them,
+        # invalidations reach the other workers through the shared generations
+        self._response_caches: Dict[str, Cache] = {
+            name: open_cache(
+                name, self._rpc_options_map[name].cache, cache_path  # type: ignore
+            )
+            for name in cached_functions(self._rpc_options_map)
+        }
+        self._cache_state: Optional[SharedCacheState] = None
+        if cache_path and self._response_caches:
+            self._cache_state = SharedCacheState(
+                cache_path, list(self._response_caches), workers
+            )
+        # sent with the responses, the seconds the clients may cache them
+        self._cache_hints: Dict[str, bytes] = {}
+        for name in self._response_caches:
+            client_ttl = self._rpc_options_map[name].cache.client_ttl  # type: ignore
+            if client_ttl:
+                self._cache_hints[name] = wire.cache_hint(client_ttl)
+        # set when the worker starts, the slot of its cache counters
+        self._worker_id = 1
+
+        # in-flight calls of the rpc functions that have a concurrency limit
+        self._rpc_in_flight: Dict[str, int] = {}
+
+        # runs blocking sync functions (`executor="thread"`) off the worker's loop
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        if async_workers:
+            self._thread_pool = ThreadPoolExecutor(
+                thread_pool_size, thread_name_prefix="zero-worker"
+            )
+
+        if async_workers and sys.platform == "win32":
+            # windows need special event loop policy to work with zmq
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
         self._loop = asyncio.new_event_loop() or asyncio.get_event_loop()
 
@@ -37,9 +133,26 @@ class _Worker:
         )
 
     def start_dealer_worker(self, worker_id):
-        worker = get_worker(config.ZEROMQ_PATTERN, worker_id)
+        self._worker_id = worker_id
+        if self._cache_state is not None:
+            # carry on the counters of the worker this one replaces, if any
+            for name, cache in self._response_caches.items():
+                cache.hits, cache.misses = self._cache_state.recorded(worker_id, name)
+
+        if self._async_workers:
+            self._start_async_dealer_worker(worker_id)
+            return
+
+        worker = get_worker(
+            self._pattern,
+            worker_id,
+            self._get_direct_address(worker_id),
+            self._get_pool(worker_id),
+            self._max_requests_per_worker,
+            self._max_worker_rss_mb,
+        )
         try:
-            worker.listen(self._device_comm_channel, self.handle_msg)
+            worker.listen(self._get_broker_channel(worker_id), self.handle_msg)
 
         except KeyboardInterrupt:
             logging.warning(
@@ -53,20 +166,90 @@ class _Worker:
             logging.warning("Closing worker %d", worker_id)
             worker.close()
 
-    def handle_msg(self, func_name_encoded: bytes, data: bytes) -> Optional[bytes]:
+    def _start_async_dealer_worker(self, worker_id):
+        asyncio.set_event_loop(self._loop)
+        worker = get_async_worker(
+            self._pattern,
+            worker_id,
+            self._max_concurrency,
+            self._get_direct_address(worker_id),
+            self._get_pool(worker_id),
+            self._max_requests_per_worker,
+            self._max_worker_rss_mb,
+        )
         try:
-            func_name = func_name_encoded.decode()
-            input_type = self._rpc_input_type_map.get(func_name)
+            self._loop.run_until_complete(
+                worker.listen(
+                    self._get_broker_channel(worker_id), self.handle_msg_async
+                )
+            )
+
+        except KeyboardInterrupt:
+            logging.warning(
+                "Caught KeyboardInterrupt, terminating worker %d", worker_id
+            )
+
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.exception(exc)
 
-            msg = ""
-            if data:
-                if input_type:
-                    msg = self._encoder.decode_type(data, input_type)
-                else:
-                    msg = self._encoder.decode(data)
+        finally:
+            logging.warning("Closing worker %d", worker_id)
+            worker.close()
+            self._loop.close()
+            if self._thread_pool:
+                self._thread_pool.shutdown(wait=False)
 
+    def _get_broker_channel(self, worker_id: int) -> str:
+        return self._broker_channels[(worker_id - 1) % len(self._broker_channels)]
+
+    def _get_direct_address(self, worker_id: int) -> Optional[str]:
+        if worker_id <= len(self._direct_endpoints):
+            return self._direct_endpoints[worker_id - 1]
+        return None
+
+    def _get_pool(self, worker_id: int) -> Optional[str]:
+        if worker_id <= len(self._worker_pools):
+            return self._worker_pools[worker_id - 1]
+        return None
+
+    def handle_msg(
+        self, func: wire.FuncRef, data: wire.Body
+    ) -> Optional[wire.Response]:
+        if _expired():
+            # the caller gave up, don't spend the worker on it
+            return self._encoder.encode(
+                {"__zerror__deadline_exceeded": DEADLINE_EXCEEDED_ERROR}
+            )
+
+        func_name = self._get_func_name(func)
+        if func_name is None:
+            return self._encoder.encode(
+                {"__zerror__function_table_changed": FUNCTION_TABLE_CHANGED_ERROR}
+            )
+
+        if func_name == "__batch__":
+            calls = self._decode_batch(data)
+            if calls is None:
+                return self._encoder.encode({"__zerror__validation_error": BATCH_ERROR})
+            return self._encoder.encode(
+                [_response_body(self.handle_msg(name, msg)) for name, msg in calls]
+            )
+
+        cache = self._response_caches.get(func_name)
+        if cache is not None:
+            key = bytes(data)
+            cached = self._get_cached(func_name, cache, key)
+            if cached is not None:
+                return self._with_hint(func_name, cached)
+
+        try:
+            msg = self._decode_msg(func_name, data)
             response = self.execute_rpc(func_name, msg)
-            return self._encoder.encode(response)
+            encoded = self._encoder.encode(response)
+            if cache is not None and is_cacheable(response):
+                cache.put(key, encoded)
+                return self._with_hint(func_name, encoded)
+            return encoded
 
         except ValidationError as exc:
             logging.exception(exc)
@@ -78,12 +261,171 @@ class _Worker:
                 {"__zerror__server_exception": SERVER_PROCESSING_ERROR}
             )
 
+    async def handle_msg_async(
+        self, func: wire.FuncRef, data: wire.Body
+    ) -> Optional[wire.Response]:
+        if _expired():
+            # the caller gave up, don't spend the worker on it
+            return self._encoder.encode(
+                {"__zerror__deadline_exceeded": DEADLINE_EXCEEDED_ERROR}
+            )
+
+        func_name = self._get_func_name(func)
+        if func_name is None:
+            return self._encoder.encode(
+                {"__zerror__function_table_changed": FUNCTION_TABLE_CHANGED_ERROR}
+            )
+
+        if func_name == "__batch__":
+            calls = self._decode_batch(data)
+            if calls is None:
+                return self._encoder.encode({"__zerror__validation_error": BATCH_ERROR})
+            # the calls run concurrently, like separate requests
+            responses = await asyncio.gather(
+                *[self.handle_msg_async(name, msg) for name, msg in calls]
+            )
+            return self._encoder.encode([_response_body(resp) for resp in responses])
+
+        cache = self._response_caches.get(func_name)
+        if cache is not None:
+            key = bytes(data)
+            cached = self._get_cached(func_name, cache, key)
+            if cached is not None:
+                return self._with_hint(func_name, cached)
+
+        options = self._rpc_options_map.get(func_name)
+        limit = options.max_concurrency if options else None
+        if limit is not None:
+            in_flight = self._rpc_in_flight.get(func_name, 0)
+            if in_flight >= limit:
+                logging.warning("Function `%s` is overloaded", func_name)
+                return self._encoder.encode(
+                    {"__zerror__overloaded": SERVER_OVERLOADED_ERROR}
+                )
+            self._rpc_in_flight[func_name] = in_flight + 1
+
+        try:
+            msg = self._decode_msg(func_name, data)
+            response = await self.execute_rpc_async(func_name, msg)
+            encoded = self._encoder.encode(response)
+            if cache is not None and is_cacheable(response):
+                cache.put(key, encoded)
+                return self._with_hint(func_name, encoded)
+            return encoded
+
+        except ValidationError as exc:
+            logging.exception(exc)
+            return self._encoder.encode({"__zerror__validation_error": str(exc)})
+
+        except Exception as inner_exc:  # pylint: disable=broad-except
+            logging.exception(inner_exc)
+            return self._encoder.encode(
+                {"__zerror__server_exception": SERVER_PROCESSING_ERROR}
+            )
+
+        finally:
+            if limit is not None:
+                self._rpc_in_flight[func_name] -= 1
+
+    def _get_func_name(self, func: wire.FuncRef) -> Optional[str]:
+        """
+        Function name from the legacy header, or by index from the compact header.
+        None if the client's function table is not ours.
+        """
+        if isinstance(func, bytes):
+            return func.decode()
+
+        func_id, table_tag = func
+        if table_tag != self._rpc_table_tag or func_id >= len(self._rpc_table):
+            return None
+        return self._rpc_table[func_id]
+
+    def _decode_batch(self, data: wire.Body) -> Optional[List[Tuple[bytes, bytes]]]:
+        """
+        Calls of a batch, `[[function name, encoded message], ...]`,
+        each one is handled like a request of its own.
+        None if the batch is malformed.
+        """
+        try:
+            calls = self._encoder.decode(bytes(data))
+            return [(name.encode(), msg) for name, msg in calls]
+        except Exception:  # pylint: disable=broad-except
+            logging.error("Invalid batch received")
+            return None
+
+    def _with_hint(self, func_name: str, response: bytes) -> wire.Response:
+        hint = self._cache_hints.get(func_name)
+        return response if hint is None else (hint, response)
+
+    def _get_cached(self, func_name: str, cache: Cache, key: bytes) -> Optional[bytes]:
+        if self._cache_state is None:
+            return cache.get(key)
+
+        cached = cache.get(key, self._cache_state.generation(func_name))
+        self._cache_state.record(self._worker_id, func_name, cache.hits, cache.misses)
+        return cached
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Hits and misses of the cached functions, of all the workers
+        if they share the cache state, else of this worker.
+        """
+        stats = {}
+        for name, cache in self._response_caches.items():
+            if self._cache_state is None:
+                hits, misses = cache.hits, cache.misses
+            else:
+                hits, misses = self._cache_state.stats(name)
+            stats[name] = {"hits": hits, "misses": misses}
+        return stats
+
+    def invalidate_cache(self, func_name: Optional[str]) -> List[str]:
+        """
+        Drop the cached responses of a function, or of all of them if None,
+        in this worker and, through the shared generations, in the others.
+        Returns the names of the invalidated functions.
+        """
+        names = [func_name] if func_name else list(self._response_caches)
+        names = [name for name in names if name in self._response_caches]
+        for name in names:
+            self._response_caches[name].clear()
+            if self._cache_state is not None:
+                self._cache_state.bump(name)
+        return names
+
+    def _decode_msg(self, func_name: str, data: wire.Body) -> Any:
+        input_type = self._rpc_input_type_map.get(func_name)
+        if not self._zero_copy:
+            data = bytes(data)
+
+        msg = ""
+        if data:
+            if input_type:
+                msg = self._encoder.decode_type(data, input_type)
+            else:
+                msg = self._encoder.decode(data)
+
+        return msg
+
     def execute_rpc(self, rpc: str, msg: Any):
         if rpc == "get_rpc_contract":
             return self.generate_rpc_contract(msg)
 
         if rpc == "connect":
-            return "connected"
+            # function table for the compact headers, older clients ignore it
+            return self._rpc_table
+
+        if rpc == "__endpoints__":
+            # ports the clients should spread their calls over,
+            # the workers' own ports if they take direct requests, else the brokers'
+            endpoints = self._direct_endpoints or self._broker_endpoints
+            return [int(addr.rsplit(":", 1)[1]) for addr in endpoints]
+
+        if rpc == "__invalidate_cache__":
+            return self.invalidate_cache(msg or None)
+
+        if rpc == "__cache_stats__":
+            return self.cache_stats()
 
         if rpc not in self._rpc_router:
             logging.error("Function `%s` not found!", rpc)
@@ -105,6 +447,37 @@ class _Worker:
 
         return ret
 
+    async def execute_rpc_async(self, rpc: str, msg: Any):
+        """
+        Same as `execute_rpc` but coroutines are awaited on the worker's own loop
+        instead of being shipped to the async runner thread.
+        Sync functions run inline, unless registered with `executor="thread"`,
+        then they run on the worker's thread pool.
+        """
+        if rpc not in self._rpc_router:
+            return self.execute_rpc(rpc, msg)
+
+        func, is_coro = self._rpc_router[rpc]
+        options = self._rpc_options_map.get(rpc)
+        in_thread = not is_coro and options is not None and options.executor == "thread"
+        if not is_coro and not in_thread:
+            return self.execute_rpc(rpc, msg)
+
+        try:
+            args = (msg,) if self._rpc_input_type_map.get(rpc) else ()
+            if is_coro:
+                return await func(*args)
+
+            # copy the context so context variables are visible inside the thread
+            ctx = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(
+                self._thread_pool, partial(ctx.run, func, *args)
+            )
+
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.exception(exc)
+            return {"__zerror__server_exception": repr(exc)}
+
     def generate_rpc_contract(self, msg):
         try:
             return self.codegen.generate_code(msg[0], msg[1])
@@ -122,12 +495,15 @@ class _Worker:
         rpc_input_type_map: dict,
         rpc_return_type_map: dict,
         worker_id: int,
+        **options,
     ) -> None:
         """
         Spawn a worker process.
 
         A class method is used because the worker process is spawned using multiprocessing.Process.
         The class method is used to avoid pickling the class instance (which can lead to errors).
+
+        `options` are passed as is to the worker, like `async_workers`.
         """
         # give some time for the broker to start
         time.sleep(0.2)
@@ -138,5 +514,19 @@ class _Worker:
             encoder,
             rpc_input_type_map,
             rpc_return_type_map,
+            **options,
         )
         worker.start_dealer_worker(worker_id)
+
+
+def _expired() -> bool:
+    # the deadline of the request, set by the zeromq worker, see `zero.utils.deadline`
+    deadline = get_deadline()
+    return deadline is not None and time.time() >= deadline
+
+
+def _response_body(response: Optional[wire.Response]) -> bytes:
+    # responses in a batch carry no cache hint
+    if isinstance(response, tuple):
+        return response[1]
+    return response or b""
@@ -0,0 +1,361 @@
+import hashlib
+import mmap
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .options import CachePolicy, RPCOptions
+
+try:
+    import fcntl
+
+    SHARED_CACHE_SUPPORTED = True
+except ImportError:  # pragma: no cover - windows
+    SHARED_CACHE_SUPPORTED = False
+
+_COUNTER = struct.Struct("Q")
+_STATS = struct.Struct("QQ")
+
+# slot of the shared cache: sequence, key digest, expiry, generation, response length
+# followed by the response
+_SLOT_HEADER = struct.Struct("<Q16sdQI")
+_EMPTY_DIGEST = bytes(16)
+
+
+class ResponseCache:
+    """
+    Encoded responses of a rpc function in a worker, keyed by the request message.
+    Least recently used responses are evicted when full.
+
+    Entries are dropped when the generation passed to `get` changes,
+    that's how an invalidation in one worker reaches the others, see `SharedCacheState`.
+    """
+
+    __slots__ = ["_entries", "_ttl", "_max_entries", "_generation", "hits", "misses"]
+
+    def __init__(self, policy: CachePolicy):
+        # key -> (expiry, response)
+        self._entries: "OrderedDict[bytes, Tuple[float, bytes]]" = OrderedDict()
+        self._ttl = policy.ttl
+        self._max_entries = policy.max_entries
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes, generation: int = 0) -> Optional[bytes]:
+        if generation != self._generation:
+            self.clear()
+            self._generation = generation
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: bytes, response: bytes, ttl: Optional[float] = None) -> None:
+        # ttl of the entry, else of the policy
+        ttl = ttl or self._ttl
+        expiry = float("inf") if ttl is None else time.monotonic() + ttl
+        self._entries[key] = (expiry, response)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedResponseCache:
+    """
+    Encoded responses of a rpc function for all the workers, in a file they all map,
+    so a response cached by one worker is served by the others.
+
+    The file has a fixed number of fixed size slots, a response takes the slot
+    of the hash of its request message, replacing the one there.
+
+    Reads take no lock. Every slot has a sequence number, odd while the slot
+    is written, a read that sees it odd or changed after copying the response
+    is a miss. Writes lock only the bytes of their slot in the file.
+    """
+
+    __slots__ = [
+        "_file",
+        "_map",
+        "_slots",
+        "_slot_size",
+        "_max_response_size",
+        "_ttl",
+        "_generation",
+        "hits",
+        "misses",
+    ]
+
+    def __init__(self, path: str, policy: CachePolicy):
+        self._file = open(path, "r+b")  # pylint: disable=consider-using-with
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._slots = policy.max_entries
+        self._slot_size = _slot_size(policy)
+        self._max_response_size = policy.max_response_size
+        self._ttl = policy.ttl
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def create(path: str, policy: CachePolicy) -> None:
+        with open(path, "wb") as file:
+            file.truncate(_slot_size(policy) * policy.max_entries)
+
+    def get(self, key: bytes, generation: int = 0) -> Optional[bytes]:
+        # entries of other generations are ignored, no need to clear
+        self._generation = generation
+        digest = _digest(key)
+        offset = self._offset(digest)
+
+        seq, slot_digest, expiry, slot_generation, length = _SLOT_HEADER.unpack_from(
+            self._map, offset
+        )
+        if (
+            seq % 2
+            or slot_digest != digest
+            or slot_generation != generation
+            or expiry < time.monotonic()
+        ):
+            self.misses += 1
+            return None
+
+        start = offset + _SLOT_HEADER.size
+        response = self._map[start : start + length]
+        if _COUNTER.unpack_from(self._map, offset)[0] != seq:
+            # written while we were reading
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return response
+
+    def put(self, key: bytes, response: bytes) -> None:
+        if len(response) > self._max_response_size:
+            return
+        digest = _digest(key)
+        expiry = float("inf") if self._ttl is None else time.monotonic() + self._ttl
+        self._write(self._offset(digest), digest, expiry, response)
+
+    def clear(self) -> None:
+        for slot in range(self._slots):
+            self._write(slot * self._slot_size, _EMPTY_DIGEST, 0.0, b"")
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _write(self, offset: int, digest: bytes, expiry: float, response: bytes):
+        fcntl.lockf(self._file, fcntl.LOCK_EX, self._slot_size, offset)
+        try:
+            seq = _COUNTER.unpack_from(self._map, offset)[0]
+            _COUNTER.pack_into(self._map, offset, seq + 1)
+            _SLOT_HEADER.pack_into(
+                self._map,
+                offset,
+                seq + 1,
+                digest,
+                expiry,
+                self._generation,
+                len(response),
+            )
+            start = offset + _SLOT_HEADER.size
+            self._map[start : start + len(response)] = response
+            _COUNTER.pack_into(self._map, offset, seq + 2)
+        finally:
+            fcntl.lockf(self._file, fcntl.LOCK_UN, self._slot_size, offset)
+
+    def _offset(self, digest: bytes) -> int:
+        return (int.from_bytes(digest[:8], "little") % self._slots) * self._slot_size
+
+
+def _digest(key: bytes) -> bytes:
+    # python's `hash` is different in every process
+    return hashlib.blake2b(key, digest_size=16).digest()
+
+
+def _slot_size(policy: CachePolicy) -> int:
+    # 8 bytes aligned, so the sequence numbers are
+    return (_SLOT_HEADER.size + policy.max_response_size + 7) // 8 * 8
+
+
+Cache = Union[ResponseCache, SharedResponseCache]
+
+
+class ClientCache:
+    """
+    Encoded responses on the client, per rpc function, keyed by the request message.
+
+    The functions with a policy are cached by it. With `hints`, the responses
+    of the other functions are cached for the seconds the server sent with them,
+    see `CachePolicy.client_ttl`.
+
+    Clients are shared by threads, so the caches are behind a lock.
+    """
+
+    __slots__ = ["_policies", "_hints", "_caches", "_lock"]
+
+    def __init__(self, policies: Dict[str, CachePolicy], hints: bool = False):
+        self._policies = policies
+        self._hints = hints
+        self._caches: Dict[str, ResponseCache] = {
+            name: ResponseCache(policy) for name, policy in policies.items()
+        }
+        self._lock = threading.Lock()
+
+    def get(self, func_name: str, key: bytes) -> Optional[bytes]:
+        cache = self._caches.get(func_name)
+        if cache is None:
+            return None
+        with self._lock:
+            return cache.get(key)
+
+    def put(
+        self, func_name: str, key: bytes, response: bytes, hint: Optional[float]
+    ) -> None:
+        if func_name in self._policies:
+            hint = None
+        elif not (self._hints and hint):
+            return
+
+        with self._lock:
+            cache = self._caches.get(func_name)
+            if cache is None:
+                cache = self._caches[func_name] = ResponseCache(CachePolicy())
+            cache.put(key, response, hint)
+
+    def clear(self, func_name: Optional[str] = None) -> None:
+        with self._lock:
+            for name, cache in self._caches.items():
+                if func_name is None or name == func_name:
+                    cache.clear()
+
+
+def is_cacheable(response: Any) -> bool:
+    # errors are returned as `{"__zerror__<kind>": message}`, and never cached
+    return not (
+        isinstance(response, dict)
+        and len(response) == 1
+        and str(next(iter(response))).startswith("__zerror__")
+    )
+
+
+class SharedCacheState:
+    """
+    Cache state shared by all the workers, in a file they all map.
+
+    A generation counter per cached function: invalidating a function bumps it,
+    and every worker drops its cached responses of the function on the next lookup.
+    Concurrent bumps might be lost, but the counter still changes,
+    which is all the workers look at.
+
+    Hit and miss counters per worker and function, each worker only writes its own,
+    so `stats` adds them up for the whole server. A worker that replaces another
+    one of the same worker id starts from its `recorded` counters.
+
+    Layout, 8 bytes per counter:
+
+        generation * functions | (hits, misses) * functions * workers
+    """
+
+    __slots__ = ["_map", "_slots", "_workers"]
+
+    def __init__(self, path: str, func_names: List[str], workers: int):
+        with open(path, "r+b") as file:
+            self._map = mmap.mmap(file.fileno(), 0)
+        self._slots = {name: idx for idx, name in enumerate(func_names)}
+        self._workers = workers
+
+    @staticmethod
+    def create(path: str, func_names: List[str], workers: int) -> None:
+        with open(path, "wb") as file:
+            file.write(bytes(_COUNTER.size * _counters(len(func_names), workers)))
+
+    def generation(self, func_name: str) -> int:
+        return _COUNTER.unpack_from(self._map, self._offset(func_name))[0]
+
+    def bump(self, func_name: str) -> None:
+        offset = self._offset(func_name)
+        generation = _COUNTER.unpack_from(self._map, offset)[0]
+        _COUNTER.pack_into(self._map, offset, generation + 1)
+
+    def record(self, worker_id: int, func_name: str, hits: int, misses: int) -> None:
+        _STATS.pack_into(
+            self._map, self._stats_offset(worker_id, func_name), hits, misses
+        )
+
+    def recorded(self, worker_id: int, func_name: str) -> Tuple[int, int]:
+        return _STATS.unpack_from(self._map, self._stats_offset(worker_id, func_name))
+
+    def stats(self, func_name: str) -> Tuple[int, int]:
+        hits = misses = 0
+        for worker_id in range(1, self._workers + 1):
+            worker_hits, worker_misses = _STATS.unpack_from(
+                self._map, self._stats_offset(worker_id, func_name)
+            )
+            hits += worker_hits
+            misses += worker_misses
+        return hits, misses
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _offset(self, func_name: str) -> int:
+        return self._slots[func_name] * _COUNTER.size
+
+    def _stats_offset(self, worker_id: int, func_name: str) -> int:
+        funcs = len(self._slots)
+        idx = funcs + ((worker_id - 1) * funcs + self._slots[func_name]) * 2
+        return idx * _COUNTER.size
+
+
+def _counters(funcs: int, workers: int) -> int:
+    return max(funcs + funcs * workers * 2, 1)
+
+
+def cached_functions(rpc_options_map: Dict[str, RPCOptions]) -> List[str]:
+    return [name for name, options in rpc_options_map.items() if options.cache]
+
+
+def create_shared_caches(
+    cache_path: str, rpc_options_map: Dict[str, RPCOptions]
+) -> List[str]:
+    """
+    Create the files of the shared caches, next to the cache state.
+    Returns their paths.
+    """
+    if not SHARED_CACHE_SUPPORTED:
+        return []
+    paths = []
+    for name in cached_functions(rpc_options_map):
+        policy: CachePolicy = rpc_options_map[name].cache  # type: ignore
+        if policy.shared:
+            path = _shared_cache_path(cache_path, name)
+            SharedResponseCache.create(path, policy)
+            paths.append(path)
+    return paths
+
+
+def open_cache(
+    func_name: str, policy: CachePolicy, cache_path: Optional[str]
+) -> "Cache":
+    if policy.shared and cache_path and SHARED_CACHE_SUPPORTED:
+        return SharedResponseCache(_shared_cache_path(cache_path, func_name), policy)
+    return ResponseCache(policy)
+
+
+def _shared_cache_path(cache_path: str, func_name: str) -> str:
+    return f"{cache_path}.{func_name}"
@@ -1,9 +1,31 @@
-from typing import TYPE_CHECKING, Optional, Type, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from zero import config
 from zero.encoder import Encoder
 from zero.encoder.generic import GenericEncoder
-from zero.error import MethodNotFoundException, RemoteException, ValidationException
+from zero.error import (
+    FunctionTableChangedException,
+    MethodNotFoundException,
+    OverloadedException,
+    RemoteException,
+    TimeoutException,
+    ValidationException,
+    ZeroException,
+)
+from zero.rpc.cache import ClientCache
+from zero.rpc.hedging import Hedger
+from zero.rpc.options import CachePolicy, Hedging, LoadBalancing, verify_priority
 from zero.utils.type_util import AllowedType
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -20,6 +42,11 @@ class ZeroClient:
         default_timeout: int = 2000,
         encoder: Optional[Encoder] = None,
         protocol: str = "zeromq",
+        cache: Optional[Dict[str, CachePolicy]] = None,
+        cache_hints: bool = False,
+        connections: int = 1,
+        endpoints: Optional[List[Tuple[str, int]]] = None,
+        balancing: Optional[LoadBalancing] = None,
     ):
         """
         ZeroClient provides the client interface for calling the ZeroServer.
@@ -54,7 +81,38 @@ class ZeroClient:
             Protocol to use for communication.
             Default is zeromq.
             If any other protocol is used, make sure the server should use the same protocol.
+
+        cache: Optional[Dict[str, CachePolicy]]
+            Cache the responses of these functions on the client, by the message,
+            so the same call doesn't go to the server again until the ttl expires.
+            Only for functions whose result depends only on the message.
+            Error responses are not cached.
+
+        cache_hints: bool
+            Also cache the responses of the other functions, if the server
+            sends how long they may be cached, see `CachePolicy.client_ttl`.
+            Default is False.
+
+        connections: int
+            Sockets to the server per thread, calls are striped over them
+            round robin, each served by its own zeromq I/O thread.
+            More than 1 raises the throughput of one busy client against
+            a server with many workers. Default is 1.
+
+        endpoints: Optional[List[Tuple[str, int]]]
+            Other servers with the same functions, as (host, port).
+            The client connects to all of them and to `host` and `port`,
+            and spreads the calls over them by the `balancing`.
+
+        balancing: Optional[LoadBalancing]
+            How the calls are spread over the servers, and when a server
+            that times out is ejected. Default is `LoadBalancing()`, round robin.
         """
+        if connections < 1:
+            raise ValueError(f"connections should be at least 1; not {connections}")
+        if balancing is not None and not isinstance(balancing, LoadBalancing):
+            raise ValueError(f"balancing should be a LoadBalancing; not {balancing}")
+
         self._address = f"tcp://{host}:{port}"
         self._default_timeout = default_timeout
         self._encoder = encoder or GenericEncoder()
@@ -62,6 +120,10 @@ class ZeroClient:
             self._address,
             self._default_timeout,
             self._encoder,
+            cache=_client_cache(cache, cache_hints),
+            connections=connections,
+            servers=[f"tcp://{host}:{port}" for host, port in endpoints or ()],
+            balancing=balancing,
         )
 
     def _determine_client_cls(self, protocol: str) -> Type["ZeroClientProtocol"]:
@@ -84,6 +146,7 @@ class ZeroClient:
         msg: AllowedType,
         timeout: Optional[int] = None,
         return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
     ) -> T:
         """
         Call the rpc function resides on the ZeroServer.
@@ -106,6 +169,11 @@ class ZeroClient:
             The return type of the rpc function.
             If return_type is set, the response will be parsed to the return_type.
 
+        priority: Optional[int]
+            Priority of the call, from 0 to 9, instead of the one its function
+            is registered with. The waiting calls of the higher priorities
+            are sent to the workers first, only by the "lru" server pattern.
+
         Returns
         -------
         T
@@ -120,20 +188,147 @@ class ZeroClient:
         MethodNotFoundException
             If the rpc function is not found on the ZeroServer.
 
+        OverloadedException
+            If the rpc function is at its concurrency limit on the ZeroServer.
+            The call was not executed, so it is safe to retry.
+
+        FunctionTableChangedException
+            If the server's functions changed again while the client refreshed
+            its function table. The call was not executed.
+
         ConnectionException
             If zeromq connection is not established.
             Or zeromq cannot send the message to the server.
             Or zeromq cannot receive the response from the server.
             Mainly represents zmq.error.Again exception.
         """
-        resp_data = self._client_inst.call(rpc_func_name, msg, timeout, return_type)
+        verify_priority(priority)
+        resp_data = self._client_inst.call(
+            rpc_func_name, msg, timeout, return_type, priority
+        )
         check_response(resp_data)
         return resp_data  # type: ignore
 
+    def call_many(
+        self,
+        calls: List[Tuple[str, AllowedType]],
+        timeout: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        Call many rpc functions of the ZeroServer in one request.
+
+        The calls are sent in one message and their responses come back in one,
+        so the per request overhead is paid once for all of them.
+        The server handles every call as if it came alone, async workers
+        run them concurrently. The client cache is not used.
+
+        Parameters
+        ----------
+        calls: List[Tuple[str, Union[int, float, str, dict, list, tuple, None]]]
+            Function name and message of every call.
+
+        timeout: Optional[int]
+            Timeout for the whole batch. In milliseconds.
+            Default is 2000 milliseconds.
+
+        return_exceptions: bool
+            If True, the error of a call is returned in its place
+            instead of being raised. Default is False.
+
+        Returns
+        -------
+        List[Any]
+            The return values of the calls, in the same order.
+
+        Raises
+        ------
+        TimeoutException
+            If the batch times out or the connection is dropped.
+
+        MethodNotFoundException, RemoteException, ValidationException, OverloadedException
+            The error of the first failed call, unless `return_exceptions` is True.
+            ValidationException also if the server cannot read the batch.
+        """
+        resp_data = self._client_inst.call_many(calls, timeout)
+        check_response(resp_data)
+        return _batch_results(resp_data, return_exceptions)
+
+    def submit(
+        self,
+        rpc_func_name: str,
+        msg: AllowedType,
+        timeout: Optional[int] = None,
+        return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
+    ) -> "CallHandle[T]":
+        """
+        Send a call to the ZeroServer without waiting for its response.
+
+        Many calls can be in flight on the same connection, the responses
+        are kept as they come until their handles take them.
+        Call `result` of the handle on the same thread, the connection is of the thread.
+
+        Parameters are the same as of `call`, the timeout is counted from the submit.
+
+        Returns
+        -------
+        CallHandle[T]
+            `result()` waits for the response and returns it like `call`.
+
+        Raises
+        ------
+        ConnectionException
+            If zeromq cannot send the message to the server.
+        """
+        verify_priority(priority)
+        return CallHandle(
+            self._client_inst.submit(rpc_func_name, msg, timeout, return_type, priority)
+        )
+
+    def invalidate_cache(self, rpc_func_name: Optional[str] = None):
+        """
+        Drop the responses cached on the client for a function,
+        or for all of them if None.
+        """
+        self._client_inst.invalidate_cache(rpc_func_name)
+
     def close(self):
         self._client_inst.close()
 
 
+class CallHandle(Generic[T]):
+    """
+    A call sent by `ZeroClient.submit`.
+    """
+
+    __slots__ = ["_resolve", "_done", "_result", "_exc"]
+
+    def __init__(self, resolve: Callable[[], Any]):
+        self._resolve = resolve
+        self._done = False
+        self._result: Any = None
+        self._exc: Optional[Exception] = None
+
+    def result(self) -> T:
+        """
+        Wait for the response and return it, or raise its error,
+        the same as `ZeroClient.call`. Later calls return the same.
+        """
+        if not self._done:
+            try:
+                resp_data = self._resolve()
+                check_response(resp_data)
+                self._result = resp_data
+            except ZeroException as exc:
+                self._exc = exc
+            self._done = True
+
+        if self._exc is not None:
+            raise self._exc
+        return self._result
+
+
 class AsyncZeroClient:
     def __init__(
         self,
@@ -142,6 +337,14 @@ class AsyncZeroClient:
         default_timeout: int = 2000,
         encoder: Optional[Encoder] = None,
         protocol: str = "zeromq",
+        coalesce: bool = False,
+        cache: Optional[Dict[str, CachePolicy]] = None,
+        cache_hints: bool = False,
+        connections: int = 1,
+        endpoints: Optional[List[Tuple[str, int]]] = None,
+        balancing: Optional[LoadBalancing] = None,
+        hedging: Optional[Dict[str, Hedging]] = None,
+        hedge_budget: float = 0.1,
     ):
         """
         AsyncZeroClient provides the asynchronous client interface for calling the ZeroServer.
@@ -179,7 +382,60 @@ class AsyncZeroClient:
             Protocol to use for communication.
             Default is zeromq.
             If any other protocol is used, the server should use the same protocol.
+
+        coalesce: bool
+            Identical calls, same function and message, made while one of them
+            is in flight share its request instead of sending their own.
+            Useful when many coroutines ask for the same data at once,
+            like on a cache miss. Only for functions whose result
+            depends only on the message. Default is False.
+
+        cache: Optional[Dict[str, CachePolicy]]
+            Cache the responses of these functions on the client, by the message,
+            so the same call doesn't go to the server again until the ttl expires.
+            Only for functions whose result depends only on the message.
+            Error responses are not cached.
+
+        cache_hints: bool
+            Also cache the responses of the other functions, if the server
+            sends how long they may be cached, see `CachePolicy.client_ttl`.
+            Default is False.
+
+        connections: int
+            Sockets to the server per thread, calls are striped over them
+            round robin, each served by its own zeromq I/O thread.
+            More than 1 raises the throughput of one busy client against
+            a server with many workers. Default is 1.
+
+        endpoints: Optional[List[Tuple[str, int]]]
+            Other servers with the same functions, as (host, port).
+            The client connects to all of them and to `host` and `port`,
+            and spreads the calls over them by the `balancing`.
+
+        balancing: Optional[LoadBalancing]
+            How the calls are spread over the servers, and when a server
+            that times out is ejected. Default is `LoadBalancing()`, round robin.
+
+        hedging: Optional[Dict[str, Hedging]]
+            Hedge the calls of these functions: if the response doesn't come
+            within the delay of the `Hedging`, the call is sent again on the next
+            connection, and the first response is taken.
+            Only for idempotent functions, they may run twice.
+
+        hedge_budget: float
+            Hedged calls at most, as a fraction of the calls of the hedged
+            functions, so a slow server doesn't get twice the load.
+            Default is 0.1.
         """
+        if connections < 1:
+            raise ValueError(f"connections should be at least 1; not {connections}")
+        if balancing is not None and not isinstance(balancing, LoadBalancing):
+            raise ValueError(f"balancing should be a LoadBalancing; not {balancing}")
+        if not 0 <= hedge_budget <= 1:
+            raise ValueError(
+                f"hedge_budget should be between 0 and 1; not {hedge_budget}"
+            )
+
         self._address = f"tcp://{host}:{port}"
         self._default_timeout = default_timeout
         self._encoder = encoder or GenericEncoder()
@@ -189,6 +445,12 @@ class AsyncZeroClient:
             self._address,
             self._default_timeout,
             self._encoder,
+            coalesce=coalesce,
+            cache=_client_cache(cache, cache_hints),
+            connections=connections,
+            servers=[f"tcp://{host}:{port}" for host, port in endpoints or ()],
+            balancing=balancing,
+            hedger=Hedger(hedging, hedge_budget) if hedging else None,
         )
 
     def _determine_client_cls(self, protocol: str) -> Type["AsyncZeroClientProtocol"]:
@@ -211,6 +473,7 @@ class AsyncZeroClient:
         msg: AllowedType,
         timeout: Optional[int] = None,
         return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
     ) -> Optional[T]:
         """
         Call the rpc function resides on the ZeroServer.
@@ -233,6 +496,11 @@ class AsyncZeroClient:
             The return type of the rpc function.
             If return_type is set, the response will be parsed to the return_type.
 
+        priority: Optional[int]
+            Priority of the call, from 0 to 9, instead of the one its function
+            is registered with. The waiting calls of the higher priorities
+            are sent to the workers first, only by the "lru" server pattern.
+
         Returns
         -------
         T
@@ -247,28 +515,124 @@ class AsyncZeroClient:
         MethodNotFoundException
             If the rpc function is not found on the ZeroServer.
 
+        OverloadedException
+            If the rpc function is at its concurrency limit on the ZeroServer.
+            The call was not executed, so it is safe to retry.
+
+        FunctionTableChangedException
+            If the server's functions changed again while the client refreshed
+            its function table. The call was not executed.
+
         ConnectionException
             If zeromq connection is not established.
             Or zeromq cannot send the message to the server.
             Or zeromq cannot receive the response from the server.
             Mainly represents zmq.error.Again exception.
         """
+        verify_priority(priority)
         _timeout = timeout or self._default_timeout
         resp_data = await self._client_inst.call(
-            rpc_func_name, msg, _timeout, return_type
+            rpc_func_name, msg, _timeout, return_type, priority
         )
         check_response(resp_data)
         return resp_data
 
+    async def call_many(
+        self,
+        calls: List[Tuple[str, AllowedType]],
+        timeout: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        Call many rpc functions of the ZeroServer in one request.
+
+        The calls are sent in one message and their responses come back in one,
+        so the per request overhead is paid once for all of them.
+        The server handles every call as if it came alone, async workers
+        run them concurrently. The client cache is not used.
+
+        Parameters
+        ----------
+        calls: List[Tuple[str, Union[int, float, str, dict, list, tuple, None]]]
+            Function name and message of every call.
+
+        timeout: Optional[int]
+            Timeout for the whole batch. In milliseconds.
+            Default is 2000 milliseconds.
+
+        return_exceptions: bool
+            If True, the error of a call is returned in its place
+            instead of being raised. Default is False.
+
+        Returns
+        -------
+        List[Any]
+            The return values of the calls, in the same order.
+
+        Raises
+        ------
+        TimeoutException
+            If the batch times out or the connection is dropped.
+
+        MethodNotFoundException, RemoteException, ValidationException, OverloadedException
+            The error of the first failed call, unless `return_exceptions` is True.
+            ValidationException also if the server cannot read the batch.
+        """
+        _timeout = timeout or self._default_timeout
+        resp_data = await self._client_inst.call_many(calls, _timeout)
+        check_response(resp_data)
+        return _batch_results(resp_data, return_exceptions)
+
+    def invalidate_cache(self, rpc_func_name: Optional[str] = None):
+        """
+        Drop the responses cached on the client for a function,
+        or for all of them if None.
+        """
+        self._client_inst.invalidate_cache(rpc_func_name)
+
     def close(self):
         self._client_inst.close()
 
 
+def _client_cache(
+    policies: Optional[Dict[str, CachePolicy]], hints: bool
+) -> Optional[ClientCache]:
+    if not policies and not hints:
+        return None
+    return ClientCache(policies or {}, hints)
+
+
+def _batch_results(responses: List[Any], return_exceptions: bool) -> List[Any]:
+    results = []
+    for resp_data in responses:
+        exc = _response_error(resp_data)
+        if exc is None:
+            results.append(resp_data)
+        elif return_exceptions:
+            results.append(exc)
+        else:
+            raise exc
+    return results
+
+
 def check_response(resp_data):
+    exc = _response_error(resp_data)
+    if exc is not None:
+        raise exc
+
+
+def _response_error(resp_data) -> Optional[ZeroException]:
     if isinstance(resp_data, dict):
         if exc := resp_data.get("__zerror__function_not_found"):
-            raise MethodNotFoundException(exc)
+            return MethodNotFoundException(exc)
         if exc := resp_data.get("__zerror__server_exception"):
-            raise RemoteException(exc)
+            return RemoteException(exc)
         if exc := resp_data.get("__zerror__validation_error"):
-            raise ValidationException(exc)
+            return ValidationException(exc)
+        if exc := resp_data.get("__zerror__overloaded"):
+            return OverloadedException(exc)
+        if exc := resp_data.get("__zerror__function_table_changed"):
+            return FunctionTableChangedException(exc)
+        if exc := resp_data.get("__zerror__deadline_exceeded"):
+            return TimeoutException(exc)
+    return None
@@ -0,0 +1,78 @@
+import collections
+from typing import Deque, Dict, Optional
+
+from .options import Hedging
+
+# latencies kept per function, to learn the delay from
+LATENCY_WINDOW = 256
+# latencies needed before a learned delay is used
+MIN_LATENCIES = 20
+# the learned delay is recomputed every this many latencies
+RECOMPUTE_EVERY = 16
+# hedges that can be saved up, so a burst of slow calls can be hedged
+MAX_HEDGE_TOKENS = 10
+
+
+class Hedger:
+    """
+    When to hedge the calls of the functions with a `Hedging`,
+    and whether the budget allows another hedge.
+
+    The budget is a token bucket, every call of a hedged function earns
+    `budget` tokens and a hedge takes one, so the hedges are at most
+    that fraction of the calls, after a first burst of `MAX_HEDGE_TOKENS`.
+    """
+
+    __slots__ = [
+        "_policies",
+        "_budget",
+        "_tokens",
+        "_latencies",
+        "_recorded",
+        "_delays",
+    ]
+
+    def __init__(self, policies: Dict[str, Hedging], budget: float):
+        self._policies = policies
+        self._budget = budget
+        self._tokens = float(MAX_HEDGE_TOKENS) if budget else 0.0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._recorded: Dict[str, int] = {}
+        # learned delays in seconds
+        self._delays: Dict[str, float] = {}
+
+    def policy(self, func_name: str) -> Optional[Hedging]:
+        return self._policies.get(func_name)
+
+    def delay(self, func_name: str, policy: Hedging) -> Optional[float]:
+        """
+        Seconds to wait for the response before hedging,
+        None while the latencies to learn it from are too few.
+        """
+        if policy.after is not None:
+            return policy.after / 1000
+        return self._delays.get(func_name)
+
+    def record(self, func_name: str, policy: Hedging, seconds: float) -> None:
+        window = self._latencies.get(func_name)
+        if window is None:
+            window = self._latencies[func_name] = collections.deque(
+                maxlen=LATENCY_WINDOW
+            )
+        window.append(seconds)
+
+        recorded = self._recorded.get(func_name, 0) + 1
+        self._recorded[func_name] = recorded
+        if len(window) >= MIN_LATENCIES and recorded % RECOMPUTE_EVERY == 0:
+            latencies = sorted(window)
+            idx = min(int(len(latencies) * policy.percentile / 100), len(latencies) - 1)
+            self._delays[func_name] = latencies[idx]
+
+    def earn(self) -> None:
+        self._tokens = min(self._tokens + self._budget, MAX_HEDGE_TOKENS)
+
+    def spend(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
@@ -0,0 +1,184 @@
+from typing import Optional
+
+from zero.zeromq_patterns.wire import DEFAULT_POOL, DEFAULT_PRIORITY, MAX_PRIORITY
+
+EXECUTORS = ("thread",)
+
+BALANCING_STRATEGIES = ("round_robin", "least_outstanding", "power_of_two")
+
+
+class CachePolicy:
+    """
+    Caching of the responses of a rpc function, set through `ZeroServer.register_rpc`,
+    or on the client, through the `cache` of `ZeroClient` and `AsyncZeroClient`.
+
+    The encoded responses are cached by the request message,
+    so use it for functions whose result depends only on the message.
+
+    Parameters
+    ----------
+    ttl: Optional[float]
+        Seconds a response is served from the cache. By default until evicted.
+
+    max_entries: int
+        Maximum number of responses cached per worker,
+        the least recently used ones are evicted. Default is 1024.
+
+    shared: bool
+        Keep the responses in shared memory, one cache for all the workers,
+        so a response cached by one worker is served by all of them.
+        It has `max_entries` slots, a response takes the slot of its message's hash
+        and replaces the one there. Only on posix, else each worker has its own.
+
+    max_response_size: int
+        Size of a slot of the shared cache in bytes,
+        larger responses are not cached. Default is 4096.
+
+    client_ttl: Optional[float]
+        Seconds the clients may cache the response, sent to them with it.
+        Only the clients created with `cache_hints=True` cache it. By default not sent.
+
+    The clients use only `ttl` and `max_entries`.
+    """
+
+    __slots__ = ["ttl", "max_entries", "shared", "max_response_size", "client_ttl"]
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_entries: int = 1024,
+        shared: bool = False,
+        max_response_size: int = 4096,
+        client_ttl: Optional[float] = None,
+    ):
+        for name, seconds in (("ttl", ttl), ("client_ttl", client_ttl)):
+            if seconds is not None and (
+                not isinstance(seconds, (int, float)) or seconds <= 0
+            ):
+                raise ValueError(f"{name} should be a positive number; not {seconds}")
+        for name, value in (
+            ("max_entries", max_entries),
+            ("max_response_size", max_response_size),
+        ):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(f"{name} should be a positive integer; not {value}")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self.max_response_size = max_response_size
+        self.client_ttl = client_ttl
+
+
+class LoadBalancing:
+    """
+    Spreading of the calls over the servers of a client,
+    set through the `balancing` of `ZeroClient` and `AsyncZeroClient`.
+
+    Parameters
+    ----------
+    strategy: str
+        How the connection of a call is picked among the connections of the thread.
+        "round_robin" takes them in turn.
+        "least_outstanding" takes the one with the fewest calls in flight.
+        "power_of_two" takes the one with fewer calls in flight of two random ones,
+        nearly as good as "least_outstanding" without looking at all of them.
+        Default is "round_robin".
+
+    max_timeouts: int
+        Consecutive timeouts after which a server is ejected. Default is 3.
+
+    ejection_time: float
+        Seconds an ejected server gets no calls. After that it gets them again,
+        and is ejected again by its next timeout. Default is 10.
+
+    If all the servers are ejected, the calls go to all of them.
+    """
+
+    __slots__ = ["strategy", "max_timeouts", "ejection_time"]
+
+    def __init__(
+        self,
+        strategy: str = "round_robin",
+        max_timeouts: int = 3,
+        ejection_time: float = 10.0,
+    ):
+        if strategy not in BALANCING_STRATEGIES:
+            raise ValueError(
+                f"strategy should be one of {BALANCING_STRATEGIES}; not {strategy}"
+            )
+        if not isinstance(max_timeouts, int) or max_timeouts < 1:
+            raise ValueError(
+                f"max_timeouts should be a positive integer; not {max_timeouts}"
+            )
+        if not isinstance(ejection_time, (int, float)) or ejection_time <= 0:
+            raise ValueError(
+                f"ejection_time should be a positive number; not {ejection_time}"
+            )
+        self.strategy = strategy
+        self.max_timeouts = max_timeouts
+        self.ejection_time = ejection_time
+
+
+class Hedging:
+    """
+    Hedging of the calls of an idempotent rpc function,
+    set through the `hedging` of `AsyncZeroClient`.
+
+    If the response of a call doesn't come within a delay, the call is sent
+    again on the next connection, and the first response is taken.
+    The extra calls are limited by the client's `hedge_budget`.
+
+    Parameters
+    ----------
+    after: Optional[int]
+        Milliseconds to wait for the response before hedging. By default the
+        `percentile` of the function's recent latencies, learned from its calls,
+        so the calls are not hedged until enough of them are made.
+
+    percentile: float
+        Percentile of the recent latencies to wait, when `after` is not set.
+        Default is 95.
+    """
+
+    __slots__ = ["after", "percentile"]
+
+    def __init__(self, after: Optional[int] = None, percentile: float = 95.0):
+        if after is not None and (not isinstance(after, int) or after < 1):
+            raise ValueError(f"after should be a positive integer; not {after}")
+        if not isinstance(percentile, (int, float)) or not 0 < percentile < 100:
+            raise ValueError(
+                f"percentile should be between 0 and 100; not {percentile}"
+            )
+        self.after = after
+        self.percentile = percentile
+
+
+class RPCOptions:
+    """
+    Per rpc function options, set through `ZeroServer.register_rpc`.
+    """
+
+    __slots__ = ["max_concurrency", "executor", "cache", "priority", "pool"]
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        executor: Optional[str] = None,
+        cache: Optional[CachePolicy] = None,
+        priority: int = DEFAULT_PRIORITY,
+        pool: str = DEFAULT_POOL,
+    ):
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.cache = cache
+        self.priority = priority
+        self.pool = pool
+
+
+def verify_priority(priority: Optional[int]) -> None:
+    if priority is not None and (
+        not isinstance(priority, int) or not 0 <= priority <= MAX_PRIORITY
+    ):
+        raise ValueError(
+            f"priority should be an integer from 0 to {MAX_PRIORITY}; not {priority}"
+        )
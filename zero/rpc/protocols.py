@@ -1,6 +1,8 @@
 from typing import (
+    Any,
     Callable,
     Dict,
+    List,
     Optional,
     Protocol,
     Tuple,
@@ -10,6 +12,9 @@ from typing import (
 )
 
 from zero.encoder import Encoder
+from zero.rpc.cache import ClientCache
+from zero.rpc.hedging import Hedger
+from zero.rpc.options import LoadBalancing, RPCOptions
 from zero.utils.type_util import AllowedType
 
 T = TypeVar("T")
@@ -25,10 +30,24 @@ class ZeroServerProtocol(Protocol):
         rpc_return_type_map: Dict[str, Optional[type]],
         encoder: Encoder,
         use_threads: bool,
+        rpc_options_map: Optional[Dict[str, RPCOptions]] = None,
     ):
         ...
 
-    def start(self, workers: int):
+    def start(
+        self,
+        workers: int,
+        async_workers: bool = False,
+        max_concurrency: Optional[int] = None,
+        thread_pool_size: Optional[int] = None,
+        direct_connect: bool = False,
+        broker_threads: int = 1,
+        pools: Optional[Dict[str, int]] = None,
+        min_workers: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_requests_per_worker: Optional[int] = None,
+        max_worker_rss_mb: Optional[int] = None,
+    ):
         ...
 
     def stop(self):
@@ -42,6 +61,10 @@ class ZeroClientProtocol(Protocol):
         address: str,
         default_timeout: int,
         encoder: Encoder,
+        cache: Optional[ClientCache] = None,
+        connections: int = 1,
+        servers: Optional[List[str]] = None,
+        balancing: Optional[LoadBalancing] = None,
     ):
         ...
 
@@ -51,9 +74,28 @@ class ZeroClientProtocol(Protocol):
         msg: AllowedType,
         timeout: Optional[int] = None,
         return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
     ) -> Optional[T]:
         ...
 
+    def call_many(
+        self, calls: List[Tuple[str, AllowedType]], timeout: Optional[int] = None
+    ) -> Any:
+        ...
+
+    def submit(
+        self,
+        rpc_func_name: str,
+        msg: AllowedType,
+        timeout: Optional[int] = None,
+        return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
+    ) -> Callable[[], Optional[T]]:
+        ...
+
+    def invalidate_cache(self, rpc_func_name: Optional[str] = None) -> None:
+        ...
+
     def close(self):
         ...
 
@@ -65,6 +107,12 @@ class AsyncZeroClientProtocol(Protocol):
         address: str,
         default_timeout: int,
         encoder: Encoder,
+        coalesce: bool = False,
+        cache: Optional[ClientCache] = None,
+        connections: int = 1,
+        servers: Optional[List[str]] = None,
+        balancing: Optional[LoadBalancing] = None,
+        hedger: Optional[Hedger] = None,
     ):
         ...
 
@@ -74,8 +122,17 @@ class AsyncZeroClientProtocol(Protocol):
         msg: AllowedType,
         timeout: Optional[int] = None,
         return_type: Optional[Type[T]] = None,
+        priority: Optional[int] = None,
     ) -> Optional[T]:
         ...
 
+    async def call_many(
+        self, calls: List[Tuple[str, AllowedType]], timeout: Optional[int] = None
+    ) -> Any:
+        ...
+
+    def invalidate_cache(self, rpc_func_name: Optional[str] = None) -> None:
+        ...
+
     def close(self):
         ...
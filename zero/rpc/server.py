@@ -1,6 +1,7 @@
 import logging
 import os
 from asyncio import iscoroutinefunction
+from functools import partial
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -17,6 +18,9 @@ from zero import config
 from zero.encoder import Encoder
 from zero.encoder.generic import GenericEncoder
 from zero.utils import type_util
+from zero.zeromq_patterns.wire import DEFAULT_POOL, DEFAULT_PRIORITY
+
+from .options import EXECUTORS, CachePolicy, RPCOptions, verify_priority
 
 if TYPE_CHECKING:  # pragma: no cover
     from .protocols import ZeroServerProtocol
@@ -80,6 +84,9 @@ class ZeroServer:
         self._rpc_input_type_map: Dict[str, Optional[type]] = {}
         self._rpc_return_type_map: Dict[str, Optional[type]] = {}
 
+        # Stores rpc functions options given at registration
+        self._rpc_options_map: Dict[str, RPCOptions] = {}
+
         self._server_inst: "ZeroServerProtocol" = self._determine_server_cls(protocol)(
             self._address,
             self._rpc_router,
@@ -87,6 +94,7 @@ class ZeroServer:
             self._rpc_return_type_map,
             self._encoder,
             self._use_threads,
+            self._rpc_options_map,
         )
 
     def _determine_server_cls(self, protocol: str) -> Type["ZeroServerProtocol"]:
@@ -103,34 +111,133 @@ class ZeroServer:
             )
         return server_cls
 
-    def register_rpc(self, func: Callable[..., Union[Any, Coroutine]]):
+    def register_rpc(
+        self,
+        func: Optional[Callable[..., Union[Any, Coroutine]]] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        executor: Optional[str] = None,
+        cache: Optional[CachePolicy] = None,
+        priority: int = DEFAULT_PRIORITY,
+        pool: str = DEFAULT_POOL,
+    ):
         """
         Register a function available for clients.
         Function should have a single argument.
         Argument and return should have a type hint.
 
+        Can be used as `@app.register_rpc` or with options,
+        like `@app.register_rpc(max_concurrency=10)`.
+
         Parameters
         ----------
         func: Callable
             RPC function.
+
+        max_concurrency: Optional[int]
+            Maximum number of in-flight calls of this function in a worker.
+            Calls over the limit are rejected with an overload error,
+            raised as `OverloadedException` on the client.
+            Only for `async_workers`, as sync workers run one call at a time,
+            `run` raises ValueError without them.
+
+        executor: Optional[str]
+            Where to run a sync function in async workers.
+            By default it runs inline and blocks the worker's loop while running.
+            Use "thread" for blocking functions, to run them on the worker's thread pool
+            while the worker keeps serving other requests.
+            Only for `async_workers`, `run` raises ValueError without them.
+
+        cache: Optional[CachePolicy]
+            Cache the encoded responses by the request message,
+            like `cache=CachePolicy(ttl=60)`. A cached call skips the decoding,
+            the function and the encoding. Errors are not cached.
+            Use it for functions whose result depends only on the message.
+            Cached responses are dropped on every worker with the reserved
+            `__invalidate_cache__` function, it takes the function name,
+            or None for all the cached functions, like
+            `client.call("__invalidate_cache__", "get_user")`.
+            The hits and misses of all the workers are returned by
+            the reserved `__cache_stats__` function.
+            By default each worker caches its own responses,
+            `CachePolicy(shared=True)` keeps one cache in shared memory for all of them.
+
+        priority: int
+            Priority of the calls of this function, from 0 to 9.
+            When all the workers are busy, the waiting calls of the higher
+            priorities are sent to the workers first, so latency critical
+            functions don't wait behind bulk ones. A client can also send a call
+            with its own priority, `call(..., priority=...)`.
+            The `connect` handshake and the server info are always 9.
+            Only with `config.ZEROMQ_PATTERN = "lru"`, as only its broker
+            queues the requests, `run` raises ValueError with other patterns.
+            Default is 0.
+
+        pool: str
+            Pool of workers that serve this function, one of the `pools` of `run`,
+            so slow functions can get their own workers and never hold up
+            the workers of the others. Like `priority`, only with the "lru" pattern.
+            Default is "default".
         """
+        if func is None:
+            return partial(
+                self.register_rpc,
+                max_concurrency=max_concurrency,
+                executor=executor,
+                cache=cache,
+                priority=priority,
+                pool=pool,
+            )
+
         self._verify_function_name(func)
+        _verify_positive("max_concurrency", max_concurrency)
+        if executor is not None and executor not in EXECUTORS:
+            raise ValueError(f"executor should be one of {EXECUTORS}; not {executor}")
+        if cache is not None and not isinstance(cache, CachePolicy):
+            raise ValueError(f"cache should be a CachePolicy; not {type(cache)}")
+        verify_priority(priority)
+        if not isinstance(pool, str) or not pool:
+            raise ValueError(f"pool should be a non empty string; not {pool}")
         type_util.verify_function_args(func)
         type_util.verify_function_return(func)
         type_util.verify_function_input_type(func, self._encoder)
         type_util.verify_function_return_type(func, self._encoder)
 
-        self._rpc_input_type_map[func.__name__] = type_util.get_function_input_class(
-            func
-        )
+        input_type = type_util.get_function_input_class(func)
+        if input_type is not None and hasattr(self._encoder, "register_type"):
+            # build the decoder now, not on the first request of every worker
+            self._encoder.register_type(input_type)
+
+        self._rpc_input_type_map[func.__name__] = input_type
         self._rpc_return_type_map[func.__name__] = type_util.get_function_return_class(
             func
         )
 
+        self._rpc_options_map[func.__name__] = RPCOptions(
+            max_concurrency=max_concurrency,
+            executor=executor,
+            cache=cache,
+            priority=priority,
+            pool=pool,
+        )
+
         self._rpc_router[func.__name__] = (func, iscoroutinefunction(func))
         return func
 
-    def run(self, workers: int = os.cpu_count() or 1):
+    def run(
+        self,
+        workers: int = os.cpu_count() or 1,
+        async_workers: bool = False,
+        max_concurrency: Optional[int] = None,
+        thread_pool_size: Optional[int] = None,
+        direct_connect: bool = False,
+        broker_threads: int = 1,
+        pools: Optional[Dict[str, int]] = None,
+        min_workers: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_requests_per_worker: Optional[int] = None,
+        max_worker_rss_mb: Optional[int] = None,
+    ):
         """
         Run the ZeroServer. This is a blocking operation.
         By default it uses all the cores available.
@@ -144,9 +251,154 @@ class ZeroServer:
         workers: int
             Number of workers to spawn.
             Each worker is a zmq router and runs on a separate process.
+            Workers that die are replaced.
+
+        async_workers: bool
+            Run the workers on their own event loop.
+            By default every request is handled one at a time in a worker,
+            and coroutine rpc functions are run to completion before the next request.
+            If True, coroutine rpc functions are multiplexed inside each worker,
+            so a worker keeps serving while handlers are awaiting I/O.
+            Sync rpc functions still run inline and block the worker's loop.
+
+        max_concurrency: Optional[int]
+            Maximum number of in-flight requests per async worker.
+            When a worker is saturated it stops pulling requests from the broker.
+            With `config.ZEROMQ_PATTERN = "lru"` new requests then only go to
+            the idle workers. The default "proxy" pattern keeps sending requests
+            round robin, they queue up in the saturated worker's socket,
+            so use "lru" to route around busy workers.
+            By default there is no limit. Only used with `async_workers`.
+
+        thread_pool_size: Optional[int]
+            Size of the thread pool of each async worker,
+            that runs the rpc functions registered with `executor="thread"`.
+            Default is the `ThreadPoolExecutor` default. Only used with `async_workers`.
+
+        direct_connect: bool
+            Each worker also listens on its own port, the next available ports after
+            the server port (port + 1, port + 2, ...), so make sure they are reachable.
+            Clients discover these ports through the server port,
+            and then send requests to the workers directly, skipping the broker.
+            This removes a hop and the broker's single core limit on throughput.
+
+        broker_threads: int
+            Number of brokers, each on its own thread with its own port and
+            its own share of the workers. The first one listens on the server port,
+            the others on the next available ports, and clients spread calls over them.
+            Use it when a single broker saturates a core. Default is 1.
+
+        pools: Optional[Dict[str, int]]
+            Split the workers into named pools, with the number of workers of each,
+            like `{"default": 8, "heavy": 2}`, instead of `workers`.
+            The calls of a function are only handled by the workers of its `pool`,
+            given at `register_rpc`, the others by the "default" pool,
+            so it should always be there. Every pool should have at least
+            `broker_threads` workers, as every broker gets some of each pool.
+            Only with `config.ZEROMQ_PATTERN = "lru"` and without `direct_connect`,
+            as the broker routes the calls.
+
+        min_workers: Optional[int]
+            Scale the workers by the load, never under `min_workers`. Default is 1.
+            `workers` are started, then a worker is added while calls wait
+            for a free worker, and a free one is retired after the workers
+            stayed mostly idle for a while, after the calls it already got.
+            Only with `config.ZEROMQ_PATTERN = "lru"`, as the broker knows the load,
+            and without `pools`, `direct_connect` and `broker_threads`.
+
+        max_workers: Optional[int]
+            Scale the workers by the load, never over `max_workers`.
+            Default is `workers`, or `min_workers` if more.
+
+        max_requests_per_worker: Optional[int]
+            Replace a worker by a fresh process after it served this many requests,
+            against the memory that long running workers slowly take.
+            The old worker keeps serving until the new one is ready,
+            then stops after the requests it already got, so no request is lost
+            and the number of workers stays the same.
+            Only with `config.ZEROMQ_PATTERN = "lru"` and without `direct_connect`.
+
+        max_worker_rss_mb: Optional[int]
+            Replace a worker, like `max_requests_per_worker`,
+            when its resident memory grows over this many MB.
+            Checked every few requests. Not with `use_threads`,
+            as the workers share the memory of the process.
         """
+        for name, value in (
+            ("max_concurrency", max_concurrency),
+            ("thread_pool_size", thread_pool_size),
+        ):
+            _verify_positive(name, value)
+            if value is not None and not async_workers:
+                raise ValueError(f"{name} can only be used with async_workers")
+
+        if not async_workers:
+            for name, options in self._rpc_options_map.items():
+                # sync workers run every call inline, one at a time
+                if options.executor is not None or options.max_concurrency is not None:
+                    raise ValueError(
+                        f"`{name}` is registered with executor or max_concurrency, "
+                        "they can only be used with async_workers"
+                    )
+
+        if config.ZEROMQ_PATTERN != "lru":
+            if pools is not None:
+                raise ValueError(
+                    'pools can only be used with config.ZEROMQ_PATTERN = "lru"'
+                )
+            for name, options in self._rpc_options_map.items():
+                # the proxy broker forwards the requests as they come
+                if options.priority != DEFAULT_PRIORITY:
+                    raise ValueError(
+                        f"`{name}` is registered with a priority, "
+                        'it can only be used with config.ZEROMQ_PATTERN = "lru"'
+                    )
+
+        _verify_positive("broker_threads", broker_threads)
+        if pools is not None:
+            self._verify_pools(pools, broker_threads)
+            if direct_connect:
+                raise ValueError("pools cannot be used with direct_connect")
+            workers = sum(pools.values())
+        else:
+            for name, options in self._rpc_options_map.items():
+                if options.pool != DEFAULT_POOL:
+                    raise ValueError(
+                        f"`{name}` is registered with the pool `{options.pool}`, "
+                        "run the server with pools"
+                    )
+        if broker_threads > workers:
+            raise ValueError("broker_threads cannot be more than workers")
+
+        if min_workers is not None or max_workers is not None:
+            self._verify_scaling(
+                min_workers, max_workers, pools, direct_connect, broker_threads
+            )
+            min_workers = min_workers or 1
+            max_workers = max_workers or max(workers, min_workers)
+            if min_workers > max_workers:
+                raise ValueError("min_workers cannot be more than max_workers")
+            workers = min(max(workers, min_workers), max_workers)
+
+        if max_requests_per_worker is not None or max_worker_rss_mb is not None:
+            self._verify_recycling(
+                max_requests_per_worker, max_worker_rss_mb, direct_connect
+            )
+
         try:
-            self._server_inst.start(workers)
+            self._server_inst.start(
+                workers,
+                async_workers=async_workers,
+                max_concurrency=max_concurrency,
+                thread_pool_size=thread_pool_size,
+                direct_connect=direct_connect,
+                broker_threads=broker_threads,
+                pools=pools,
+                min_workers=min_workers,
+                max_workers=max_workers,
+                max_requests_per_worker=max_requests_per_worker,
+                max_worker_rss_mb=max_worker_rss_mb,
+            )
         except KeyboardInterrupt:
             logging.warning("Caught KeyboardInterrupt, terminating server")
         except Exception as exc:  # pylint: disable=broad-except
@@ -154,6 +406,74 @@ class ZeroServer:
         finally:
             self._server_inst.stop()
 
+    def _verify_pools(self, pools: Dict[str, int], broker_threads: int):
+        if DEFAULT_POOL not in pools:
+            raise ValueError(
+                f"pools should have the `{DEFAULT_POOL}` pool, "
+                "for the functions without a pool"
+            )
+        for name, size in pools.items():
+            _verify_positive(f"workers of the pool `{name}`", size)
+            if size < broker_threads:
+                raise ValueError(
+                    f"pool `{name}` should have at least broker_threads workers"
+                )
+        for name, options in self._rpc_options_map.items():
+            if options.pool not in pools:
+                raise ValueError(
+                    f"`{name}` is registered with the pool `{options.pool}`, "
+                    "which is not in pools"
+                )
+
+    def _verify_scaling(
+        self,
+        min_workers: Optional[int],
+        max_workers: Optional[int],
+        pools: Optional[Dict[str, int]],
+        direct_connect: bool,
+        broker_threads: int,
+    ):
+        _verify_positive("min_workers", min_workers)
+        _verify_positive("max_workers", max_workers)
+        if config.ZEROMQ_PATTERN != "lru":
+            raise ValueError(
+                'min_workers and max_workers can only be used with config.ZEROMQ_PATTERN = "lru"'
+            )
+        # the workers of these are tied to a pool, a port or a broker
+        if pools is not None:
+            raise ValueError("min_workers and max_workers cannot be used with pools")
+        if direct_connect:
+            raise ValueError(
+                "min_workers and max_workers cannot be used with direct_connect"
+            )
+        if broker_threads > 1:
+            raise ValueError(
+                "min_workers and max_workers cannot be used with broker_threads"
+            )
+
+    def _verify_recycling(
+        self,
+        max_requests_per_worker: Optional[int],
+        max_worker_rss_mb: Optional[int],
+        direct_connect: bool,
+    ):
+        _verify_positive("max_requests_per_worker", max_requests_per_worker)
+        _verify_positive("max_worker_rss_mb", max_worker_rss_mb)
+        if config.ZEROMQ_PATTERN != "lru":
+            # only the lru broker can take a worker out without losing its requests
+            raise ValueError(
+                "max_requests_per_worker and max_worker_rss_mb can only be used "
+                'with config.ZEROMQ_PATTERN = "lru"'
+            )
+        if direct_connect:
+            # the new worker binds the port of the old one
+            raise ValueError(
+                "max_requests_per_worker and max_worker_rss_mb "
+                "cannot be used with direct_connect"
+            )
+        if max_worker_rss_mb is not None and self._use_threads:
+            raise ValueError("max_worker_rss_mb cannot be used with use_threads")
+
     def _verify_function_name(self, func):
         if not isinstance(func, Callable):
             raise ValueError(f"register function; not {type(func)}")
@@ -170,3 +490,8 @@ class ZeroServer:
                 f"{func.__name__} is a reserved function; cannot have `{func.__name__}` "
                 "as a RPC function"
             )
+
+
+def _verify_positive(name: str, value: Optional[int]):
+    if value is not None and (not isinstance(value, int) or value < 1):
+        raise ValueError(f"{name} should be a positive integer; not {value}")
@@ -0,0 +1,48 @@
+"""
+Deadline of the request being handled, sent by the client with the request.
+
+The worker sets it while the request is handled, and skips the requests
+whose deadline passed while they were queued, their callers gave up.
+Calls made by the handler through `ZeroClient` and `AsyncZeroClient`
+don't wait past it, so the deadline follows the request downstream.
+
+Deadlines are unix times, so the clocks of the clients and servers
+should be in sync, like with NTP.
+"""
+
+import contextvars
+import time
+from typing import Optional
+
+_DEADLINE: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar(
+    "zero_deadline", default=None
+)
+
+
+def get_deadline() -> Optional[float]:
+    """
+    Unix time the caller of the request being handled gives up, if it sent one.
+    """
+    return _DEADLINE.get()
+
+
+def set_deadline(deadline: Optional[float]) -> "contextvars.Token[Optional[float]]":
+    return _DEADLINE.set(deadline)
+
+
+def reset_deadline(token: "contextvars.Token[Optional[float]]") -> None:
+    _DEADLINE.reset(token)
+
+
+def remaining_time() -> Optional[int]:
+    """
+    Milliseconds left until the deadline of the request being handled,
+    or None if there is no deadline, like outside of a rpc function.
+
+    Calls made through the zero clients are cut to it already,
+    use it to bound other work, like a database query.
+    """
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return None
+    return max(int((deadline - time.time()) * 1000), 0)
@@ -57,6 +57,34 @@ def unique_id_bytes() -> bytes:
     return os.urandom(16)
 
 
+def rss_mb() -> float:
+    """
+    Resident memory of this process, in MB.
+
+    Returns
+    -------
+    float
+        Current resident memory where the OS tells it (linux),
+        else the peak one, else 0.
+
+    """
+    try:
+        with open("/proc/self/statm", "rb") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:  # windows
+        return 0.0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macos, kilobytes on the others
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
 def register_signal_term(sigterm_handler: Callable):
     """
     Register the signal term handler.
@@ -80,6 +108,20 @@ def register_signal_term(sigterm_handler: Callable):
         signal.signal(signal.SIGHUP, sigterm_handler)
 
 
+def reset_signal_term():
+    """
+    Reset the signals of `register_signal_term` to their defaults,
+    in a process forked from the one that registered them.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    if sys.platform == "win32":
+        signal.signal(signal.SIGBREAK, signal.SIG_DFL)
+    else:
+        signal.signal(signal.SIGQUIT, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+
 def log_error(func):
     """
     Decorator to log errors.
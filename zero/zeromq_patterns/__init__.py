@@ -1,13 +1,29 @@
-from .factory import get_async_client, get_broker, get_client, get_worker
-from .interfaces import AsyncZeroMQClient, ZeroMQBroker, ZeroMQClient, ZeroMQWorker
+from . import wire
+from .factory import (
+    get_async_client,
+    get_async_worker,
+    get_broker,
+    get_client,
+    get_worker,
+)
+from .interfaces import (
+    AsyncZeroMQClient,
+    AsyncZeroMQWorker,
+    ZeroMQBroker,
+    ZeroMQClient,
+    ZeroMQWorker,
+)
 
 __all__ = [
     "get_async_client",
+    "get_async_worker",
     "get_broker",
     "get_client",
     "get_worker",
     "AsyncZeroMQClient",
+    "AsyncZeroMQWorker",
     "ZeroMQBroker",
     "ZeroMQClient",
     "ZeroMQWorker",
+    "wire",
 ]
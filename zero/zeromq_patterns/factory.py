@@ -1,31 +1,88 @@
-from zero.zeromq_patterns import queue_device
+from typing import Dict, Optional
 
-from .interfaces import AsyncZeroMQClient, ZeroMQBroker, ZeroMQClient, ZeroMQWorker
+import zmq
 
+from zero.zeromq_patterns import load_balancer, queue_device
 
-def get_client(pattern: str, default_timeout: int = 2000) -> ZeroMQClient:
-    if pattern == "proxy":
-        return queue_device.ZeroMQClient(default_timeout)
+from .interfaces import (
+    AsyncZeroMQClient,
+    AsyncZeroMQWorker,
+    ZeroMQBroker,
+    ZeroMQClient,
+    ZeroMQWorker,
+)
+from .wire import FuncRef
+
+
+def get_client(
+    pattern: str, default_timeout: int = 2000, context: Optional[zmq.Context] = None
+) -> ZeroMQClient:
+    # clients are the same for all the patterns, the difference is in the server
+    if pattern in ("proxy", "lru"):
+        return queue_device.ZeroMQClient(default_timeout, context)
+
+    raise ValueError(f"Invalid pattern: {pattern}")
+
+
+def get_async_client(
+    pattern: str, default_timeout: int, context: Optional[zmq.Context] = None
+) -> AsyncZeroMQClient:
+    if pattern in ("proxy", "lru"):
+        return queue_device.AsyncZeroMQClient(default_timeout, context)
 
     raise ValueError(f"Invalid pattern: {pattern}")
 
 
-def get_async_client(pattern: str, default_timeout: int) -> AsyncZeroMQClient:
+def get_broker(
+    pattern: str,
+    context: Optional[zmq.Context] = None,
+    priorities: Optional[Dict[FuncRef, int]] = None,
+    routes: Optional[Dict[FuncRef, str]] = None,
+) -> ZeroMQBroker:
+    # the proxy forwards requests as they come, it has no queue to order or route
     if pattern == "proxy":
-        return queue_device.AsyncZeroMQClient(default_timeout)
+        return queue_device.ZeroMQBroker(context)
+    if pattern == "lru":
+        return load_balancer.ZeroMQBroker(context, priorities, routes)
 
     raise ValueError(f"Invalid pattern: {pattern}")
 
 
-def get_broker(pattern: str) -> ZeroMQBroker:
+def get_worker(
+    pattern: str,
+    worker_id: int,
+    direct_address: Optional[str] = None,
+    pool: Optional[str] = None,
+    max_requests: Optional[int] = None,
+    max_rss_mb: Optional[int] = None,
+) -> ZeroMQWorker:
+    # only the "lru" broker can take a worker out, to recycle it
     if pattern == "proxy":
-        return queue_device.ZeroMQBroker()
+        return queue_device.ZeroMQWorker(worker_id, direct_address)
+    if pattern == "lru":
+        return load_balancer.ZeroMQWorker(
+            worker_id, direct_address, pool, max_requests, max_rss_mb
+        )
 
     raise ValueError(f"Invalid pattern: {pattern}")
 
 
-def get_worker(pattern: str, worker_id: int) -> ZeroMQWorker:
+def get_async_worker(
+    pattern: str,
+    worker_id: int,
+    max_concurrency: Optional[int] = None,
+    direct_address: Optional[str] = None,
+    pool: Optional[str] = None,
+    max_requests: Optional[int] = None,
+    max_rss_mb: Optional[int] = None,
+) -> AsyncZeroMQWorker:
     if pattern == "proxy":
-        return queue_device.ZeroMQWorker(worker_id)
+        return queue_device.AsyncZeroMQWorker(
+            worker_id, max_concurrency, direct_address
+        )
+    if pattern == "lru":
+        return load_balancer.AsyncZeroMQWorker(
+            worker_id, max_concurrency, direct_address, pool, max_requests, max_rss_mb
+        )
 
     raise ValueError(f"Invalid pattern: {pattern}")
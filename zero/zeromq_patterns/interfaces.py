@@ -1,4 +1,13 @@
-from typing import Callable, Optional, Protocol, runtime_checkable
+from typing import (
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Protocol,
+    runtime_checkable,
+)
+
+from .wire import Body, FuncRef, Response
 
 
 @runtime_checkable
@@ -10,12 +19,27 @@ class ZeroMQClient(Protocol):  # pragma: no cover
     ):
         ...
 
-    def connect(self, address: str) -> None:
+    def connect(self, address: str) -> bytes:
+        ...
+
+    @property
+    def in_flight(self) -> int:
         ...
 
     def request(self, message: bytes, timeout: Optional[int] = None) -> bytes:
         ...
 
+    def request_multipart(
+        self, frames: List[bytes], timeout: Optional[int] = None
+    ) -> List[Body]:
+        ...
+
+    def submit(self, frames: List[bytes], timeout: Optional[int] = None) -> bytes:
+        ...
+
+    def result(self, req_id: bytes) -> List[Body]:
+        ...
+
     def close(self) -> None:
         ...
 
@@ -29,12 +53,21 @@ class AsyncZeroMQClient(Protocol):  # pragma: no cover
     ):
         ...
 
-    async def connect(self, address: str) -> None:
+    async def connect(self, address: str) -> bytes:
+        ...
+
+    @property
+    def in_flight(self) -> int:
         ...
 
     async def request(self, message: bytes, timeout: Optional[int] = None) -> bytes:
         ...
 
+    async def request_multipart(
+        self, frames: List[bytes], timeout: Optional[int] = None
+    ) -> List[Body]:
+        ...
+
     def close(self) -> None:
         ...
 
@@ -51,7 +84,20 @@ class ZeroMQBroker(Protocol):  # pragma: no cover
 @runtime_checkable
 class ZeroMQWorker(Protocol):  # pragma: no cover
     def listen(
-        self, address: str, msg_handler: Callable[[bytes, bytes], Optional[bytes]]
+        self, address: str, msg_handler: Callable[[FuncRef, bytes], Optional[Response]]
+    ) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+@runtime_checkable
+class AsyncZeroMQWorker(Protocol):  # pragma: no cover
+    async def listen(
+        self,
+        address: str,
+        msg_handler: Callable[[FuncRef, bytes], Awaitable[Optional[Response]]],
     ) -> None:
         ...
 
@@ -0,0 +1,4 @@
+from .broker import ZeroMQBroker
+from .worker import AsyncZeroMQWorker, ZeroMQWorker
+
+__all__ = ["ZeroMQBroker", "ZeroMQWorker", "AsyncZeroMQWorker"]
@@ -0,0 +1,311 @@
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import zmq
+
+from zero.zeromq_patterns.wire import (
+    DEFAULT_POOL,
+    DEFAULT_PRIORITY,
+    MAX_PRIORITY,
+    Frame,
+    FuncRef,
+    as_buffer,
+    as_bytes,
+    unpack_func_ref,
+    unpack_priority,
+)
+
+# first frame of a message from a worker announcing it can take more requests,
+# second frame is the number of requests it can take,
+# and the optional third one is the name of the worker's pool
+WORKER_READY = b"\x01"
+# only frame of a message to a worker asking it to stop after the requests it has
+WORKER_STOP = b"\x02"
+# only frame of the last message of a stopped worker, after its last response
+WORKER_GONE = b"\x03"
+# first frame of a message from a worker asking to be stopped and replaced,
+# second frame is its worker id
+WORKER_LEAVING = b"\x04"
+
+
+class _Pool:
+    """
+    Workers of a pool and the requests waiting for them.
+    """
+
+    __slots__ = ["ready", "lanes", "queued", "replaced"]
+
+    def __init__(self):
+        # workers with at least one credit, in the order they are picked
+        self.ready: Deque[bytes] = deque()
+        # waiting requests, indexed by priority
+        self.lanes: List[Deque[List[Frame]]] = [
+            deque() for _ in range(MAX_PRIORITY + 1)
+        ]
+        self.queued = 0
+        # workers that asked to leave, each stopped when a new one is ready
+        self.replaced: Deque[bytes] = deque()
+
+
+class ZeroMQBroker:
+    """
+    Load aware broker, requests are only sent to workers that are free.
+
+    Workers announce how many requests they can take (credits) when they connect,
+    and every response gives back a credit. Requests wait in the broker while
+    all workers are busy, so a slow request never blocks a request behind it
+    while another worker is idle.
+
+    Waiting requests are kept in a lane per priority, and the higher lanes are
+    always served first, so the calls of a function with a high `priority`,
+    or sent with one, don't wait behind a backlog of bulk calls.
+    The priority of a call is the one it was sent with, else its function's
+    from `priorities`, by the function name and by the function id
+    of the compact header, else `DEFAULT_PRIORITY`.
+
+    Workers also announce their pool, and the calls of a function are only sent
+    to the workers of its pool from `routes`, keyed like `priorities`,
+    else to the workers of `DEFAULT_POOL`. Every pool has its own lanes,
+    so busy workers of one pool never hold back the calls of another.
+
+    `queue_depth`, `workers` and `busy_workers` tell the load, and
+    `retire_worker` stops a free worker, for the server to scale the workers.
+    A worker can also ask to leave, to be recycled. Its worker id is kept
+    for the server to start a new one, see `take_recycled`, and it keeps
+    serving until a new worker of its pool is ready, then it is stopped
+    the same way, so the pool never has fewer workers.
+    """
+
+    def __init__(
+        self,
+        context: Optional[zmq.Context] = None,
+        priorities: Optional[Dict[FuncRef, int]] = None,
+        routes: Optional[Dict[FuncRef, str]] = None,
+    ):
+        self.context = context or zmq.Context.instance()
+
+        self.gateway = self.context.socket(zmq.ROUTER)
+        self.backend = self.context.socket(zmq.ROUTER)
+        # raise if a worker is gone, instead of silently dropping the request
+        self.backend.setsockopt(zmq.ROUTER_MANDATORY, 1)
+
+        self.poller = zmq.Poller()
+        self.poller.register(self.gateway, zmq.POLLIN)
+        self.poller.register(self.backend, zmq.POLLIN)
+
+        self._credits: Dict[bytes, int] = {}
+        # counters, read by the other threads without going over the workers
+        self._busy = 0
+        self._queued = 0
+        # asked by the other threads, the sockets are only used by this one
+        self._retire_requests: Deque[bool] = deque()
+        # stopped workers that may still send responses
+        self._leaving: Set[bytes] = set()
+        # worker ids of the workers that asked to leave, read by the other threads
+        self._recycled: Deque[int] = deque()
+        self._priorities = priorities or {}
+        self._routes = routes or {}
+        # sorted, so the pools are always served in the same order
+        self._pools: Dict[str, _Pool] = {
+            name: _Pool() for name in sorted({DEFAULT_POOL, *self._routes.values()})
+        }
+        # kept for the workers that are gone too, their late responses
+        # give the credit back to the right pool
+        self._pool_of: Dict[bytes, _Pool] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def workers(self) -> int:
+        return len(self._credits)
+
+    @property
+    def busy_workers(self) -> int:
+        """
+        Workers that can't take another request.
+        """
+        return self._busy
+
+    def retire_worker(self) -> None:
+        """
+        Stop a free worker of the default pool, after the requests it already got.
+        Nothing is stopped if all of them are busy when the broker gets to it.
+        Safe to call from other threads.
+        """
+        self._retire_requests.append(True)
+
+    def take_recycled(self) -> List[int]:
+        """
+        Worker ids of the workers that asked to leave since the last call,
+        they are stopping and should be replaced. Safe to call from other threads.
+        """
+        recycled = []
+        while self._recycled:
+            recycled.append(self._recycled.popleft())
+        return recycled
+
+    def listen(self, address: str, channel: str) -> None:
+        self.gateway.bind(f"{address}")
+        self.backend.bind(f"{channel}")
+        logging.info("Starting server at %s", address)
+
+        while True:  # pragma: no cover - hard to test
+            self._poll(1000)
+
+    def _poll(self, timeout: int) -> None:
+        socks = dict(self.poller.poll(timeout))
+
+        # frames are forwarded as they are, the payloads are never copied
+        if self.backend in socks:
+            self._handle_worker_msg(self.backend.recv_multipart(copy=False))
+
+        if self.gateway in socks:
+            self._enqueue(self.gateway.recv_multipart(copy=False))
+
+        self._dispatch()
+
+        if self._retire_requests:
+            self._retire()
+
+    def _handle_worker_msg(self, frames: List[Frame]) -> None:
+        worker_ident, frames = as_bytes(frames[0]), frames[1:]
+
+        if worker_ident in self._leaving:
+            self._handle_leaving_msg(worker_ident, frames)
+            return
+
+        if len(frames) in (2, 3) and as_bytes(frames[0]) == WORKER_READY:
+            pool = as_bytes(frames[2]).decode() if len(frames) == 3 else None
+            joined = worker_ident not in self._credits
+            self._add_credits(worker_ident, int(as_bytes(frames[1])), pool)
+            if joined:
+                self._swap(self._pool_of[worker_ident])
+            return
+
+        if len(frames) == 2 and as_bytes(frames[0]) == WORKER_LEAVING:
+            pool_of = self._pool_of.get(worker_ident)
+            if worker_ident in self._credits and pool_of is not None:
+                pool_of.replaced.append(worker_ident)
+                self._recycled.append(int(as_bytes(frames[1])))
+            return
+
+        # a response, forward to the client and take the credit back
+        self._add_credits(worker_ident, 1)
+        self.gateway.send_multipart(frames, zmq.NOBLOCK, copy=False)
+
+    def _handle_leaving_msg(self, worker_ident: bytes, frames: List[Frame]) -> None:
+        if len(frames) == 1 and as_bytes(frames[0]) == WORKER_GONE:
+            self._leaving.discard(worker_ident)
+        elif as_bytes(frames[0]) != WORKER_READY:
+            # its last responses, it gets no more requests
+            self.gateway.send_multipart(frames, zmq.NOBLOCK, copy=False)
+
+    def _enqueue(self, frames: List[Frame]) -> None:
+        pool, priority = self._route(frames)
+        pool.lanes[priority].append(frames)
+        pool.queued += 1
+        self._queued += 1
+
+    def _route(self, frames: List[Frame]) -> Tuple[_Pool, int]:
+        # [client ident, request id, header, message] or [client ident, data]
+        if len(frames) == 4:
+            header = as_buffer(frames[2])
+        elif len(frames) == 2:
+            header = as_buffer(frames[1])[16:]
+        else:
+            # the worker drops it
+            return self._pools[DEFAULT_POOL], DEFAULT_PRIORITY
+
+        func = unpack_func_ref(header)
+        pool = self._pools[self._routes.get(func, DEFAULT_POOL)]
+        priority = unpack_priority(header)
+        if priority is None:
+            return pool, self._priorities.get(func, DEFAULT_PRIORITY)
+        return pool, min(priority, MAX_PRIORITY)
+
+    def _dispatch(self) -> None:
+        for pool in self._pools.values():
+            while pool.queued and pool.ready:
+                lane = next(lane for lane in reversed(pool.lanes) if lane)
+                worker_ident = self._take_worker(pool)
+                try:
+                    self.backend.send_multipart(
+                        [worker_ident] + lane[0], zmq.NOBLOCK, copy=False
+                    )
+                except zmq.error.ZMQError:
+                    # worker is gone or cannot take it, forget it and try the next one
+                    logging.warning("Worker %s is not reachable", worker_ident)
+                    self._remove_worker(worker_ident)
+                    continue
+                lane.popleft()
+                pool.queued -= 1
+                self._queued -= 1
+
+    def _retire(self) -> None:
+        while self._retire_requests:
+            self._retire_requests.popleft()
+            ready = self._pools[DEFAULT_POOL].ready
+            if not ready:
+                continue  # all busy, not the time to stop one
+
+            # the last one freed, the others stay in the round robin
+            self._stop_worker(ready[-1])
+
+    def _swap(self, pool: _Pool) -> None:
+        # a new worker takes the place of one that asked to leave
+        while pool.replaced:
+            worker_ident = pool.replaced.popleft()
+            if worker_ident in self._credits:
+                self._stop_worker(worker_ident)
+                return
+
+    def _stop_worker(self, worker_ident: bytes) -> None:
+        # it gets no more requests, and stops after the ones it has
+        self._remove_worker(worker_ident)
+        try:
+            self.backend.send_multipart([worker_ident, WORKER_STOP], zmq.NOBLOCK)
+        except zmq.error.ZMQError:
+            return  # gone already
+        self._leaving.add(worker_ident)
+
+    def _add_credits(
+        self, worker_ident: bytes, credits: int, pool_name: Optional[str] = None
+    ) -> None:
+        pool = self._pool_of.get(worker_ident)
+        if pool is None or pool_name is not None:
+            pool = self._pools.setdefault(pool_name or DEFAULT_POOL, _Pool())
+            self._pool_of[worker_ident] = pool
+
+        known = worker_ident in self._credits
+        had = self._credits.get(worker_ident, 0)
+        self._credits[worker_ident] = had + credits
+        if had <= 0 < had + credits:
+            pool.ready.append(worker_ident)
+            if known:
+                self._busy -= 1
+
+    def _take_worker(self, pool: _Pool) -> bytes:
+        worker_ident = pool.ready.popleft()
+        self._credits[worker_ident] -= 1
+        if self._credits[worker_ident]:
+            # round robin between the free workers
+            pool.ready.append(worker_ident)
+        else:
+            self._busy += 1
+        return worker_ident
+
+    def _remove_worker(self, worker_ident: bytes) -> None:
+        credits = self._credits.pop(worker_ident, None)
+        if credits is not None and credits <= 0:
+            self._busy -= 1
+        pool = self._pool_of.get(worker_ident)
+        if pool is not None and worker_ident in pool.ready:
+            pool.ready.remove(worker_ident)
+
+    def close(self) -> None:
+        self.gateway.close()
+        self.backend.close()
+        self.context.term()
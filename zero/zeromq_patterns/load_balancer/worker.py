@@ -0,0 +1,166 @@
+import logging
+from typing import List, Optional
+
+import zmq
+import zmq.asyncio as zmqasync
+
+from zero.utils import util
+from zero.zeromq_patterns import queue_device
+from zero.zeromq_patterns.wire import Frame, as_bytes
+
+from .broker import WORKER_GONE, WORKER_LEAVING, WORKER_READY, WORKER_STOP
+
+# credits of an async worker without a concurrency limit
+DEFAULT_ASYNC_CREDITS = 100
+
+# requests between two looks at the memory of the worker
+RSS_CHECK_EVERY = 20
+
+
+def _ready(credits: int, pool: Optional[str]) -> List[bytes]:
+    frames = [WORKER_READY, str(credits).encode()]
+    if pool is not None:
+        frames.append(pool.encode())
+    return frames
+
+
+def _leaving(worker_id: int) -> List[bytes]:
+    return [WORKER_LEAVING, str(worker_id).encode()]
+
+
+class _Recycling:
+    """
+    Tells when a worker served `max_requests`, or grew over `max_rss_mb`,
+    once, so it asks the broker to be replaced by a fresh one.
+    """
+
+    __slots__ = ["max_requests", "max_rss_mb", "served", "due"]
+
+    def __init__(self, max_requests: Optional[int], max_rss_mb: Optional[int]):
+        self.max_requests = max_requests
+        self.max_rss_mb = max_rss_mb
+        self.served = 0
+        self.due = False
+
+    def on_served(self) -> bool:
+        """
+        True when the worker should leave now.
+        """
+        if self.due:
+            return False
+        self.served += 1
+        if self.max_requests is not None and self.served >= self.max_requests:
+            self.due = True
+        elif self.max_rss_mb is not None and self.served % RSS_CHECK_EVERY == 0:
+            self.due = util.rss_mb() > self.max_rss_mb
+        return self.due
+
+
+class ZeroMQWorker(queue_device.ZeroMQWorker):
+    """
+    Same as the queue device worker, but announces itself to the broker,
+    so it gets a request only when it is free.
+
+    With a `pool` it gets only the requests of the functions of that pool,
+    see `ZeroMQBroker`.
+
+    When the broker retires it, the worker stops listening, as the requests
+    the broker sent it before are answered already, one at a time.
+    After `max_requests`, or over `max_rss_mb` of memory, it asks the broker
+    to retire it, for the server to start a fresh one.
+    """
+
+    def __init__(
+        self,
+        worker_id: int,
+        direct_address: Optional[str] = None,
+        pool: Optional[str] = None,
+        max_requests: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+    ):
+        super().__init__(worker_id, direct_address)
+        self.pool = pool
+        self._recycling = _Recycling(max_requests, max_rss_mb)
+
+    def _on_connect(self) -> None:
+        self.socket.send_multipart(_ready(1, self.pool))
+
+    def _on_control(self, frame: Frame) -> bool:
+        if as_bytes(frame) != WORKER_STOP:
+            return False
+        logging.info("Worker %d is retired", self.worker_id)
+        self.running = False
+        self.socket.send_multipart([WORKER_GONE])
+        return True
+
+    def _on_served(self) -> None:
+        if self._recycling.on_served():
+            logging.info("Worker %d is leaving to be recycled", self.worker_id)
+            try:
+                self.socket.send_multipart(_leaving(self.worker_id))
+            except zmq.error.Again:
+                self._recycling.due = False  # asks again after the next request
+
+    def _on_dropped(self, socket: zmq.Socket) -> None:
+        # the broker gives the credit back only with a response,
+        # without one this worker would never get a request again
+        if socket is not self.socket:
+            return  # direct requests don't take credits
+        try:
+            self.socket.send_multipart(_ready(1, self.pool))
+        except zmq.error.Again:
+            logging.error("Worker %d could not give back its credit", self.worker_id)
+
+
+class AsyncZeroMQWorker(queue_device.AsyncZeroMQWorker):
+    """
+    Same as the queue device async worker, but announces to the broker
+    how many requests it can take at once, and its `pool`.
+
+    When the broker retires it, the worker stops listening
+    after the requests in flight are answered. It asks to be retired
+    like the sync worker, after `max_requests` or over `max_rss_mb`.
+    """
+
+    def __init__(
+        self,
+        worker_id: int,
+        max_concurrency: Optional[int] = None,
+        direct_address: Optional[str] = None,
+        pool: Optional[str] = None,
+        max_requests: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+    ):
+        super().__init__(worker_id, max_concurrency, direct_address)
+        self.pool = pool
+        self._recycling = _Recycling(max_requests, max_rss_mb)
+
+    async def _on_connect(self) -> None:
+        credits = self.max_concurrency or DEFAULT_ASYNC_CREDITS
+        await self.socket.send_multipart(_ready(credits, self.pool))
+
+    async def _on_control(self, frame: Frame) -> bool:
+        if as_bytes(frame) != WORKER_STOP:
+            return False
+        logging.info("Worker %d is retired", self.worker_id)
+        self.running = False
+        await self._drain()
+        await self.socket.send_multipart([WORKER_GONE])
+        return True
+
+    async def _on_served(self) -> None:
+        if self._recycling.on_served():
+            logging.info("Worker %d is leaving to be recycled", self.worker_id)
+            try:
+                await self.socket.send_multipart(_leaving(self.worker_id))
+            except zmq.error.Again:
+                self._recycling.due = False  # asks again after the next request
+
+    async def _on_dropped(self, socket: zmqasync.Socket) -> None:
+        # the broker gives the credit back only with a response
+        if socket is not self.socket:
+            return  # direct requests don't take credits
+        try:
+            await self.socket.send_multipart(_ready(1, self.pool))
+        except zmq.error.Again:
+            logging.error("Worker %d could not give back its credit", self.worker_id)
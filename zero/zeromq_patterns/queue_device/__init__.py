@@ -1,5 +1,11 @@
 from .broker import ZeroMQBroker
 from .client import AsyncZeroMQClient, ZeroMQClient
-from .worker import ZeroMQWorker
+from .worker import AsyncZeroMQWorker, ZeroMQWorker
 
-__all__ = ["ZeroMQBroker", "ZeroMQClient", "AsyncZeroMQClient", "ZeroMQWorker"]
+__all__ = [
+    "ZeroMQBroker",
+    "ZeroMQClient",
+    "AsyncZeroMQClient",
+    "ZeroMQWorker",
+    "AsyncZeroMQWorker",
+]
@@ -1,12 +1,13 @@
 import logging
+from typing import Optional
 
 import zmq
 from zmq.backend import proxy
 
 
 class ZeroMQBroker:
-    def __init__(self):
-        self.context = zmq.Context.instance()
+    def __init__(self, context: Optional[zmq.Context] = None):
+        self.context = context or zmq.Context.instance()
 
         self.gateway = self.context.socket(zmq.ROUTER)
         self.backend = self.context.socket(zmq.DEALER)
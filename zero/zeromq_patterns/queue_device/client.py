@@ -1,8 +1,9 @@
 import asyncio
 import logging
+import math
 import sys
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 import zmq
 import zmq.asyncio as zmqasync
@@ -10,13 +11,27 @@ import zmq.error as zmqerr
 
 from zero.error import ConnectionException, TimeoutException
 from zero.utils import util
+from zero.zeromq_patterns.wire import Body, Frame, as_buffer, as_bytes
+
+# seconds, slot of the async client's timeouts
+TIMER_TICK = 0.01
+
+# submitted requests are swept for expired ones when there are this many or more
+_MIN_SWEEP = 1024
 
 
 class ZeroMQClient:
-    def __init__(self, default_timeout: int):
+    """
+    Synchronous client, `request` waits for the response of each request.
+
+    With `submit` many requests can be in flight on the socket, their responses
+    are kept by request id as they come, until `result` takes them.
+    """
+
+    def __init__(self, default_timeout: int, context: Optional[zmq.Context] = None):
         self._address = ""
         self._default_timeout = default_timeout
-        self._context = zmq.Context.instance()
+        self._context = context or zmq.Context.instance()
 
         self.socket = self._context.socket(zmq.DEALER)
         self.socket.setsockopt(zmq.LINGER, 0)  # dont buffer messages
@@ -26,48 +41,114 @@ class ZeroMQClient:
         self.poller = zmq.Poller()
         self.poller.register(self.socket, zmq.POLLIN)
 
-    def connect(self, address: str) -> None:
+        # submitted requests, request id -> expiry in ms,
+        # and the responses that came while waiting for another one
+        self._submitted: Dict[bytes, int] = {}
+        self._responses: Dict[bytes, List[Body]] = {}
+        self._sweep_at = _MIN_SWEEP
+
+    def connect(self, address: str) -> bytes:
         self._address = address
         self.socket.connect(address)
         self._send(util.unique_id_bytes() + b"connect" + b"")
-        self._recv()
+        resp = self._recv()
         logging.info("Connected to server at %s", self._address)
+        # handshake response, without the request id
+        return resp[16:]
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Submitted requests whose result is not taken yet.
+        """
+        return len(self._submitted)
 
     def request(self, message: bytes, timeout: Optional[int] = None) -> bytes:
+        req_id = util.unique_id_bytes()
+        self._send(req_id + message)
+        return self._wait_for(req_id, timeout)[0]  # type: ignore
+
+    def request_multipart(
+        self, frames: List[bytes], timeout: Optional[int] = None
+    ) -> List[Body]:
+        """
+        Send the frames after the request id, without copying them,
+        and return the frames of the response after the request id.
+        """
+        req_id = util.unique_id_bytes()
+        self._send_multipart([req_id] + frames)
+        return self._wait_for(req_id, timeout)
+
+    def submit(self, frames: List[bytes], timeout: Optional[int] = None) -> bytes:
+        """
+        Send the frames after the request id, like `request_multipart`,
+        without waiting for the response. Returns the request id for `result`.
+        A one frame list is sent as one frame.
+        """
+        req_id = util.unique_id_bytes()
+        if len(frames) == 1:
+            self._send(req_id + frames[0])
+        else:
+            self._send_multipart([req_id] + frames)
+
+        if len(self._submitted) >= self._sweep_at:
+            self._sweep()
+        self._submitted[req_id] = _now_ms() + (timeout or self._default_timeout)
+        return req_id
+
+    def result(self, req_id: bytes) -> List[Body]:
+        """
+        Frames of the response of a submitted request, after the request id.
+        Waits until the request's timeout, counted from `submit`.
+        """
+        expire_at = self._submitted.pop(req_id, None)
+        if expire_at is None:
+            # swept, or already taken
+            raise TimeoutException(
+                f"Timeout while waiting for response at {self._address}"
+            )
+        # at least a poll, the response might be waiting in the socket
+        return self._wait_for(req_id, max(expire_at - _now_ms(), 1))
+
+    def _wait_for(self, req_id: bytes, timeout: Optional[int]) -> List[Body]:
+        if req_id in self._responses:
+            return self._responses.pop(req_id)
+
         _timeout = timeout or self._default_timeout
-        _expire_at = int(time.time() * 1e3) + _timeout
+        _expire_at = _now_ms() + _timeout
 
         def _poll_data():
             # poll is slow, need to find a better way
-            if not self._poll(_timeout):
+            if not self._poll(max(_timeout, 0)):
                 raise TimeoutException(
                     f"Timeout while sending message at {self._address}"
                 )
 
-            rcv_data = self._recv()
-
-            # first 16 bytes as response id
-            resp_id = rcv_data[:16]
-
-            # the rest is response data
-            resp_data = rcv_data[16:]
-
-            return resp_id, resp_data
-
-        req_id = util.unique_id_bytes()
-        self._send(req_id + message)
+            return _unpack_response(self._recv_multipart())
 
         resp_id, resp_data = None, None
         # as the client is synchronous, we know that the response will be available any next poll
         # we try to get the response until timeout because a previous call might be timed out
         # and the response is still in the socket,
         # so we poll until we get the response for this call
+        # responses of other submitted requests are kept for their `result`
         while resp_id != req_id:
-            _timeout = _expire_at - int(time.time() * 1e3)
+            _timeout = _expire_at - _now_ms()
             resp_id, resp_data = _poll_data()
+            if resp_id != req_id and resp_id in self._submitted:
+                self._responses[resp_id] = resp_data
 
         return resp_data  # type: ignore
 
+    def _sweep(self) -> None:
+        # submitted requests whose result will never be taken
+        now = _now_ms()
+        for req_id, expire_at in list(self._submitted.items()):
+            if expire_at < now:
+                del self._submitted[req_id]
+                self._responses.pop(req_id, None)
+        self._sweep_at = max(_MIN_SWEEP, len(self._submitted) * 2)
+
     def close(self) -> None:
         self.socket.close()
 
@@ -79,6 +160,14 @@ class ZeroMQClient:
                 f"Connection error for send at {self._address}"
             ) from exc
 
+    def _send_multipart(self, frames: List[bytes]) -> None:
+        try:
+            self.socket.send_multipart(frames, zmq.NOBLOCK, copy=False)
+        except zmqerr.Again as exc:
+            raise ConnectionException(
+                f"Connection error for send at {self._address}"
+            ) from exc
+
     def _poll(self, timeout: int) -> bool:
         socks = dict(self.poller.poll(timeout))
         return self.socket in socks
@@ -91,68 +180,172 @@ class ZeroMQClient:
                 f"Connection error for recv at {self._address}"
             ) from exc
 
+    def _recv_multipart(self) -> List[zmq.Frame]:
+        try:
+            return self.socket.recv_multipart(copy=False)
+        except zmqerr.Again as exc:
+            raise ConnectionException(
+                f"Connection error for recv at {self._address}"
+            ) from exc
+
 
 class AsyncZeroMQClient:
-    def __init__(self, default_timeout: int):
+    """
+    Asynchronous client, many requests can be in flight on the socket.
+
+    Every request has a future, resolved by the receive loop when the response
+    comes. Timeouts are checked by one timer for all the requests,
+    on a wheel of `TIMER_TICK` seconds slots, so a request might time out
+    up to a tick late.
+    """
+
+    def __init__(
+        self, default_timeout: int, context: Optional[zmqasync.Context] = None
+    ):
         if sys.platform == "win32":
             # windows need special event loop policy to work with zmq
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
         self._address: str = None  # type: ignore
         self._default_timeout = default_timeout
-        self._context = zmqasync.Context.instance()
+        self._context = context or zmqasync.Context.instance()
 
         self.socket: zmqasync.Socket = self._context.socket(zmq.DEALER)
         self.socket.setsockopt(zmq.LINGER, 0)  # dont buffer messages
         self.socket.setsockopt(zmq.RCVTIMEO, default_timeout)
         self.socket.setsockopt(zmq.SNDTIMEO, default_timeout)
 
-        self._resp_events: Dict[bytes, asyncio.Event] = {}
-        self._resp_data: Dict[bytes, bytes] = {}
+        self._pending: Dict[bytes, "asyncio.Future[List[Body]]"] = {}
+        # tick -> request ids that time out at that tick
+        self._wheel: Dict[int, List[bytes]] = {}
+        self._last_tick = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer_tick = 0
         self._recv_task: Optional[asyncio.Task] = None
         self._closed = False
 
-    async def connect(self, address: str) -> None:
+    async def connect(self, address: str) -> bytes:
         self._address = address
         self.socket.connect(address)
         await self._send(util.unique_id_bytes() + b"connect" + b"")
-        await self._recv()
-        self._recv_task = asyncio.create_task(self._recv_loop())
+        try:
+            resp = await self._recv()
+        finally:
+            # even without an answer, the server may come up later
+            self._recv_task = asyncio.create_task(self._recv_loop())
         logging.info("Connected to server at %s", self._address)
+        # handshake response, without the request id
+        return resp[16:]
 
     async def _recv_loop(self) -> None:
         while not self._closed:
-            resp = await self._recv()
-            resp_id, resp_data = resp[:16], resp[16:]
-            event = self._resp_events.get(resp_id)
-            if event:
-                self._resp_data[resp_id] = resp_data
-                event.set()
+            resp_id, resp_data = _unpack_response(await self._recv_multipart())
+            future = self._pending.pop(resp_id, None)
+            # else timed out, or the caller is gone
+            if future is not None and not future.done():
+                future.set_result(resp_data)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Requests waiting for their response.
+        """
+        return len(self._pending)
 
     async def request(self, message: bytes, timeout: Optional[int] = None) -> bytes:
         req_id = util.unique_id_bytes()
-        self._resp_events[req_id] = asyncio.Event()
+        future = self._expect(req_id, timeout)
         await self._send(req_id + message)
+        return (await self._wait_for(req_id, future))[0]  # type: ignore
+
+    async def request_multipart(
+        self, frames: List[bytes], timeout: Optional[int] = None
+    ) -> List[Body]:
+        """
+        Send the frames after the request id, without copying them,
+        and return the frames of the response after the request id.
+        """
+        req_id = util.unique_id_bytes()
+        future = self._expect(req_id, timeout)
+        await self._send_multipart([req_id] + frames)
+        return await self._wait_for(req_id, future)
+
+    def _expect(
+        self, req_id: bytes, timeout: Optional[int]
+    ) -> "asyncio.Future[List[Body]]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[req_id] = future
+
+        if self._timer_loop is not loop:
+            # the loop of the armed timer is gone, so are its requests
+            self._wheel.clear()
+            self._timer = None
+            self._timer_loop = loop
+
+        expire_at = loop.time() + (timeout or self._default_timeout) / 1000
+        tick = math.ceil(expire_at / TIMER_TICK)
+        slot = self._wheel.get(tick)
+        if slot is None:
+            self._wheel[tick] = [req_id]
+        else:
+            slot.append(req_id)
+
+        if self._timer is None:
+            # no other request is waiting, the wheel starts turning now
+            self._last_tick = math.floor(loop.time() / TIMER_TICK)
+            self._arm(loop, tick)
+        elif tick < self._timer_tick:
+            # times out before the requests the timer is armed for
+            self._timer.cancel()
+            self._arm(loop, tick)
+        return future
+
+    def _arm(self, loop: asyncio.AbstractEventLoop, tick: int) -> None:
+        self._timer_tick = tick
+        self._timer = loop.call_at(tick * TIMER_TICK, self._expire)
+
+    async def _wait_for(
+        self, req_id: bytes, future: "asyncio.Future[List[Body]]"
+    ) -> List[Body]:
         try:
-            await asyncio.wait_for(
-                self._resp_events[req_id].wait(),
-                (timeout or self._default_timeout) / 1000,
-            )
-            return self._resp_data.pop(req_id, b"")
-        except asyncio.TimeoutError as exc:
-            self._resp_events.pop(req_id, None)
-            self._resp_data.pop(req_id, None)
-            raise TimeoutException(
-                f"Timeout while waiting for response at {self._address}"
-            ) from exc
+            return await future
+        finally:
+            # cancelled or failed to send
+            self._pending.pop(req_id, None)
+
+    def _expire(self) -> None:
+        """
+        Fail the requests of the slots that have passed, and wait for the next one.
+        """
+        loop = asyncio.get_running_loop()
+        # the loop may run the timer a bit early, its tick has come regardless
+        now_tick = max(math.floor(loop.time() / TIMER_TICK), self._timer_tick)
+        for tick in range(self._last_tick + 1, now_tick + 1):
+            for req_id in self._wheel.pop(tick, ()):
+                future = self._pending.pop(req_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(
+                        TimeoutException(
+                            f"Timeout while waiting for response at {self._address}"
+                        )
+                    )
+        self._last_tick = now_tick
+
+        self._timer = None
+        if self._wheel:
+            self._arm(loop, min(self._wheel))
 
     def close(self) -> None:
         self._closed = True
         if self._recv_task:
             self._recv_task.cancel()
+        if self._timer:
+            self._timer.cancel()
         self.socket.close()
-        self._resp_events.clear()
-        self._resp_data.clear()
+        self._pending.clear()
+        self._wheel.clear()
 
     async def _send(self, message: bytes) -> None:
         try:
@@ -162,6 +355,14 @@ class AsyncZeroMQClient:
                 f"Connection error for send at {self._address}"
             ) from exc
 
+    async def _send_multipart(self, frames: List[bytes]) -> None:
+        try:
+            await self.socket.send_multipart(frames, zmq.NOBLOCK, copy=False)
+        except zmqerr.Again as exc:
+            raise ConnectionException(
+                f"Connection error for send at {self._address}"
+            ) from exc
+
     async def _recv(self) -> bytes:
         try:
             return await self.socket.recv()
@@ -169,3 +370,24 @@ class AsyncZeroMQClient:
             raise ConnectionException(
                 f"Connection error for recv at {self._address}"
             ) from exc
+
+    async def _recv_multipart(self) -> List[zmq.Frame]:
+        try:
+            return await self.socket.recv_multipart(copy=False)
+        except zmqerr.Again as exc:
+            raise ConnectionException(
+                f"Connection error for recv at {self._address}"
+            ) from exc
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1e3)
+
+
+def _unpack_response(frames: List[Frame]) -> Tuple[bytes, List[Body]]:
+    # a response to a one frame request is one frame, request id then data
+    if len(frames) == 1:
+        data = as_bytes(frames[0])
+        return data[:16], [data[16:]]
+
+    return as_bytes(frames[0]), [as_buffer(frame) for frame in frames[1:]]
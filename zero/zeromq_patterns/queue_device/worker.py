@@ -1,14 +1,39 @@
+import asyncio
 import logging
-from typing import Callable, Optional
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
 
 import zmq
+import zmq.asyncio as zmqasync
+
+from zero.utils.deadline import reset_deadline, set_deadline
+from zero.zeromq_patterns.wire import (
+    Body,
+    Frame,
+    FuncRef,
+    Response,
+    as_buffer,
+    as_bytes,
+    unpack_deadline,
+    unpack_header,
+)
 
 # import zmq.green as zmq
 
+# milliseconds a stopped worker waits for its last messages to be sent
+STOP_LINGER = 2000
+
 
 class ZeroMQWorker:
-    def __init__(self, worker_id: int):
+    """
+    Worker connected to the broker with a DEALER socket.
+
+    With `direct_address` the worker also binds a ROUTER socket there,
+    so clients can skip the broker and send requests to it directly.
+    """
+
+    def __init__(self, worker_id: int, direct_address: Optional[str] = None):
         self.worker_id = worker_id
+        self.direct_address = direct_address
         self.context = zmq.Context()
 
         self.socket: zmq.Socket = self.context.socket(zmq.DEALER)
@@ -16,46 +41,333 @@ class ZeroMQWorker:
         # self.socket.setsockopt(zmq.RCVTIMEO, 2000)
         self.socket.setsockopt(zmq.SNDTIMEO, 2000)
 
+        self.direct_socket: Optional[zmq.Socket] = None
+        if direct_address:
+            self.direct_socket = self.context.socket(zmq.ROUTER)
+            self.direct_socket.setsockopt(zmq.LINGER, 0)
+            self.direct_socket.setsockopt(zmq.SNDTIMEO, 2000)
+
+        # until the broker stops the worker, see `_on_control`
+        self.running = True
+
     def listen(
-        self, address: str, msg_handler: Callable[[bytes, bytes], Optional[bytes]]
+        self, address: str, msg_handler: Callable[[FuncRef, bytes], Optional[Response]]
     ) -> None:
         self.socket.connect(address)
+        self._on_connect()
         logging.info("Starting worker %d", self.worker_id)
 
-        while True:  # pragma: no cover - hard to test
-            try:
-                self._recv_and_process(msg_handler)
-            except zmq.error.Again:
-                continue
+        if self.direct_socket is None:
+            while self.running:  # pragma: no cover - hard to test
+                try:
+                    self._recv_and_process(msg_handler)
+                except zmq.error.Again:
+                    continue
+            return
+
+        self.direct_socket.bind(self.direct_address)  # type: ignore
+        logging.info("Worker %d listening at %s", self.worker_id, self.direct_address)
+
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        poller.register(self.direct_socket, zmq.POLLIN)
+
+        while self.running:  # pragma: no cover - hard to test
+            for sock, _ in poller.poll():
+                try:
+                    self._recv_and_process(msg_handler, sock)
+                except zmq.error.Again:
+                    continue
+
+    def _on_connect(self) -> None:
+        pass
+
+    def _recv_and_process(
+        self,
+        msg_handler: Callable[[FuncRef, bytes], Optional[Response]],
+        socket: Optional[zmq.Socket] = None,
+    ):
+        sock = socket or self.socket
 
-    def _recv_and_process(self, msg_handler: Callable[[bytes, bytes], Optional[bytes]]):
         # multipart because first frame is ident, set by the broker
-        frames = self.socket.recv_multipart()
-        if len(frames) != 2:
-            logging.error("invalid message received: %s", frames)
+        # or by our ROUTER socket for direct requests
+        frames = sock.recv_multipart(copy=False)
+        if len(frames) == 1 and self._on_control(frames[0]):
             return
+        request = _unpack_request(frames)
+        if request is None:
+            self._on_dropped(sock)
+            return
+
+        ident, req_id, func_name, message, multipart, deadline = request
+        if deadline is None:
+            response = msg_handler(func_name, message)
+        else:
+            # for the handler to check, and to pass on to its own calls
+            token = set_deadline(deadline)
+            try:
+                response = msg_handler(func_name, message)
+            finally:
+                reset_deadline(token)
+
+        # send is slow, need to find a way to make it faster
+        try:
+            sock.send_multipart(
+                _pack_response(ident, req_id, response, multipart),
+                zmq.NOBLOCK,
+                copy=False,
+            )
+        except zmq.error.Again:
+            self._on_dropped(sock)
+            raise
+        self._on_served()
+
+    def _on_control(self, frame: Frame) -> bool:
+        """
+        Called with the messages of one frame, which are not requests.
+        True if it was a message of the broker to the worker itself.
+        """
+        return False
 
-        # ident is set by the broker, because it is a DEALER socket
-        # so the broker knows who to send the response to
-        ident, data = frames
+    def _on_served(self) -> None:
+        """
+        Called after the response of a request is sent.
+        """
 
-        # first 16 bytes is request id
-        req_id = data[:16]
-        data = data[16:]
+    def _on_dropped(self, socket: zmq.Socket) -> None:
+        """
+        Called when a request got no response, as it was invalid
+        or the response could not be sent.
+        """
 
-        # then 80 bytes is function name
-        func_name = data[:80].strip()
+    def close(self) -> None:
+        # when stopped, give the last responses time to leave
+        self.socket.close(None if self.running else STOP_LINGER)
+        if self.direct_socket is not None:
+            self.direct_socket.close()
+        self.context.term()
 
-        # the rest is message
-        message = data[80:]
 
-        response = msg_handler(func_name, message)
+class AsyncZeroMQWorker:
+    """
+    Worker driven by a `zmq.asyncio` socket on the caller's event loop.
 
-        # send is slow, need to find a way to make it faster
-        self.socket.send_multipart(
-            [ident, req_id + response if response else b""], zmq.NOBLOCK
+    Every received request is processed in its own task, so coroutine rpc
+    functions that are awaiting I/O don't block the next request.
+
+    With `max_concurrency` the worker stops pulling from the socket while that many
+    requests are in flight, and keeps its receive queue short. Only the "lru" broker
+    then routes new requests to other workers. The proxy broker keeps sending
+    requests round robin, and they wait in the socket buffers until a slot is free.
+
+    With `direct_address` the worker also binds a ROUTER socket there,
+    so clients can skip the broker and send requests to it directly.
+    """
+
+    def __init__(
+        self,
+        worker_id: int,
+        max_concurrency: Optional[int] = None,
+        direct_address: Optional[str] = None,
+    ):
+        self.worker_id = worker_id
+        self.max_concurrency = max_concurrency
+        self.direct_address = direct_address
+        self.context = zmqasync.Context()
+
+        self.socket: zmqasync.Socket = self.context.socket(zmq.DEALER)
+        self.socket.setsockopt(zmq.LINGER, 0)  # dont buffer messages
+        self.socket.setsockopt(zmq.SNDTIMEO, 2000)
+
+        self.direct_socket: Optional[zmqasync.Socket] = None
+        if direct_address:
+            self.direct_socket = self.context.socket(zmq.ROUTER)
+            self.direct_socket.setsockopt(zmq.LINGER, 0)
+            self.direct_socket.setsockopt(zmq.SNDTIMEO, 2000)
+
+        self._slots: Optional[asyncio.Semaphore] = None
+        if max_concurrency:
+            self.socket.setsockopt(zmq.RCVHWM, max_concurrency)
+            self._slots = asyncio.Semaphore(max_concurrency)
+
+        # keep strong references, the loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+
+        # until the broker stops the worker, see `_on_control`
+        self.running = True
+
+    async def listen(
+        self,
+        address: str,
+        msg_handler: Callable[[FuncRef, bytes], Awaitable[Optional[Response]]],
+    ) -> None:
+        self.socket.connect(address)
+        await self._on_connect()
+        logging.info("Starting async worker %d", self.worker_id)
+
+        sockets = [self.socket]
+        if self.direct_socket is not None:
+            self.direct_socket.bind(self.direct_address)  # type: ignore
+            logging.info(
+                "Worker %d listening at %s", self.worker_id, self.direct_address
+            )
+            sockets.append(self.direct_socket)
+
+        receivers = [
+            asyncio.ensure_future(self._recv_loop(sock, msg_handler))
+            for sock in sockets
+        ]
+        # only the broker's socket ends its loop, when the worker is stopped
+        done, pending = await asyncio.wait(
+            receivers, return_when=asyncio.FIRST_COMPLETED
         )
+        for receiver in pending:
+            receiver.cancel()
+        for receiver in done:
+            receiver.result()
+
+    async def _recv_loop(
+        self,
+        socket: zmqasync.Socket,
+        msg_handler: Callable[[FuncRef, bytes], Awaitable[Optional[Response]]],
+    ) -> None:
+        while self.running:  # pragma: no cover - hard to test
+            if self._slots:
+                # backpressure, don't take more than we can handle
+                await self._slots.acquire()
+            frames = await socket.recv_multipart(copy=False)
+            if len(frames) == 1 and await self._on_control(frames[0]):
+                if self._slots:
+                    self._slots.release()
+                continue
+            task = asyncio.create_task(self._process(frames, msg_handler, socket))
+            self._tasks.add(task)
+            task.add_done_callback(self._on_done)
+
+    async def _on_connect(self) -> None:
+        pass
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._slots:
+            self._slots.release()
+
+    async def _process(
+        self,
+        frames: List[Frame],
+        msg_handler: Callable[[FuncRef, bytes], Awaitable[Optional[Response]]],
+        socket: Optional[zmqasync.Socket] = None,
+    ) -> None:
+        sock = socket or self.socket
+        request = _unpack_request(frames)
+        if request is None:
+            await self._on_dropped(sock)
+            return
+
+        ident, req_id, func_name, message, multipart, deadline = request
+        if deadline is None:
+            response = await msg_handler(func_name, message)
+        else:
+            # for the handler to check, and to pass on to its own calls
+            token = set_deadline(deadline)
+            try:
+                response = await msg_handler(func_name, message)
+            finally:
+                reset_deadline(token)
+
+        try:
+            await sock.send_multipart(
+                _pack_response(ident, req_id, response, multipart),
+                zmq.NOBLOCK,
+                copy=False,
+            )
+        except zmq.error.Again:
+            logging.error("Worker %d could not send response", self.worker_id)
+            await self._on_dropped(sock)
+        else:
+            await self._on_served()
+
+    async def _on_control(self, frame: Frame) -> bool:
+        """
+        Called with the messages of one frame, which are not requests.
+        True if it was a message of the broker to the worker itself.
+        """
+        return False
+
+    async def _on_served(self) -> None:
+        """
+        Called after the response of a request is sent.
+        """
+
+    async def _drain(self) -> None:
+        # the requests in flight, their tasks take themselves out when done
+        while self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    async def _on_dropped(self, socket: zmqasync.Socket) -> None:
+        """
+        Called when a request got no response, as it was invalid
+        or the response could not be sent.
+        """
 
     def close(self) -> None:
-        self.socket.close()
+        for task in self._tasks:
+            task.cancel()
+        # when stopped, give the last responses time to leave
+        self.socket.close(None if self.running else STOP_LINGER)
+        if self.direct_socket is not None:
+            self.direct_socket.close()
         self.context.term()
+
+
+def _unpack_request(
+    frames: List[Frame],
+) -> Optional[Tuple[bytes, bytes, FuncRef, Body, bool, Optional[float]]]:
+    """
+    Split the request into ident, request id, function, message,
+    whether it was multipart, and its deadline, see `wire`.
+    The message of a multipart request is not copied.
+    """
+    # ident is set by the broker, because it is a DEALER socket
+    # so the broker knows who to send the response to
+    if len(frames) == 4:
+        ident, req_id, header_frame, body = frames
+        header = as_bytes(header_frame)
+        func_name, _ = unpack_header(header)
+        return (
+            as_bytes(ident),
+            as_bytes(req_id),
+            func_name,
+            as_buffer(body),
+            True,
+            unpack_deadline(header),
+        )
+
+    if len(frames) != 2:
+        logging.error("invalid message received: %s", frames)
+        return None
+
+    ident, data = as_bytes(frames[0]), as_bytes(frames[1])
+
+    # first 16 bytes is request id
+    req_id = data[:16]
+
+    # then the function name or id, see `wire`, and the rest is message
+    payload = data[16:]
+    func_name, message = unpack_header(payload)
+
+    return ident, req_id, func_name, message, False, unpack_deadline(payload)
+
+
+def _pack_response(
+    ident: bytes, req_id: bytes, response: Optional[Response], multipart: bool
+) -> List[bytes]:
+    if not response:
+        return [ident, b""]
+    hint = b""
+    if isinstance(response, tuple):
+        hint, response = response
+    if multipart:
+        # one frame responses have no room for the cache hint
+        return [ident, req_id, hint, response] if hint else [ident, req_id, response]
+    return [ident, req_id + response]
@@ -0,0 +1,191 @@
+"""
+Requests are either one frame, the request id followed by the header and the message,
+or multipart `[request id, header, message]`, which doesn't copy large messages.
+Responses have the same shape as their request. Clients send multipart only
+to the servers that returned a function table, older ones take one frame.
+Multipart responses of the functions with a `CachePolicy.client_ttl` also carry
+a cache hint, `[request id, cache hint, response]`, the seconds the client may
+cache the response, as a big-endian double.
+
+Legacy header, the function name padded to 80 bytes:
+
+    function name(80)
+
+Compact header, for the functions in the table returned by the `connect` handshake:
+
+    0x00(1) | function id(2) | table tag(4) | flags(1) [| deadline(8)] [| priority(1)]
+
+The function id is the index of the function in the table and the table tag
+is a crc32 of it, so a worker with a different table (like after a restart
+with new functions) doesn't run the wrong function.
+With the `FLAG_DEADLINE` flag, the header ends with the unix time the client
+gives up on the request, as a big-endian double, see `zero.utils.deadline`.
+With the `FLAG_PRIORITY` flag, it ends with the priority of the call,
+0 to `MAX_PRIORITY`, which the "lru" broker serves first when requests wait.
+The other flags are reserved, always 0.
+A function name never starts with a null byte, so the two headers can't be mixed up.
+"""
+
+import struct
+import zlib
+from typing import List, Optional, Tuple, Union
+
+import zmq
+
+FUNC_NAME_LEN = 80
+COMPACT_MARKER = 0
+# function ids are 2 bytes, the rest of the functions use the legacy header
+MAX_COMPACT_FUNCS = 0x10000
+
+_COMPACT_HEADER = struct.Struct(">BHIB")
+COMPACT_HEADER_LEN = _COMPACT_HEADER.size
+
+FLAG_DEADLINE = 0x01
+FLAG_PRIORITY = 0x02
+_DEADLINE = struct.Struct(">d")
+
+# priorities are 0 to MAX_PRIORITY, higher ones are served first
+MAX_PRIORITY = 9
+DEFAULT_PRIORITY = 0
+
+# workers announce their pool to the "lru" broker,
+# the functions without one are served by this one
+DEFAULT_POOL = "default"
+
+_CACHE_HINT = struct.Struct(">d")
+
+# function name (legacy header) or (function id, table tag) (compact header)
+FuncRef = Union[bytes, Tuple[int, int]]
+
+# received with `copy=False` it's a zmq frame, else bytes
+Frame = Union[zmq.Frame, bytes]
+
+# message or response body, a view of the received frame for multipart ones
+Body = Union[memoryview, bytes]
+
+# response of a rpc function, with its cache hint if it has one
+Response = Union[bytes, Tuple[bytes, bytes]]
+
+
+def legacy_header(func_name: str) -> bytes:
+    # make function name exactly 80 bytes
+    return func_name.ljust(FUNC_NAME_LEN).encode()
+
+
+def compact_header(func_id: int, table_tag: int, flags: int = 0) -> bytes:
+    return _COMPACT_HEADER.pack(COMPACT_MARKER, func_id, table_tag, flags)
+
+
+def table_tag(func_names: List[str]) -> int:
+    return zlib.crc32("\n".join(func_names).encode())
+
+
+def with_deadline(header: bytes, deadline: float) -> bytes:
+    """
+    The header carrying the deadline, if it is a compact one.
+    The legacy header has no room for it.
+    """
+    if header[:1] != b"\x00":
+        return header
+    flags = header[COMPACT_HEADER_LEN - 1] | FLAG_DEADLINE
+    return (
+        header[: COMPACT_HEADER_LEN - 1]
+        + bytes((flags,))
+        + _DEADLINE.pack(deadline)
+        + header[COMPACT_HEADER_LEN:]
+    )
+
+
+def with_priority(header: bytes, priority: int) -> bytes:
+    """
+    The header carrying the priority of the call, if it is a compact one.
+    The legacy header has no room for it.
+    """
+    if header[:1] != b"\x00":
+        return header
+    flags = header[COMPACT_HEADER_LEN - 1] | FLAG_PRIORITY
+    return (
+        header[: COMPACT_HEADER_LEN - 1]
+        + bytes((flags,))
+        + header[COMPACT_HEADER_LEN:]
+        + bytes((priority,))
+    )
+
+
+def _compact_len(flags: int) -> int:
+    size = COMPACT_HEADER_LEN
+    if flags & FLAG_DEADLINE:
+        size += _DEADLINE.size
+    if flags & FLAG_PRIORITY:
+        size += 1
+    return size
+
+
+def unpack_header(data: bytes) -> Tuple[FuncRef, bytes]:
+    """
+    Split the data after the request id into the function reference and the message.
+    """
+    if data[:1] == b"\x00" and len(data) >= COMPACT_HEADER_LEN:
+        _, func_id, tag, flags = _COMPACT_HEADER.unpack_from(data)
+        return (func_id, tag), data[_compact_len(flags) :]
+
+    return data[:FUNC_NAME_LEN].strip(), data[FUNC_NAME_LEN:]
+
+
+def unpack_func_ref(data: Body) -> FuncRef:
+    """
+    Function reference from the data after the request id, without the message,
+    so the message is not copied.
+    """
+    if data[:1] == b"\x00" and len(data) >= COMPACT_HEADER_LEN:
+        _, func_id, tag, _ = _COMPACT_HEADER.unpack_from(data)
+        return func_id, tag
+    return bytes(data[:FUNC_NAME_LEN]).strip()
+
+
+def unpack_deadline(data: bytes) -> Optional[float]:
+    """
+    Deadline of the request from the data after the request id, if it has one.
+    """
+    if (
+        data[:1] == b"\x00"
+        and len(data) >= COMPACT_HEADER_LEN + _DEADLINE.size
+        and data[COMPACT_HEADER_LEN - 1] & FLAG_DEADLINE
+    ):
+        return _DEADLINE.unpack_from(data, COMPACT_HEADER_LEN)[0]
+    return None
+
+
+def unpack_priority(data: Body) -> Optional[int]:
+    """
+    Priority of the call from the data after the request id, if it has one.
+    """
+    if data[:1] != b"\x00" or len(data) < COMPACT_HEADER_LEN:
+        return None
+    flags = data[COMPACT_HEADER_LEN - 1]
+    if not flags & FLAG_PRIORITY or len(data) < _compact_len(flags):
+        return None
+    return data[_compact_len(flags) - 1]
+
+
+def cache_hint(ttl: float) -> bytes:
+    return _CACHE_HINT.pack(ttl)
+
+
+def unpack_cache_hint(frames: List[Body]) -> Optional[float]:
+    """
+    Seconds the response may be cached, from the frames after the request id.
+    None if the server didn't send a hint.
+    """
+    if len(frames) != 2 or len(frames[0]) != _CACHE_HINT.size:
+        return None
+    return _CACHE_HINT.unpack(frames[0])[0]
+
+
+def as_bytes(frame: Frame) -> bytes:
+    return frame.bytes if isinstance(frame, zmq.Frame) else frame
+
+
+def as_buffer(frame: Frame) -> Body:
+    # no copy, the memoryview keeps the frame alive
+    return frame.buffer if isinstance(frame, zmq.Frame) else frame